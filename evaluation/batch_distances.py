@@ -0,0 +1,166 @@
+"""
+Compute the distance metrics of check_if_patched_in_calltree.py for the whole experiments sheet.
+
+Experiments are grouped by graph. Each graph is loaded once, all src/dst patterns
+of its experiments are resolved in a single pass over the node names, and every
+metric is answered by a multi-source BFS from one side (the test entry BFS tree
+is shared by D(c_entry, c_patched) and D(c_entry, c_pred)). The graph is
+undirected, so the minimum over all (source, target) combinations of the
+per-row loops equals the distance from the union of sources to the union of
+targets. Results, including the paths, are written next to the experiments sheet.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from dijkstra_kg import get_graph_index, path_to
+
+EXPERIMENTS_FILE = os.getenv("EXPERIMENTS_FILE", "data/experiments.xlsx")
+
+METHOD_HOPS = "D(c_pred, c_patched)"
+TESTED_HOPS = "D(c_entry, c_patched)"
+TESTED_LLM_HOPS = "D(c_entry, c_pred)"
+
+
+def nearest(index, sources, targets):
+    """Distance and path (source -> target) between the closest pair of two node sets."""
+    if not sources or not targets:
+        return math.inf, []
+    dist, pred, _ = index.search(sources)
+    targets = np.array(sorted(set(targets)))
+    best = int(targets[np.argmin(dist[targets])])
+    if not np.isfinite(dist[best]):
+        return math.inf, []
+    return float(dist[best]), path_to(best, pred, index.rev)
+
+
+def _union(index, patterns):
+    nodes = set()
+    for pattern in patterns:
+        nodes.update(index.match(pattern))
+    return sorted(nodes)
+
+
+def graph_distances(graph_uri: str, rows: pd.DataFrame, metrics) -> list:
+    """All requested metrics for the experiments of one graph."""
+    index = get_graph_index(graph_uri)
+
+    experiments, results = [], []
+    for _, row in rows.iterrows():
+        llm_result_str = row["LLM result"]
+        try:
+            llm_result = None if pd.isna(llm_result_str) else json.loads(llm_result_str)
+            if llm_result is not None and not (isinstance(llm_result, dict) and {"class", "method"} <= llm_result.keys()):
+                raise ValueError("expected an object with class and method")
+        except ValueError as e:
+            # One malformed cell only fails its own row
+            print(f"Nr {row['Nr']}: failed - invalid LLM result: {e}")
+            results.append(_failed(row, graph_uri, f"invalid LLM result: {e}"))
+            continue
+        method_exist_val = row["Method Exist"]
+        experiments.append({
+            "row": row,
+            "patched_classes": str(row["Patched class"]).split(","),
+            "patched_methods": str(row["Patched method"]).split(","),
+            "tested": f"{row['Tested Class']}.{row['Tested Method']}",
+            "llm_result": llm_result,
+            "llm_exists": (method_exist_val == 1.0) or pd.isna(method_exist_val),
+            "patch_exists": row["Included (patch exists within calltree)"],
+        })
+
+    patterns = []
+    for e in experiments:
+        patterns.append(e["tested"])
+        for cls, method in itertools.product(e["patched_classes"], e["patched_methods"]):
+            patterns += [cls, f"{cls}.{method}"]
+        if e["llm_result"]:
+            patterns += [e["llm_result"]["class"], f"{e['llm_result']['class']}.{e['llm_result']['method']}"]
+    index.match_many(patterns)
+
+    for e in experiments:
+        try:
+            results.append(_experiment_distances(index, graph_uri, e, metrics))
+        except Exception as ex:
+            print(f"Nr {e['row']['Nr']}: failed - {ex}")
+            results.append(_failed(e["row"], graph_uri, str(ex)))
+    return results
+
+
+def _failed(row, graph_uri: str, error: str) -> dict:
+    return {"Nr": row["Nr"], "Graph": graph_uri, "Repository": row["Repository"], "Error": error}
+
+
+def _experiment_distances(index, graph_uri: str, e: dict, metrics) -> dict:
+    """Requested metrics of one experiment; its patterns are already resolved."""
+    row, llm = e["row"], e["llm_result"]
+    result = {"Nr": row["Nr"], "Graph": graph_uri, "Repository": row["Repository"]}
+    tested = index.match(e["tested"])
+    patched = _union(index, [f"{c}.{m}" for c, m in itertools.product(e["patched_classes"], e["patched_methods"])])
+
+    if "method-hops" in metrics and llm and e["llm_exists"] and e["patch_exists"]:
+        # BFS from the predicted class; the path is reported from the patched class
+        distance, path = nearest(index, index.match(llm["class"]), _union(index, e["patched_classes"]))
+        result[METHOD_HOPS], result[f"Path {METHOD_HOPS}"] = distance, list(reversed(path))
+
+    if "tested-hops" in metrics and e["patch_exists"]:
+        distance, path = nearest(index, tested, patched)
+        result[TESTED_HOPS], result[f"Path {TESTED_HOPS}"] = distance, list(reversed(path))
+
+    if "tested-llm-hops" in metrics and llm and e["llm_exists"]:
+        distance, path = nearest(index, tested, index.match(f"{llm['class']}.{llm['method']}"))
+        result[TESTED_LLM_HOPS], result[f"Path {TESTED_LLM_HOPS}"] = distance, path
+
+    return result
+
+
+def batch_distances(df: pd.DataFrame, metrics) -> pd.DataFrame:
+    # The Graph column also holds the cells of the summary tables below the experiments
+    df = df[df["Graph"].astype(str).str.startswith("urn:")]
+    results = []
+    for graph, rows in df.groupby("Graph", sort=False):
+        try:
+            results += graph_distances(graph, rows, metrics)
+        except Exception as e:
+            print(f"Graph {graph}: failed - {e}")
+            continue
+        print(f"Graph {graph}: {len(rows)} experiments")
+
+    table = pd.DataFrame(results)
+    for column in [c for c in table.columns if c.startswith("Path ")]:
+        table[column] = table[column].map(lambda p: " -> ".join(p) if isinstance(p, list) else None)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch distance metrics for all experiments, grouped by graph.")
+    parser.add_argument("--method-hops", action="store_true", help="D(c_pred, c_patched).")
+    parser.add_argument("--tested-hops", action="store_true", help="D(c_entry, c_patched).")
+    parser.add_argument("--tested-llm-hops", action="store_true", help="D(c_entry, c_pred).")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="Output format (default: csv).")
+    parser.add_argument("--output", help="Output path (default: data/experiment_distances.<format>).")
+    args = parser.parse_args()
+
+    metrics = {name for name, on in [("method-hops", args.method_hops), ("tested-hops", args.tested_hops),
+                                     ("tested-llm-hops", args.tested_llm_hops)] if on}
+    # Default: all metrics when no specific flag is provided
+    metrics = metrics or {"method-hops", "tested-hops", "tested-llm-hops"}
+
+    df = pd.read_excel(EXPERIMENTS_FILE, header=1)
+    table = batch_distances(df, metrics)
+
+    out = args.output or os.path.join(os.path.dirname(EXPERIMENTS_FILE), f"experiment_distances.{args.format}")
+    if args.format == "parquet":
+        table.to_parquet(out, index=False)
+    else:
+        table.to_csv(out, index=False)
+    print(f"{len(table)} experiments written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark the BFS-based shortest_path against the former Floyd-Warshall implementation.
+
+Runs on synthetic call graphs (random trees plus a few cross edges between
+methods, similar to the method-name graphs built by dijkstra_kg.build_graph), so
+no SPARQL endpoint is needed. Reports runtime, peak memory and whether both
+implementations return the same distances.
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import floyd_warshall
+
+from dijkstra_kg import multi_source_search
+
+
+def synthetic_graph(n: int, extra_edges: float = 0.2, seed: int = 0) -> csr_matrix:
+    """Random undirected method graph: a random tree plus extra_edges * n cross edges."""
+    rng = random.Random(seed)
+    rows, cols = [], []
+    for v in range(1, n):
+        u = rng.randrange(0, v)
+        rows += [u, v]
+        cols += [v, u]
+    for _ in range(int(extra_edges * n)):
+        u, v = rng.randrange(n), rng.randrange(n)
+        if u != v:
+            rows += [u, v]
+            cols += [v, u]
+    graph = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+    graph.data[:] = 1.0  # duplicate edges are summed by csr_matrix
+    return graph
+
+
+def _measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def benchmark(n: int, queries: int, sources_per_query: int, seed: int = 0, run_floyd: bool = True):
+    graph = synthetic_graph(n, seed=seed)
+    rng = random.Random(seed + 1)
+    pairs = [
+        (rng.sample(range(n), sources_per_query), rng.sample(range(n), sources_per_query))
+        for _ in range(queries)
+    ]
+
+    def bfs_queries():
+        out = []
+        for srcs, dsts in pairs:
+            dist, _, _ = multi_source_search(graph, srcs)
+            out.append(float(dist[dsts].min()))
+        return out
+
+    bfs_result, bfs_time, bfs_peak = _measure(bfs_queries)
+    print(f"n={n:>7} BFS:            {bfs_time:8.3f}s  peak {bfs_peak / 2**20:9.1f} MiB  ({queries} queries)")
+
+    if not run_floyd:
+        return
+
+    def floyd_queries():
+        # The old implementation recomputed all pairs for every shortest_path call;
+        # a single run is timed here and the per-query lookups are added on top
+        dist = floyd_warshall(graph, directed=False)
+        return [float(dist[np.ix_(srcs, dsts)].min()) for srcs, dsts in pairs]
+
+    fw_result, fw_time, fw_peak = _measure(floyd_queries)
+    same = np.allclose(bfs_result, fw_result)
+    print(f"n={n:>7} Floyd-Warshall: {fw_time:8.3f}s  peak {fw_peak / 2**20:9.1f} MiB  "
+          f"(one all-pairs run, old code ran it per query; identical distances: {same})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BFS shortest paths against Floyd-Warshall.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000, 4000],
+                        help="Number of distinct methods (nodes) per synthetic graph.")
+    parser.add_argument("--queries", type=int, default=20, help="src/dst queries per graph (default: 20).")
+    parser.add_argument("--sources", type=int, default=3, help="Matched nodes per src/dst pattern (default: 3).")
+    parser.add_argument("--floyd-max", type=int, default=5000,
+                        help="Skip Floyd-Warshall above this size (default: 5000).")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        benchmark(n, args.queries, args.sources, run_floyd=n <= args.floyd_max)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,40 @@
 import argparse
+import glob
+import hashlib
+import io
 import itertools
 import json
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 
 import pandas as pd
-from SPARQLWrapper import SPARQLWrapper, JSON
-from dijkstra_kg import shortest_path
+import tree_distance
+from dijkstra_kg import get_graph_index, shortest_path
+from name_index import NameIndex
 
-SPARQL_ENDPOINT = os.getenv("SPARQL_ENDPOINT", "http://localhost:8890/sparql")
 EXPERIMENTS_FILE = os.getenv("EXPERIMENTS_FILE", "data/experiments.xlsx")
+# Directory of parsed copies of experiment sheets, keyed by sheet path and mtime
+EXPERIMENTS_CACHE_DIR = os.getenv("EXPERIMENTS_CACHE_DIR", ".cache")
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", "4"))
 
 LIMIT_CALLS = 5000
 
-# SPARQL ASK query: checks if an arbitrary pattern occurs in the call tree
-CC1_QUERY = """
-ASK
-FROM <{{GRAPH}}>
-WHERE {
-  ?s ?p ?o .
-  FILTER(REGEX(STR(?o), "{{PATTERN}}"))
+# Distance modes: hops in the method-name graph, or hops between invocations in the call tree
+DISTANCE_MODES = {
+    "method-graph": shortest_path,
+    "invocation-tree": tree_distance.shortest_path,
 }
 
-"""
+HOP_CHECKS = {"method-hops", "tested-hops", "tested-llm-hops"}
+
+_REGEX_META = re.compile(r"[\\^$|?*+()\[\]{}]")
 
 
 def calculate_method_hops(nr, graph, patched_classes, patched_methods, llm_result,
-                          llm_method_exist_in_calltree, patch_exist_in_calltree, project):
+                          llm_method_exist_in_calltree, patch_exist_in_calltree, project,
+                          path_fn=shortest_path):
     """Calculate shortest distance D(c_pred, c_patched) between LLM prediction and patched method."""
     if not llm_result:
         print(f"Nr {nr}: No LLM result provided.")
@@ -33,7 +42,7 @@ def calculate_method_hops(nr, graph, patched_classes, patched_methods, llm_resul
     if llm_method_exist_in_calltree and patch_exist_in_calltree:
         current_shortest_distance = None
         for combo in itertools.product(patched_classes, patched_methods):
-            distance, _, _, _ = shortest_path(
+            distance, _, _, _ = path_fn(
                 graph_uri=graph,
                 src=combo[0],
                 dst=llm_result["class"],
@@ -47,12 +56,12 @@ def calculate_method_hops(nr, graph, patched_classes, patched_methods, llm_resul
 
 
 def calculate_tested_hops(nr, graph, patched_classes, patched_methods, tested_class,
-                          tested_method, patch_exist_in_calltree, project):
+                          tested_method, patch_exist_in_calltree, project, path_fn=shortest_path):
     """Calculate shortest distance D(c_entry, c_patched) between test entry and patched method."""
     if patch_exist_in_calltree:
         current_shortest_distance = None
         for combo in itertools.product(patched_classes, patched_methods):
-            distance, _, _, _ = shortest_path(
+            distance, _, _, _ = path_fn(
                 graph_uri=graph,
                 src=combo[0] + "." + combo[1],
                 dst=tested_class + "." + tested_method,
@@ -65,13 +74,14 @@ def calculate_tested_hops(nr, graph, patched_classes, patched_methods, tested_cl
         print(f"Nr {nr}: Patched method not in call tree, cannot calculate distance.")
 
 
-def calculate_tested_llm_hops(nr, graph, tested_class, tested_method, llm_result, method_exist, project):
+def calculate_tested_llm_hops(nr, graph, tested_class, tested_method, llm_result, method_exist, project,
+                              path_fn=shortest_path):
     """Calculate shortest distance between test entry and LLM-predicted method."""
     if not llm_result:
         print(f"Nr {nr}: No LLM result provided.")
         return
     if method_exist:
-        distance, _, _, _ = shortest_path(
+        distance, _, _, _ = path_fn(
             graph_uri=graph,
             src=tested_class + "." + tested_method,
             dst=llm_result["class"] + "." + llm_result["method"],
@@ -81,19 +91,136 @@ def calculate_tested_llm_hops(nr, graph, tested_class, tested_method, llm_result
         print(f"Nr {nr}: LLM-predicted method not in call tree, cannot calculate distance.")
 
 
+def method_name_index(graph: str) -> NameIndex:
+    """NameIndex over the method names of a graph, from its GraphIndex (loaded once per graph).
+
+    The GraphIndex holds every method name that calls or is called by another method,
+    so check 1 needs no query of its own.
+    """
+    return get_graph_index(graph).names
+
+
+def find_patched_node(patched_classes, patched_methods, graph):
+    """First method name matching any patched class/method combination, or None.
+
+    Same semantics as the former per-combination ASK query, i.e. the regex
+    <class>(\\$.*)?\\.<method> searched in every method name.
+    """
+    index = method_name_index(graph)
+    for cls, method in itertools.product(patched_classes, patched_methods):
+        if not _REGEX_META.search(cls + method):
+            # Plain names: class -> method lookup (resolves simple class names and inner classes)
+            nodes = index.nodes(cls, method)
+            if nodes:
+                return index.labels[nodes[0]]
+        regex = re.compile(cls + r"(\$.*)?\." + method)
+        for name in index.labels:
+            if regex.search(name):
+                return name
+    return None
+
+
 def consistency_check_1(patched_classes, patched_methods, graph, nr):
     """Check if any combination of patched class and method appears in the call tree (Step 5)."""
-    sparql = SPARQLWrapper(SPARQL_ENDPOINT)
-    sparql.setReturnFormat(JSON)
-    for combo in itertools.product(patched_classes, patched_methods):
-        query = CC1_QUERY.replace("{{GRAPH}}", graph).replace(
-            "{{PATTERN}}", combo[0] + "(\\\\$.*)?\\\\." + combo[1]
-        )
-        sparql.setQuery(query)
-        results = sparql.query().convert()
-        if results["boolean"]:
-            return True
-    return False
+    return find_patched_node(patched_classes, patched_methods, graph) is not None
+
+
+def experiment_patterns(patched_classes, patched_methods, tested_class, tested_method, llm_result):
+    """All src/dst patterns the distance checks of one experiment will look up."""
+    patterns = [f"{tested_class}.{tested_method}"]
+    for cls, method in itertools.product(patched_classes, patched_methods):
+        patterns += [cls, f"{cls}.{method}"]
+    if llm_result:
+        patterns += [llm_result["class"], f"{llm_result['class']}.{llm_result['method']}"]
+    return patterns
+
+
+def load_experiments(path: str = EXPERIMENTS_FILE, cache_dir: str = EXPERIMENTS_CACHE_DIR) -> pd.DataFrame:
+    """Read the experiments sheet, reusing a parsed copy of exactly this sheet version.
+
+    The copy is a pickle: the sheet's object columns mix strings, numbers and booleans
+    (e.g. "Included"), which Parquet cannot store without changing their values.
+    """
+    prefix = "experiments-" + hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    cache_path = os.path.join(cache_dir, f"{prefix}-{os.stat(path).st_mtime_ns}.pkl")
+    if os.path.isfile(cache_path):
+        return pd.read_pickle(cache_path)
+    df = pd.read_excel(path, header=1)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for old in glob.glob(os.path.join(cache_dir, f"{prefix}-*.pkl")):
+            os.remove(old)  # copies of earlier versions of the sheet
+        df.to_pickle(cache_path)
+    except OSError as e:
+        print(f"Could not cache experiments: {e}")
+    return df
+
+
+def run_checks(row, checks, distance_mode):
+    """Run the requested checks for one experiment row (prints one line per check)."""
+    path_fn = DISTANCE_MODES[distance_mode]
+    nr = row["Nr"]
+    graph = row["Graph"]
+    project = row["Repository"]
+    patched_classes = str(row["Patched class"]).split(",")
+    patched_methods = str(row["Patched method"]).split(",")
+    tested_class = row["Tested Class"]
+    tested_method = row["Tested Method"]
+    patch_exist_in_calltree = row["Included (patch exists within calltree)"]
+    method_exist_val = row["Method Exist"]
+    llm_method_exist_in_calltree = (method_exist_val == 1.0) or pd.isna(method_exist_val)
+
+    llm_result_str = row["LLM result"]
+    llm_result = None if pd.isna(llm_result_str) else json.loads(llm_result_str)
+
+    if "method-hops" in checks:
+        calculate_method_hops(nr, graph, patched_classes, patched_methods, llm_result,
+                              llm_method_exist_in_calltree, patch_exist_in_calltree, project,
+                              path_fn=path_fn)
+
+    if "tested-hops" in checks:
+        calculate_tested_hops(nr, graph, patched_classes, patched_methods, tested_class,
+                              tested_method, patch_exist_in_calltree, project, path_fn=path_fn)
+
+    if "tested-llm-hops" in checks:
+        calculate_tested_llm_hops(nr, graph, tested_class, tested_method, llm_result,
+                                  llm_method_exist_in_calltree, project, path_fn=path_fn)
+
+    if "cc1" in checks:
+        matched = find_patched_node(patched_classes, patched_methods, graph)
+        print(f"Nr {nr}: Consistency check — patched method in call tree: {matched is not None}"
+              + (f" (matched {matched})" if matched else ""))
+
+
+def evaluate_graph(graph, rows: pd.DataFrame, checks, distance_mode) -> str:
+    """Run all checks for the experiments of one graph; returns their printed output.
+
+    The graph is loaded once (GraphIndex / InvocationTree caches of the worker
+    process) and all patterns of its experiments are resolved in one pass.
+    """
+    out = io.StringIO()
+    with redirect_stdout(out):
+        if checks & HOP_CHECKS and distance_mode == "method-graph":
+            patterns = []
+            for _, row in rows.iterrows():
+                try:
+                    llm_result = None if pd.isna(row["LLM result"]) else json.loads(row["LLM result"])
+                except ValueError:
+                    llm_result = None  # reported by run_checks below
+                patterns += experiment_patterns(
+                    str(row["Patched class"]).split(","), str(row["Patched method"]).split(","),
+                    row["Tested Class"], row["Tested Method"], llm_result)
+            try:
+                get_graph_index(graph).match_many(patterns)
+            except Exception as e:
+                # Only a prefetch; the checks below look the patterns up one by one
+                print(f"Graph {graph}: pattern prefetch failed - {e}")
+        for _, row in rows.iterrows():
+            try:
+                run_checks(row, checks, distance_mode)
+            except Exception as e:
+                print(f"Nr {row['Nr']}: failed - {e}")
+    return out.getvalue()
 
 
 def main():
@@ -108,43 +235,41 @@ def main():
                         help="Run consistency check: verify patched methods appear in call tree.")
     parser.add_argument("--all", dest="all_checks", action="store_true",
                         help="Run all checks (default when no flag is given).")
+    parser.add_argument("--distance-mode", choices=sorted(DISTANCE_MODES), default="method-graph",
+                        help="method-graph: hops between method names (default); "
+                             "invocation-tree: hops between invocations in the call tree (LCA-based).")
+    parser.add_argument("--workers", type=int, default=EVAL_WORKERS,
+                        help=f"Graphs evaluated in parallel worker processes (default: {EVAL_WORKERS}).")
     args = parser.parse_args()
 
+    checks = {name for name, on in [("method-hops", args.method_hops), ("tested-hops", args.tested_hops),
+                                    ("tested-llm-hops", args.tested_llm_hops), ("cc1", args.cc1)] if on}
     # Default: run all checks when no specific flag is provided
-    run_all = args.all_checks or not (args.method_hops or args.tested_hops or args.tested_llm_hops or args.cc1)
-
-    df = pd.read_excel(EXPERIMENTS_FILE, header=1)
-
-    for _, row in df.iterrows():
-        nr = row["Nr"]
-        graph = row["Graph"]
-        project = row["Repository"]
-        patched_classes = str(row["Patched class"]).split(",")
-        patched_methods = str(row["Patched method"]).split(",")
-        tested_class = row["Tested Class"]
-        tested_method = row["Tested Method"]
-        patch_exist_in_calltree = row["Included (patch exists within calltree)"]
-        method_exist_val = row["Method Exist"]
-        llm_method_exist_in_calltree = (method_exist_val == 1.0) or pd.isna(method_exist_val)
-
-        llm_result_str = row["LLM result"]
-        llm_result = None if pd.isna(llm_result_str) else json.loads(llm_result_str)
-
-        if run_all or args.method_hops:
-            calculate_method_hops(nr, graph, patched_classes, patched_methods, llm_result,
-                                  llm_method_exist_in_calltree, patch_exist_in_calltree, project)
-
-        if run_all or args.tested_hops:
-            calculate_tested_hops(nr, graph, patched_classes, patched_methods, tested_class,
-                                  tested_method, patch_exist_in_calltree, project)
-
-        if run_all or args.tested_llm_hops:
-            calculate_tested_llm_hops(nr, graph, tested_class, tested_method, llm_result,
-                                      llm_method_exist_in_calltree, project)
-
-        if run_all or args.cc1:
-            exists = consistency_check_1(patched_classes, patched_methods, graph, nr)
-            print(f"Nr {nr}: Consistency check — patched method in call tree: {exists}")
+    if args.all_checks or not checks:
+        checks = HOP_CHECKS | {"cc1"}
+
+    df = load_experiments()
+    groups = []
+    for graph, rows in df.groupby("Graph", sort=False, dropna=False):
+        if not str(graph).startswith("urn:"):
+            # Blank lines and the summary tables below the experiments, whose cells
+            # also end up in the Graph column ('Calls', '< 1,000', counts, ...)
+            rows = rows.dropna(how="all")
+            if len(rows):
+                labels = ", ".join(str(nr) for nr in rows["Nr"].dropna())
+                print(f"Skipping {len(rows)} rows without a graph URI" + (f" ({labels})" if labels else ""))
+            continue
+        groups.append((graph, rows))
+
+    if args.workers <= 1:
+        for graph, rows in groups:
+            print(evaluate_graph(graph, rows, checks, args.distance_mode), end="")
+        return
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(evaluate_graph, graph, rows, checks, args.distance_mode) for graph, rows in groups]
+        for future in futures:
+            print(future.result(), end="")
 
 
 if __name__ == "__main__":
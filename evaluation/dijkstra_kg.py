@@ -1,14 +1,25 @@
 import argparse
+import hashlib
 import math
 import os
-import re
+from collections import OrderedDict
 
+import numpy as np
 from scipy.sparse import csr_matrix
-from scipy.sparse.csgraph import floyd_warshall
+from scipy.sparse.csgraph import dijkstra, floyd_warshall
 from SPARQLWrapper import SPARQLWrapper, JSON
 
+from name_index import NameIndex
+
 
 SPARQL_ENDPOINT = os.getenv("SPARQL_ENDPOINT", "http://localhost:8890/sparql")
+# Number of loaded graphs kept in memory, and optional directory for persisted .npz indexes
+GRAPH_CACHE_SIZE = int(os.getenv("GRAPH_CACHE_SIZE", "8"))
+GRAPH_INDEX_DIR = os.getenv("GRAPH_INDEX_DIR", "")
+SEARCH_CACHE_SIZE = 64
+# Landmark oracle used by shortest_path(..., approximate=True)
+NUM_LANDMARKS = int(os.getenv("NUM_LANDMARKS", "16"))
+LANDMARK_TOLERANCE = float(os.getenv("LANDMARK_TOLERANCE", "0"))
 
 QUERY_TEMPLATE = """
 PREFIX ex: <http://example.org/>
@@ -33,48 +44,304 @@ def query_kg(graph_uri: str):
     return sparql.query().convert()
 
 
-def build_graph(graph_uri: str):
-    results = query_kg(graph_uri)["results"]["bindings"]
+def multi_source_search(graph, source_indices, weighted: bool = False):
+    """Shortest distances from the nearest of several sources to every node.
+
+    Runs one BFS (unweighted) or Dijkstra (weighted) seeded with all sources at
+    once, i.e. O(n + m) resp. O(m log n) instead of all-pairs O(n^3).
+
+    Returns (dist, pred, sources): dist[i] is the distance from the closest source,
+    pred[i] the predecessor on that path and sources[i] the source it came from
+    (-9999 where unreachable).
+    """
+    dist, pred, sources = dijkstra(
+        graph,
+        directed=False,
+        indices=np.asarray(source_indices, dtype=np.int32),
+        return_predecessors=True,
+        unweighted=not weighted,
+        min_only=True,
+    )
+    return dist, pred, sources
+
+
+def path_to(target: int, pred, rev):
+    """Reconstruct the path ending in target from a 1-D predecessor array."""
+    path = []
+    cur = target
+    while cur != -9999:
+        path.append(rev[cur])
+        cur = pred[cur]
+    return list(reversed(path))
+
+
+def edges_from_results(results):
+    """Return (u, v, w) arrays from the SPARQL bindings of QUERY_TEMPLATE."""
+    u = np.array([row["u"]["value"] for row in results], dtype=object)
+    v = np.array([row["v"]["value"] for row in results], dtype=object)
+    w = np.array([float(row["w"]["value"]) for row in results], dtype=float)
+    return u, v, w
+
+
+def csr_from_edges(u, v, w):
+    """Build the undirected CSR adjacency matrix with vectorized deduplication.
+
+    Returns (graph, labels) where labels[i] is the method name of node i.
+    """
+    labels, inverse = np.unique(np.concatenate([u, v]).astype(str), return_inverse=True)
+    n = len(labels)
+    ui, vi = inverse[:len(u)], inverse[len(u):]
+
+    # Undirected: insert both directions, then keep the first occurrence of each (row, col)
+    rows = np.concatenate([ui, vi]).astype(np.int64)
+    cols = np.concatenate([vi, ui]).astype(np.int64)
+    data = np.concatenate([w, w])
+    _, first = np.unique(rows * n + cols, return_index=True)
+
+    graph = csr_matrix((data[first], (rows[first], cols[first])), shape=(n, n))
+    return graph, labels
 
-    nodes = set()
-    edges = []
 
-    # Build edge list from SPARQL results
-    for row in results:
-        u = row["u"]["value"]
-        v = row["v"]["value"]
-        w = float(row["w"]["value"])
+class GraphIndex:
+    """Everything shortest_path needs for one graph, built once and reused.
+
+    Holds the CSR adjacency, the node-name index, the nodes matched per pattern
+    and the most recent BFS trees (keyed by their source node set).
+    """
 
-        nodes.update([u, v])
-        edges.append((u, v, w))
+    def __init__(self, graph_uri: str, graph: csr_matrix, labels):
+        self.graph_uri = graph_uri
+        self.graph = graph
+        self.labels = [str(label) for label in labels]
+        self.idx = {label: i for i, label in enumerate(self.labels)}
+        self.rev = dict(enumerate(self.labels))
+        self.names = NameIndex(self.labels)
+        self.weighted = bool(graph.nnz) and not np.all(graph.data == 1)
+        self._matches = {}
+        self._searches = OrderedDict()
+        self._oracles = {}
+
+    @classmethod
+    def from_sparql(cls, graph_uri: str):
+        u, v, w = edges_from_results(query_kg(graph_uri)["results"]["bindings"])
+        graph, labels = csr_from_edges(u, v, w)
+        return cls(graph_uri, graph, labels)
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            graph_uri=np.array(self.graph_uri),
+            labels=np.array(self.labels, dtype=str),
+            data=self.graph.data,
+            indices=self.graph.indices,
+            indptr=self.graph.indptr,
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as f:
+            n = len(f["labels"])
+            graph = csr_matrix((f["data"], f["indices"], f["indptr"]), shape=(n, n))
+            return cls(str(f["graph_uri"]), graph, f["labels"])
+
+    def match(self, pattern: str):
+        """Node indices whose label matches a src/dst pattern (cached per pattern)."""
+        if pattern not in self._matches:
+            self.match_many([pattern])
+        return self._matches[pattern]
+
+    def match_many(self, patterns):
+        """Resolve all patterns of an experiment in one pass over the labels (see NameIndex.resolve)."""
+        missing = [p for p in patterns if p not in self._matches]
+        if missing:
+            self._matches.update(self.names.resolve(missing))
+        return {p: self._matches[p] for p in patterns}
+
+    def search(self, source_indices):
+        """Multi-source search from the given nodes; the last SEARCH_CACHE_SIZE trees are cached."""
+        key = frozenset(source_indices)
+        if key in self._searches:
+            self._searches.move_to_end(key)
+            return self._searches[key]
+        result = multi_source_search(self.graph, sorted(key), weighted=self.weighted)
+        self._searches[key] = result
+        if len(self._searches) > SEARCH_CACHE_SIZE:
+            self._searches.popitem(last=False)
+        return result
+
+    def shortest_path(self, src: str, dst: str):
+        """Same contract as the module-level shortest_path."""
+        src_indices = self.match(src)
+        dst_indices = self.match(dst)
+        if not src_indices or not dst_indices:
+            return math.inf, [], src, dst
+
+        dist, pred, sources = self.search(src_indices)
+        dst_indices = np.array(dst_indices)
+        best = dst_indices[np.argmin(dist[dst_indices])]
+        best_distance = dist[best]
+        if not np.isfinite(best_distance):
+            return math.inf, [], src, dst
+
+        path = path_to(best, pred, self.rev)
+        return float(best_distance), path, self.rev[sources[best]], self.rev[best]
+
+    def oracle(self, **kwargs) -> "LandmarkOracle":
+        """Landmark distance oracle of this graph, built on first use per set of arguments."""
+        key = tuple(sorted(kwargs.items()))
+        if key not in self._oracles:
+            self._oracles[key] = LandmarkOracle(self, **kwargs)
+        return self._oracles[key]
+
+
+class LandmarkOracle:
+    """Approximate distances from BFS trees of a few landmark nodes.
+
+    For every landmark l the distances d(l, .) are precomputed once. A query between
+    node sets S and T is bounded by the triangle inequality:
+
+        max_l |d(l, s) - d(l, t)|  <=  d(s, t)  <=  min_l d(l, s) + d(l, t)
+
+    When the bounds agree (or differ by at most `tolerance`) the upper bound is
+    returned without any search; otherwise the query falls back to an exact BFS.
+    """
 
-    # Map nodes to integer indices
-    idx = {node: i for i, node in enumerate(nodes)}
-    idx_rev = {i: node for node, i in idx.items()}
+    def __init__(self, index: "GraphIndex", num_landmarks: int = 16,
+                 tolerance: float = 0.0, pairwise_limit: int = 100_000):
+        self.index = index
+        self.tolerance = tolerance
+        self.pairwise_limit = pairwise_limit
+        degree = np.diff(index.graph.indptr)
+        self.landmarks = [int(i) for i in np.argsort(-degree, kind="stable")[:num_landmarks]]
+        if self.landmarks:
+            dist, pred = dijkstra(
+                index.graph,
+                directed=False,
+                indices=np.asarray(self.landmarks, dtype=np.int32),
+                return_predecessors=True,
+                unweighted=not index.weighted,
+            )
+        else:
+            dist = np.empty((0, index.graph.shape[0]))
+            pred = np.empty((0, index.graph.shape[0]), dtype=np.int32)
+        self.dist = dist.astype(np.float32)
+        self.pred = pred.astype(np.int32)
+        self.stats = {"bounded": 0, "approximate": 0, "exact_fallback": 0}
+
+    def bounds(self, sources, targets):
+        """(lower, upper, landmark row, best source, best target) for two node sets."""
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        ds, dt = self.dist[:, sources], self.dist[:, targets]
+
+        # Upper bound: min over landmarks of (closest source + closest target)
+        via = ds.min(axis=1) + dt.min(axis=1)
+        row = int(np.argmin(via))
+        upper = float(via[row])
+        s = int(sources[np.argmin(ds[row])])
+        t = int(targets[np.argmin(dt[row])])
+
+        if len(sources) * len(targets) > self.pairwise_limit:
+            return 0.0, upper, row, s, t
+        # Lower bound: every pair is at least max_l |d(l,s) - d(l,t)| apart, the set at least the pair minimum
+        diff = np.abs(ds[:, :, None] - dt[:, None, :])
+        diff[~np.isfinite(diff)] = 0
+        lower = float(diff.max(axis=0).min())
+        return lower, upper, row, s, t
+
+    def _path_via(self, row: int, s: int, t: int):
+        """(distance, path) of s -> landmark -> t from the stored landmark predecessor rows.
+
+        The two tree paths may meet before reaching the landmark; the shared part is
+        dropped, so the distance can be below the upper bound d(l, s) + d(l, t).
+        """
+        pred = self.pred[row]
+        up = path_to(s, pred, self.index.rev)
+        down = path_to(t, pred, self.index.rev)
+        k = 0
+        while k < min(len(up), len(down)) and up[k] == down[k]:
+            k += 1
+        meet = self.index.idx[up[k - 1]]
+        dist = self.dist[row]
+        distance = float(dist[s]) + float(dist[t]) - 2 * float(dist[meet])
+        return distance, list(reversed(up[k - 1:])) + down[k:]
+
+    def estimate(self, sources, targets):
+        """(lower, upper, distance, path, best source, best target) of two node sets from the landmarks alone.
+
+        distance and path are what shortest_path answers when the bounds are accepted;
+        distance lies between the exact distance and upper.
+        """
+        lower, upper, row, s, t = self.bounds(sources, targets)
+        if not np.isfinite(upper):
+            return lower, upper, math.inf, [], s, t
+        distance, path = self._path_via(row, s, t)
+        return lower, upper, distance, path, s, t
+
+    def shortest_path(self, src: str, dst: str):
+        """Same contract as GraphIndex.shortest_path, exact unless tolerance > 0."""
+        src_indices = self.index.match(src)
+        dst_indices = self.index.match(dst)
+        if not src_indices or not dst_indices:
+            return math.inf, [], src, dst
+        if not self.landmarks:
+            self.stats["exact_fallback"] += 1
+            return self.index.shortest_path(src, dst)
+
+        lower, upper, distance, path, s, t = self.estimate(src_indices, dst_indices)
+        if np.isfinite(upper) and upper - lower <= self.tolerance:
+            self.stats["bounded" if upper == lower else "approximate"] += 1
+            return distance, path, self.index.rev[s], self.index.rev[t]
+
+        self.stats["exact_fallback"] += 1
+        return self.index.shortest_path(src, dst)
+
+
+_loaded_graphs = OrderedDict()
+
+
+def _index_path(graph_uri: str) -> str:
+    digest = hashlib.sha1(graph_uri.encode("utf-8")).hexdigest()
+    return os.path.join(GRAPH_INDEX_DIR, f"{digest}.npz")
+
+
+def get_graph_index(graph_uri: str) -> GraphIndex:
+    """Return the GraphIndex of a graph, loading it at most once per process.
+
+    Loaded graphs are kept in an LRU of GRAPH_CACHE_SIZE entries. When
+    GRAPH_INDEX_DIR is set, indexes are also persisted there as .npz files and
+    reused across runs instead of querying SPARQL again.
+    """
+    if graph_uri in _loaded_graphs:
+        _loaded_graphs.move_to_end(graph_uri)
+        return _loaded_graphs[graph_uri]
 
-    # Build CSR sparse matrix (undirected: insert both directions)
-    rows = []
-    cols = []
-    data = []
+    index = None
+    if GRAPH_INDEX_DIR and os.path.isfile(_index_path(graph_uri)):
+        index = GraphIndex.load(_index_path(graph_uri))
+    if index is None:
+        index = GraphIndex.from_sparql(graph_uri)
+        if GRAPH_INDEX_DIR:
+            os.makedirs(GRAPH_INDEX_DIR, exist_ok=True)
+            index.save(_index_path(graph_uri))
 
-    seen = set()
-    for u, v, w in edges:
-        for a, b in ((u, v), (v, u)):
-            key = (idx[a], idx[b])
-            if key in seen:
-                continue
-            seen.add(key)
-            rows.append(key[0])
-            cols.append(key[1])
-            data.append(w)
+    _loaded_graphs[graph_uri] = index
+    if len(_loaded_graphs) > GRAPH_CACHE_SIZE:
+        _loaded_graphs.popitem(last=False)
+    return index
 
-    n = len(idx)
-    graph = csr_matrix((data, (rows, cols)), shape=(n, n))
 
-    return graph, idx, idx_rev
+def build_graph(graph_uri: str):
+    index = get_graph_index(graph_uri)
+    return index.graph, index.idx, index.rev
 
 
 def run_all_pairs(graph_uri: str):
+    """All-pairs Floyd-Warshall (O(n^3) time, dense n x n matrices).
+
+    Superseded by shortest_path's single/multi-source search; kept as reference
+    implementation for benchmark_shortest_path.py.
+    """
     graph, idx, rev = build_graph(graph_uri)
 
     dist, pred = floyd_warshall(
@@ -86,7 +353,7 @@ def run_all_pairs(graph_uri: str):
 
 
 def get_path(start_uri, end_uri, pred, idx, rev):
-    """Reconstruct the shortest path between two nodes."""
+    """Reconstruct the shortest path between two nodes from an all-pairs predecessor matrix."""
     s = idx[start_uri]
     t = idx[end_uri]
 
@@ -102,7 +369,7 @@ def get_path(start_uri, end_uri, pred, idx, rev):
     return list(reversed(path))
 
 
-def shortest_path(graph_uri: str, src: str, dst: str):
+def shortest_path(graph_uri: str, src: str, dst: str, approximate: bool = False):
     """Compute shortest path between src and dst on the given graph.
 
     Parameters
@@ -113,6 +380,9 @@ def shortest_path(graph_uri: str, src: str, dst: str):
         Regex or substring pattern identifying the source node label.
     dst: str
         Regex or substring pattern identifying the destination node label.
+    approximate: bool
+        Answer from the landmark oracle (see LandmarkOracle) when its bounds agree
+        within LANDMARK_TOLERANCE hops, falling back to exact BFS otherwise.
 
     Returns
     -------
@@ -126,45 +396,15 @@ def shortest_path(graph_uri: str, src: str, dst: str):
         The concrete destination node that matched the dst pattern.
     """
 
-    dist, pred, idx, rev = run_all_pairs(graph_uri)
-
-    # Build regex that also matches optional inner classes like Foo$Bar.baz
-    def _compile_with_innerclass_support(fragment: str):
-        if "." not in fragment:
-            return re.compile(fragment)
-        class_part, method_part = fragment.rsplit(".", 1)
-        class_regex = re.escape(class_part)
-        method_regex = re.escape(method_part)
-        pattern = f"{class_regex}(?:\\$[^.]*)?\\.{method_regex}"
-        return re.compile(pattern)
-
-    src_pattern = _compile_with_innerclass_support(src)
-    dst_pattern = _compile_with_innerclass_support(dst)
-
-    src_nodes = [n for n in idx if src_pattern.search(n)]
-    dst_nodes = [n for n in idx if dst_pattern.search(n)]
-
-    if not src_nodes or not dst_nodes:
-        return math.inf, [], src, dst
-
-    # Return the shortest distance across all matching node combinations
-    best_result = None
-    best_distance = math.inf
-
-    for src_node in src_nodes:
-        for dst_node in dst_nodes:
-            distance = dist[idx[src_node], idx[dst_node]]
-            if distance < best_distance:
-                best_distance = distance
-                path = get_path(src_node, dst_node, pred, idx, rev)
-                best_result = (float(distance), path, src_node, dst_node)
-
-    return best_result if best_result else (math.inf, [], src, dst)
+    index = get_graph_index(graph_uri)
+    if approximate:
+        return index.oracle(num_landmarks=NUM_LANDMARKS, tolerance=LANDMARK_TOLERANCE).shortest_path(src, dst)
+    return index.shortest_path(src, dst)
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Run Floyd-Warshall shortest-path on a KG-backed call graph."
+        description="Run BFS shortest-path on a KG-backed call graph."
     )
     parser.add_argument(
         "--graph",
@@ -185,10 +425,16 @@ def main():
         help="Destination method identifier (supports regex and inner-class patterns).",
     )
 
+    parser.add_argument(
+        "--approximate",
+        action="store_true",
+        help="Use the landmark distance oracle, falling back to exact BFS when its bounds disagree.",
+    )
+
     args = parser.parse_args()
 
     distance, path, src_node, dst_node = shortest_path(
-        args.graph_uri, args.src, args.dst
+        args.graph_uri, args.src, args.dst, approximate=args.approximate
     )
 
     print("Source node:", src_node)
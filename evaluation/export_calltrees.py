@@ -0,0 +1,175 @@
+"""
+Export all call trees of the experiments sheet into one partitioned Parquet dataset.
+
+One row per invocation with its parent, depth, class, method, fan-out and result
+type / value length, partitioned by project and graph:
+
+    data/calltrees/project=<projekt, lower-cased>/graph=<graph key>/part-0.parquet
+
+Cross-experiment questions then become vectorized pandas/pyarrow queries over the
+whole corpus instead of one SPARQL round-trip per graph, e.g.
+
+    nodes = read_calltrees(filters=[("project", "=", "math")])
+    nodes.groupby("graph_uri")["depth"].max()
+"""
+
+import argparse
+import os
+import re
+import time
+from collections import defaultdict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from SPARQLWrapper import SPARQLWrapper, JSON
+
+SPARQL_ENDPOINT = os.getenv("SPARQL_ENDPOINT", "http://localhost:8890/sparql")
+EXPERIMENTS_FILE = os.getenv("EXPERIMENTS_FILE", "data/experiments.xlsx")
+CALLTREE_DATASET = os.getenv("CALLTREE_DATASET", "data/calltrees")
+
+NODES_QUERY = """
+PREFIX ex: <http://example.org/>
+PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+
+SELECT ?id ?parent ?name ?resType ?resValue
+FROM <{graph}>
+WHERE {{
+  ?id ex:callee ?parent ;
+      ex:method ?name .
+  OPTIONAL {{
+    ?id ex:result ?resNode .
+    ?resNode rdf:type ?resType ;
+             rdf:value ?resValue .
+  }}
+}}
+"""
+
+SCHEMA = pa.schema([
+    ("graph_uri", pa.string()),
+    ("node", pa.string()),
+    ("parent", pa.string()),
+    ("depth", pa.int32()),
+    ("fanout", pa.int32()),
+    ("class", pa.string()),
+    ("method", pa.string()),
+    ("result_type", pa.string()),
+    ("result_value_length", pa.int64()),
+    ("is_exception", pa.bool_()),
+])
+
+
+def graph_key(graph_uri: str) -> str:
+    """Directory-safe partition value for a graph URI."""
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", graph_uri).strip("_")
+
+
+def split_name(name: str):
+    """'pkg.Class$Inner.method(args)' -> ('pkg.Class$Inner', 'method')."""
+    name = re.sub(r"\(.*\)$", "", name)
+    if "." not in name:
+        return "", name
+    return tuple(name.rsplit(".", 1))
+
+
+def calltree_nodes(graph_uri: str, bindings) -> pd.DataFrame:
+    """One row per invocation from the NODES_QUERY bindings of one graph."""
+    nodes = {}
+    for row in bindings:
+        node = row["id"]["value"]
+        if node not in nodes:
+            nodes[node] = {"parent": row["parent"]["value"], "name": row["name"]["value"],
+                           "result_type": None, "result_value": None}
+        if nodes[node]["result_type"] is None and "resType" in row:
+            nodes[node]["result_type"] = row["resType"]["value"]
+            nodes[node]["result_value"] = row["resValue"]["value"]
+
+    # Depths by BFS from the root(s); ex:callee of the root points to itself
+    children = defaultdict(list)
+    roots = []
+    for node, info in nodes.items():
+        if info["parent"] == node or info["parent"] not in nodes:
+            roots.append(node)
+        else:
+            children[info["parent"]].append(node)
+    depth = {}
+    frontier, level = roots, 0
+    while frontier:
+        for node in frontier:
+            depth[node] = level
+        frontier = [child for node in frontier for child in children[node]]
+        level += 1
+
+    records = []
+    for node, info in nodes.items():
+        cls, method = split_name(info["name"])
+        result_type = info["result_type"]
+        records.append({
+            "graph_uri": graph_uri,
+            "node": node,
+            "parent": info["parent"],
+            "depth": depth.get(node, -1),
+            "fanout": len(children[node]),
+            "class": cls,
+            "method": method,
+            "result_type": result_type,
+            "result_value_length": len(info["result_value"]) if info["result_value"] is not None else None,
+            "is_exception": bool(result_type and result_type.startswith("exception:")),
+        })
+    return pd.DataFrame.from_records(records, columns=SCHEMA.names)
+
+
+def export_graph(graph_uri: str, project: str, root: str = CALLTREE_DATASET) -> int:
+    """Write (or replace) the partition of one graph; returns the number of nodes."""
+    sparql = SPARQLWrapper(SPARQL_ENDPOINT)
+    sparql.setQuery(NODES_QUERY.format(graph=graph_uri))
+    sparql.setReturnFormat(JSON)
+    bindings = sparql.query().convert()["results"]["bindings"]
+
+    nodes = calltree_nodes(graph_uri, bindings)
+    table = pa.Table.from_pandas(nodes, schema=SCHEMA, preserve_index=False)
+    table = table.append_column("project", pa.array([project] * len(nodes), pa.string()))
+    table = table.append_column("graph", pa.array([graph_key(graph_uri)] * len(nodes), pa.string()))
+    pq.write_to_dataset(
+        table,
+        root,
+        partition_cols=["project", "graph"],
+        existing_data_behavior="delete_matching",
+        basename_template="part-{i}.parquet",
+    )
+    return len(nodes)
+
+
+def read_calltrees(root: str = CALLTREE_DATASET, columns=None, filters=None) -> pd.DataFrame:
+    """Load the dataset (or a filtered part of it) as one DataFrame."""
+    return pd.read_parquet(root, columns=columns, filters=filters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export all call trees into a partitioned Parquet dataset.")
+    parser.add_argument("--output", default=CALLTREE_DATASET,
+                        help=f"Dataset root directory (default: {CALLTREE_DATASET}).")
+    parser.add_argument("--graph", action="append",
+                        help="Only export this graph URI (repeatable; default: all graphs of the sheet).")
+    args = parser.parse_args()
+
+    df = pd.read_excel(EXPERIMENTS_FILE, header=1)
+    # Partition by the project (e.g. MATH -> project=math), not by the per-bug branch
+    # The Graph column also holds the cells of the summary tables below the experiments
+    graphs = df[df["Graph"].astype(str).str.startswith("urn:")].drop_duplicates("Graph")[["Graph", "Projekt"]]
+    if args.graph:
+        graphs = graphs[graphs["Graph"].isin(args.graph)]
+
+    for graph_uri, project in graphs.itertuples(index=False):
+        start = time.perf_counter()
+        try:
+            count = export_graph(graph_uri, str(project).lower(), args.output)
+        except Exception as e:
+            print(f"Graph {graph_uri}: failed - {e}")
+            continue
+        print(f"Graph {graph_uri}: {count} nodes ({time.perf_counter() - start:.1f}s)")
+    print(f"Dataset written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
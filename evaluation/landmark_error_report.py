@@ -0,0 +1,93 @@
+"""
+Report the error of the landmark distance oracle versus exact BFS distances.
+
+For every graph of the experiments sheet, random node pairs plus the experiment's
+own (test entry, patched method) pair are answered from the landmarks alone, as
+shortest_path(..., approximate=True) does when it accepts the bounds, and the
+returned distance is compared with the exact one. Results are printed and written as CSV next
+to the experiments sheet.
+"""
+
+import argparse
+import os
+import random
+
+import numpy as np
+import pandas as pd
+
+from dijkstra_kg import LandmarkOracle, get_graph_index
+
+EXPERIMENTS_FILE = os.getenv("EXPERIMENTS_FILE", "data/experiments.xlsx")
+
+
+def graph_error(graph_uri: str, pair_patterns, num_landmarks: int, samples: int, seed: int = 0) -> dict:
+    index = get_graph_index(graph_uri)
+    n = len(index.labels)
+    oracle = LandmarkOracle(index, num_landmarks=num_landmarks, tolerance=float("inf"))
+
+    rng = random.Random(seed)
+    pairs = [([rng.randrange(n)], [rng.randrange(n)]) for _ in range(samples if n else 0)]
+    for src, dst in pair_patterns:
+        src_nodes, dst_nodes = index.match(src), index.match(dst)
+        if src_nodes and dst_nodes:
+            pairs.append((src_nodes, dst_nodes))
+
+    errors, tight = [], 0
+    for src_nodes, dst_nodes in pairs:
+        lower, upper, estimate, _, _, _ = oracle.estimate(src_nodes, dst_nodes)
+        dist, _, _ = index.search(src_nodes)
+        exact = float(dist[dst_nodes].min())
+        if not np.isfinite(exact):
+            continue
+        errors.append(estimate - exact)
+        tight += int(upper == lower)
+
+    errors = np.array(errors) if errors else np.zeros(0)
+    return {
+        "Graph": graph_uri,
+        "Nodes": n,
+        "Landmarks": len(oracle.landmarks),
+        "Pairs": len(errors),
+        "Exact (%)": 100.0 * float(np.mean(errors == 0)) if len(errors) else None,
+        "Bounds agree (%)": 100.0 * tight / len(errors) if len(errors) else None,
+        "Mean abs error": float(np.mean(errors)) if len(errors) else None,
+        "Max abs error": float(np.max(errors)) if len(errors) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Landmark oracle error versus exact distances on all experiment graphs.")
+    parser.add_argument("--landmarks", type=int, default=16, help="Number of highest-degree landmarks (default: 16).")
+    parser.add_argument("--samples", type=int, default=200, help="Random node pairs per graph (default: 200).")
+    parser.add_argument("--output", help="CSV output path (default: next to the experiments sheet).")
+    args = parser.parse_args()
+
+    df = pd.read_excel(EXPERIMENTS_FILE, header=1)
+    # The Graph column also holds the cells of the summary tables below the experiments
+    df = df[df["Graph"].astype(str).str.startswith("urn:")]
+    rows = []
+    for graph, group in df.groupby("Graph", sort=False):
+        pair_patterns = []
+        for _, row in group.iterrows():
+            for cls in str(row["Patched class"]).split(","):
+                for method in str(row["Patched method"]).split(","):
+                    pair_patterns.append((f"{row['Tested Class']}.{row['Tested Method']}", f"{cls}.{method}"))
+        try:
+            result = graph_error(graph, pair_patterns, args.landmarks, args.samples)
+        except Exception as e:
+            print(f"Graph {graph}: failed - {e}")
+            continue
+        rows.append(result)
+        print(f"{graph}: n={result['Nodes']} exact={result['Exact (%)']}% mean_err={result['Mean abs error']} "
+              f"max_err={result['Max abs error']}")
+
+    out = args.output or os.path.join(os.path.dirname(EXPERIMENTS_FILE), f"landmark_error_{args.landmarks}.csv")
+    report = pd.DataFrame(rows)
+    report.to_csv(out, index=False)
+    if not report.empty:
+        print(f"Overall: exact={report['Exact (%)'].mean():.1f}% mean_err={report['Mean abs error'].mean():.3f}")
+    print(f"Report written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 from SPARQLWrapper import SPARQLWrapper, JSON
@@ -7,58 +8,82 @@ from SPARQLWrapper import SPARQLWrapper, JSON
 SPARQL_ENDPOINT = os.getenv("SPARQL_ENDPOINT", "http://localhost:8890/sparql")
 EXPERIMENTS_FILE = os.getenv("EXPERIMENTS_FILE", "data/experiments.xlsx")
 OUTPUT_FILE = os.getenv("OUTPUT_FILE", "data/experiments_updated.xlsx")
+# Graphs whose vocabulary is fetched concurrently
+CHECK_WORKERS = int(os.getenv("CHECK_WORKERS", "4"))
+
+VOCABULARY_QUERY = """
+PREFIX ex: <http://example.org/>
+
+SELECT DISTINCT ?name
+FROM <{graph}>
+WHERE {{
+  ?s ex:method ?name .
+}}
+"""
+
+RESULT_COLUMNS = ["Class Exist", "Method Exist", "Complete Exist"]
+
+
+def fetch_vocabulary(graph: str) -> str:
+    """All distinct method names of a graph, newline-joined for substring checks."""
+    sparql = SPARQLWrapper(SPARQL_ENDPOINT)
+    sparql.setQuery(VOCABULARY_QUERY.format(graph=graph))
+    sparql.setReturnFormat(JSON)
+    rows = sparql.query().convert()["results"]["bindings"]
+    return "\n".join(sorted({row["name"]["value"] for row in rows}))
+
+
+def check_graph(graph: str, predictions):
+    """Class, method and class.method existence for all predictions of one graph.
+
+    predictions is a list of (row index, class, method); returns {row index: (class, method, complete)}.
+    """
+    vocabulary = fetch_vocabulary(graph)
+    return {
+        i: (pred_class in vocabulary, pred_method in vocabulary, f"{pred_class}.{pred_method}" in vocabulary)
+        for i, pred_class, pred_method in predictions
+    }
 
 
 def run_consistency_check():
     """Check whether LLM-predicted class/method names exist in the call trees.
 
-    Reads experiment data from Excel, queries the Virtuoso SPARQL endpoint for
-    each prediction, and writes the hallucination-check results back to Excel.
+    Reads experiment data from Excel, fetches the method vocabulary of every graph
+    once (graphs in parallel), checks all predictions against it and writes the
+    hallucination-check results back to Excel.
     Results are used in Section 5.2 of the paper.
     """
     df = pd.read_excel(EXPERIMENTS_FILE, header=1)
 
-    with open("prompts/ask_if_llm_in_calltree.txt", "r") as f:
-        template = f.read()
-
-    sparql = SPARQLWrapper(SPARQL_ENDPOINT)
-    sparql.setReturnFormat(JSON)
-
-    for _, row in df.iterrows():
-        print("----------------------------------------")
+    predictions = {}
+    for i, row in df.iterrows():
         nr = row["Nr"]
-        graph = row["Graph"]
-        raw_llm_response = row["LLM response"]
-
         try:
-            llm_response = json.loads(raw_llm_response)
+            llm_response = json.loads(row["LLM response"])
             if not llm_response.get("class") or not llm_response.get("method"):
                 print(f"Skipping Nr {nr}: missing class or method in LLM response")
                 continue
         except Exception as e:
             print(f"Skipping Nr {nr}: error parsing LLM response - {e}")
             continue
-
-        pred_class = llm_response["class"]
-        pred_method = llm_response["method"]
-
-        # Check if the predicted class appears anywhere in the call tree
-        sparql.setQuery(template.replace("{{TARGET}}", pred_class).replace("{{GRAPH}}", graph))
-        class_is_in_calltree = sparql.query().convert()["boolean"]
-
-        # Check if the predicted method name appears anywhere in the call tree
-        sparql.setQuery(template.replace("{{TARGET}}", pred_method).replace("{{GRAPH}}", graph))
-        method_is_in_calltree = sparql.query().convert()["boolean"]
-
-        # Check if the fully-qualified "class.method" combination appears in the call tree
-        sparql.setQuery(template.replace("{{TARGET}}", f"{pred_class}.{pred_method}").replace("{{GRAPH}}", graph))
-        complete_is_in_calltree = sparql.query().convert()["boolean"]
-
-        print(f"Nr {nr}: class_exists={class_is_in_calltree}, method_exists={method_is_in_calltree}, complete_exists={complete_is_in_calltree}")
-
-        df.loc[df["Nr"] == nr, "Class Exist"] = class_is_in_calltree
-        df.loc[df["Nr"] == nr, "Method Exist"] = method_is_in_calltree
-        df.loc[df["Nr"] == nr, "Complete Exist"] = complete_is_in_calltree
+        predictions.setdefault(row["Graph"], []).append((i, llm_response["class"], llm_response["method"]))
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=CHECK_WORKERS) as pool:
+        futures = {graph: pool.submit(check_graph, graph, preds) for graph, preds in predictions.items()}
+        for graph, future in futures.items():
+            results.update(future.result())
+
+    checked = pd.DataFrame.from_dict(results, orient="index", columns=RESULT_COLUMNS).sort_index()
+    for i, (class_exists, method_exists, complete_exists) in checked.iterrows():
+        print(f"Nr {df.at[i, 'Nr']}: class_exists={class_exists}, method_exists={method_exists}, "
+              f"complete_exists={complete_exists}")
+
+    for column in RESULT_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    df[RESULT_COLUMNS] = df[RESULT_COLUMNS].astype(object)
+    df.loc[checked.index, RESULT_COLUMNS] = checked.values
 
     df.to_excel(OUTPUT_FILE, index=False)
     print(f"Results written to {OUTPUT_FILE}")
@@ -0,0 +1,122 @@
+"""
+Name index over the method nodes of one call graph.
+
+Node labels are fully-qualified method names such as
+'org.apache.camel.impl.DefaultExchange$Foo.getIn'. The index offers
+
+* structured lookups: class -> methods -> node ids (inner classes `Outer$Inner`
+  are also filed under `Outer`), and simple class name -> fully-qualified names;
+* pattern resolution with exactly the semantics of the regexes used by
+  shortest_path (see _compile_with_innerclass_support): every pattern is a single
+  C-level regex scan over all labels joined by newlines instead of one Python-level
+  search per label.
+"""
+
+import bisect
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+_REGEX_META = re.compile(r"[\\^$.|?*+()\[\]{}]")
+
+
+# Build regex that also matches optional inner classes like Foo$Bar.baz
+def _compile_with_innerclass_support(fragment: str):
+    if "." not in fragment:
+        return re.compile(fragment)
+    class_part, method_part = fragment.rsplit(".", 1)
+    class_regex = re.escape(class_part)
+    method_regex = re.escape(method_part)
+    pattern = f"{class_regex}(?:\\$[^.]*)?\\.{method_regex}"
+    return re.compile(pattern)
+
+
+def _joined_regex(fragment: str):
+    """Regex for scanning the newline-joined labels, or None if the fragment needs per-label search.
+
+    Same as _compile_with_innerclass_support, except that the inner-class part cannot
+    run across a line break. A fragment without a dot is a raw regex; only plain
+    literals are safe to scan across labels.
+    """
+    if "\n" in fragment:
+        return None
+    if "." in fragment:
+        class_part, method_part = fragment.rsplit(".", 1)
+        return re.compile(f"{re.escape(class_part)}(?:\\$[^.\\n]*)?\\.{re.escape(method_part)}")
+    if fragment and not _REGEX_META.search(fragment):
+        return re.compile(re.escape(fragment))
+    return None
+
+
+def split_label(label: str):
+    """'pkg.Outer$Inner.m' -> ('pkg.Outer$Inner', 'pkg.Outer', 'm')."""
+    if "." not in label:
+        return "", "", label
+    class_name, method = label.rsplit(".", 1)
+    return class_name, class_name.split("$", 1)[0], method
+
+
+class NameIndex:
+    """Index of the node labels of one graph; node ids are positions in `labels`."""
+
+    def __init__(self, labels: Iterable[str]):
+        self.labels = list(labels)
+        self._text: Optional[str] = None  # labels joined by newlines, built on first resolve()
+        self.by_class: Dict[str, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+        self.by_simple_name: Dict[str, set] = defaultdict(set)
+        for node, label in enumerate(self.labels):
+            class_name, outer, method = split_label(label)
+            self.by_class[class_name][method].append(node)
+            if outer != class_name:
+                self.by_class[outer][method].append(node)
+            for name in {class_name, outer}:
+                simple = name.rsplit(".", 1)[-1]
+                self.by_simple_name[simple].add(name)
+
+    def qualified_names(self, class_name: str) -> List[str]:
+        """Resolve a simple or fully-qualified class name to the FQNs present in the graph."""
+        if class_name in self.by_class:
+            return [class_name]
+        return sorted(self.by_simple_name.get(class_name, ()))
+
+    def nodes(self, class_name: str, method: str) -> List[int]:
+        """Node ids of class_name.method (including inner classes), resolving simple names."""
+        nodes = set()
+        for fqn in self.qualified_names(class_name):
+            nodes.update(self.by_class[fqn].get(method, ()))
+        return sorted(nodes)
+
+    def resolve(self, patterns: Iterable[str]) -> Dict[str, List[int]]:
+        """Match all patterns against all labels.
+
+        Returns {pattern: [node ids]} with the same matches as
+        _compile_with_innerclass_support(pattern).search(label). Each pattern is one
+        regex scan over the newline-joined labels; after a match, the scan resumes at
+        the next label.
+        """
+        if self._text is None:
+            self._text = "\n".join(self.labels)
+            self._starts = [0]
+            for label in self.labels[:-1]:
+                self._starts.append(self._starts[-1] + len(label) + 1)
+            self._joinable = not any("\n" in label for label in self.labels)
+
+        result: Dict[str, List[int]] = {}
+        for pattern in dict.fromkeys(patterns):
+            regex = _joined_regex(pattern) if self._joinable else None
+            if regex is None:
+                compiled = _compile_with_innerclass_support(pattern)
+                result[pattern] = [node for node, label in enumerate(self.labels) if compiled.search(label)]
+                continue
+            nodes, pos = [], 0
+            while True:
+                match = regex.search(self._text, pos)
+                if match is None:
+                    break
+                node = bisect.bisect_right(self._starts, match.start()) - 1
+                nodes.append(node)
+                if node + 1 >= len(self._starts):
+                    break
+                pos = self._starts[node + 1]
+            result[pattern] = nodes
+        return result
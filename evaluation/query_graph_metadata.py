@@ -2,11 +2,62 @@
 """
 Script to query metadata from a SPARQL graph.
 Retrieves total method calls, distinct method calls, and distinct class calls.
+
+With --catalog, statistics for all call-tree graphs in the store are computed in
+one streaming pass over each graph's triples and cached in a local SQLite table
+keyed by graph URI (GRAPH_CATALOG_PATH), so later runs answer instantly.
 """
 
 import argparse
+import csv
+import os
+import re
+import sqlite3
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
 import requests
-from typing import Tuple, Optional
+
+EX = "http://example.org/"
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+CATALOG_PATH = os.getenv("GRAPH_CATALOG_PATH", ".cache/graph_catalog.sqlite")
+
+# Rough prompt size: literal text plus XML markup per call, ~4 characters per token
+XML_CHARS_PER_CALL = 80
+CHARS_PER_TOKEN = 4
+
+GRAPHS_QUERY = """
+SELECT DISTINCT ?g
+WHERE {
+  GRAPH ?g { ?s <http://example.org/callee> ?c . }
+}
+"""
+
+TRIPLES_QUERY = """
+SELECT ?s ?p ?o
+WHERE {{
+  GRAPH <{graph}> {{ ?s ?p ?o . }}
+}}
+"""
+
+CATALOG_COLUMNS = [
+    ("graph", "TEXT PRIMARY KEY"),
+    ("total_calls", "INTEGER"),
+    ("distinct_calls", "INTEGER"),
+    ("distinct_classes", "INTEGER"),
+    ("max_depth", "INTEGER"),
+    ("mean_depth", "REAL"),
+    ("max_fanout", "INTEGER"),
+    ("mean_fanout", "REAL"),
+    ("p90_fanout", "REAL"),
+    ("leaves", "INTEGER"),
+    ("exceptions", "INTEGER"),
+    ("literal_bytes", "INTEGER"),
+    ("estimated_tokens", "INTEGER"),
+    ("computed", "REAL"),
+]
 
 
 def query_graph_metadata(graph_name: str, endpoint: str = "http://localhost:8890/sparql") -> Optional[Tuple[int, int, int]]:
@@ -88,13 +139,200 @@ WHERE {{
         return None
 
 
+def list_graphs(endpoint: str) -> List[str]:
+    """Return the URIs of all named graphs containing call-tree triples."""
+    response = requests.post(
+        endpoint,
+        data={'query': GRAPHS_QUERY},
+        headers={'Accept': 'application/sparql-results+json'}
+    )
+    response.raise_for_status()
+    return sorted(row['g']['value'] for row in response.json()['results']['bindings'])
+
+
+def _parse_term(term: str) -> Tuple[str, bool]:
+    """Parse one SPARQL TSV term into (value, is_literal)."""
+    if term.startswith('<') and term.endswith('>'):
+        return term[1:-1], False
+    if term.startswith('"'):
+        end = term.rfind('"')
+        value = term[1:end] if end > 0 else term[1:]
+        value = re.sub(r'\\(.)', lambda m: {'t': '\t', 'n': '\n', 'r': '\r'}.get(m.group(1), m.group(1)), value)
+        return value, True
+    if term.startswith('_:'):
+        return term, False
+    return term, True
+
+
+def stream_triples(graph_name: str, endpoint: str) -> Iterator[Tuple[str, str, str, bool]]:
+    """Yield (subject, predicate, object, object_is_literal) for every triple of a graph.
+
+    Results are requested as tab-separated values and parsed line by line, so the
+    graph is never held in memory as one JSON document.
+    """
+    with requests.post(
+        endpoint,
+        data={'query': TRIPLES_QUERY.format(graph=graph_name)},
+        headers={'Accept': 'text/tab-separated-values'},
+        stream=True
+    ) as response:
+        response.raise_for_status()
+        lines = response.iter_lines(decode_unicode=True)
+        next(lines, None)  # header: ?s ?p ?o
+        for line in lines:
+            if not line:
+                continue
+            parts = line.split('\t')
+            if len(parts) != 3:
+                continue
+            s, _ = _parse_term(parts[0])
+            p, _ = _parse_term(parts[1])
+            o, is_literal = _parse_term(parts[2])
+            yield s, p, o, is_literal
+
+
+def _class_name(method: str) -> str:
+    """Same normalization as the distinct-class subquery: drop '(...)' and the method name."""
+    return re.sub(r'\.[^.]+$', '', re.sub(r'\(.*\)$', '', method))
+
+
+def compute_graph_stats(graph_name: str, triples) -> Dict[str, object]:
+    """Compute all catalog statistics of one graph from a single pass over its triples."""
+    names: Dict[str, str] = {}
+    parents: Dict[str, str] = {}
+    results: Dict[str, str] = {}
+    types: Dict[str, str] = {}
+    total_calls = 0
+    literal_bytes = 0
+
+    for s, p, o, is_literal in triples:
+        if is_literal:
+            literal_bytes += len(o.encode('utf-8'))
+        if p == EX + 'method':
+            total_calls += 1
+            names[s] = o
+        elif p == EX + 'callee':
+            parents[s] = o
+        elif p == EX + 'result':
+            results[s] = o
+        elif p == RDF_TYPE:
+            types[s] = o
+
+    # Depths by BFS from the roots (ex:callee points to itself or outside the graph)
+    children = defaultdict(list)
+    roots = []
+    for node, parent in parents.items():
+        if parent == node or parent not in parents:
+            roots.append(node)
+        else:
+            children[parent].append(node)
+    depths = []
+    frontier, depth = roots, 0
+    while frontier:
+        depths.extend([depth] * len(frontier))
+        frontier = [child for node in frontier for child in children[node]]
+        depth += 1
+
+    fanouts = [len(children[node]) for node in parents if children[node]]
+    exceptions = sum(1 for res in results.values() if types.get(res, '').startswith('exception:'))
+
+    return {
+        'graph': graph_name,
+        'total_calls': total_calls,
+        'distinct_calls': len(set(names.values())),
+        'distinct_classes': len({_class_name(name) for name in names.values()}),
+        'max_depth': max(depths) if depths else 0,
+        'mean_depth': statistics.fmean(depths) if depths else 0.0,
+        'max_fanout': max(fanouts) if fanouts else 0,
+        'mean_fanout': statistics.fmean(fanouts) if fanouts else 0.0,
+        'p90_fanout': statistics.quantiles(fanouts, n=10, method='inclusive')[-1] if len(fanouts) > 1 else float(sum(fanouts)),
+        'leaves': len(parents) - len(fanouts),
+        'exceptions': exceptions,
+        'literal_bytes': literal_bytes,
+        'estimated_tokens': (literal_bytes + XML_CHARS_PER_CALL * total_calls) // CHARS_PER_TOKEN,
+        'computed': time.time(),
+    }
+
+
+class GraphCatalog:
+    """SQLite table of per-graph statistics keyed by graph URI."""
+
+    def __init__(self, path: str = CATALOG_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        columns = ', '.join(f'{name} {sql_type}' for name, sql_type in CATALOG_COLUMNS)
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS graph_stats ({columns})')
+        self.conn.commit()
+
+    def get(self, graph_name: str) -> Optional[Dict[str, object]]:
+        row = self.conn.execute('SELECT * FROM graph_stats WHERE graph = ?', (graph_name,)).fetchone()
+        return dict(zip([name for name, _ in CATALOG_COLUMNS], row)) if row else None
+
+    def put(self, stats: Dict[str, object]) -> None:
+        names = [name for name, _ in CATALOG_COLUMNS]
+        self.conn.execute(
+            f'INSERT OR REPLACE INTO graph_stats ({", ".join(names)}) VALUES ({", ".join("?" * len(names))})',
+            [stats[name] for name in names]
+        )
+        self.conn.commit()
+
+    def all(self) -> List[Dict[str, object]]:
+        names = [name for name, _ in CATALOG_COLUMNS]
+        return [dict(zip(names, row)) for row in self.conn.execute('SELECT * FROM graph_stats ORDER BY graph')]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def build_catalog(endpoint: str, graphs: Optional[List[str]] = None, refresh: bool = False,
+                  path: str = CATALOG_PATH) -> List[Dict[str, object]]:
+    """
+    Return statistics for the given graphs (default: all call-tree graphs in the store).
+
+    Args:
+        endpoint: The SPARQL endpoint URL
+        graphs: Graph URIs to include; enumerated from the store when omitted
+        refresh: Recompute statistics even if the graph is already cataloged
+        path: Location of the SQLite catalog
+
+    Returns:
+        List of statistics dicts, one per graph
+    """
+    catalog = GraphCatalog(path)
+    try:
+        rows = []
+        for graph_name in graphs or list_graphs(endpoint):
+            stats = None if refresh else catalog.get(graph_name)
+            if stats is None:
+                start = time.perf_counter()
+                stats = compute_graph_stats(graph_name, stream_triples(graph_name, endpoint))
+                catalog.put(stats)
+                print(f"Cataloged {graph_name} in {time.perf_counter() - start:.1f}s")
+            rows.append(stats)
+        return rows
+    finally:
+        catalog.close()
+
+
+def print_catalog(rows: List[Dict[str, object]]) -> None:
+    """Print the catalog as an aligned text table."""
+    columns = [name for name, _ in CATALOG_COLUMNS if name != 'computed']
+    formatted = [[f'{row[c]:.2f}' if isinstance(row[c], float) else str(row[c]) for c in columns] for row in rows]
+    widths = [max([len(c)] + [len(r[i]) for r in formatted]) for i, c in enumerate(columns)]
+    print('  '.join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in formatted:
+        print('  '.join(v.ljust(w) for v, w in zip(r, widths)))
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Query SPARQL graph for method and class metadata'
     )
     parser.add_argument(
         'graph',
-        help='The graph name to query'
+        nargs='?',
+        help='The graph name to query (optional with --catalog)'
     )
     parser.add_argument(
         '--endpoint',
@@ -102,8 +340,37 @@ def main():
         help='SPARQL endpoint URL (default: http://localhost:8890/sparql)'
     )
     
-    args = parser.parse_args()
+    parser.add_argument(
+        '--catalog',
+        action='store_true',
+        help='Print cached statistics for all call-tree graphs (or the given graph), computing missing ones'
+    )
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Recompute catalog statistics even if cached'
+    )
+    parser.add_argument(
+        '--csv',
+        help='Also write the catalog to this CSV file'
+    )
     
+    args = parser.parse_args()
+
+    if args.catalog:
+        rows = build_catalog(args.endpoint, [args.graph] if args.graph else None, args.refresh)
+        print_catalog(rows)
+        if args.csv:
+            with open(args.csv, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=[name for name, _ in CATALOG_COLUMNS])
+                writer.writeheader()
+                writer.writerows(rows)
+            print(f"Catalog written to {args.csv}")
+        return 0
+
+    if not args.graph:
+        parser.error('graph is required unless --catalog is given')
+
     result = query_graph_metadata(args.graph, args.endpoint)
     
     if result:
@@ -0,0 +1,239 @@
+"""
+Invocation-level distances on the recorded call tree.
+
+Every invocation has exactly one ex:callee parent, so the recorded structure is a
+tree. This module builds an Euler tour and a sparse-table LCA once per tree and
+answers the hop distance between any two invocations in O(1):
+
+    dist(a, b) = depth[a] + depth[b] - 2 * depth[lca(a, b)]
+
+Distances between two node *sets* (e.g. all invocations of class A vs. class B)
+are answered with vectorized pairwise LCA queries for small sets and a single
+multi-source BFS over the tree otherwise. This is the "invocation-tree" distance
+mode next to the method-graph mode of dijkstra_kg.py.
+"""
+
+import argparse
+import math
+import os
+from collections import OrderedDict
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from SPARQLWrapper import SPARQLWrapper, JSON
+
+from dijkstra_kg import multi_source_search
+from name_index import NameIndex
+
+SPARQL_ENDPOINT = os.getenv("SPARQL_ENDPOINT", "http://localhost:8890/sparql")
+TREE_CACHE_SIZE = int(os.getenv("TREE_CACHE_SIZE", "8"))
+
+# Above this many (a, b) pairs a set distance uses one multi-source BFS instead
+PAIRWISE_LIMIT = 1_000_000
+
+TREE_QUERY = """
+PREFIX ex: <http://example.org/>
+
+SELECT ?id ?parent ?name
+FROM <{graph}>
+WHERE {{
+  ?id ex:callee ?parent ;
+      ex:method ?name .
+}}
+"""
+
+
+class InvocationTree:
+    """Call tree of one graph with O(1) LCA / distance queries."""
+
+    def __init__(self, ids, parents, names):
+        self.ids = list(ids)
+        self.names = list(names)
+        self.pos = {node_id: i for i, node_id in enumerate(self.ids)}
+        n = len(self.ids)
+
+        # parent[i] == i marks the root (ex:callee points to itself)
+        self.parent = np.array([self.pos.get(p, i) for i, p in enumerate(parents)], dtype=np.int64)
+        roots = np.flatnonzero(self.parent == np.arange(n))
+        if len(roots) != 1:
+            raise ValueError(f"Expected exactly one root invocation, found {len(roots)}")
+        self.root = int(roots[0])
+
+        children = [[] for _ in range(n)]
+        for child, parent in enumerate(self.parent):
+            if child != parent:
+                children[parent].append(child)
+        self._build_euler_tour(children)
+        self._build_sparse_table()
+
+    @classmethod
+    def from_sparql(cls, graph_uri: str):
+        sparql = SPARQLWrapper(SPARQL_ENDPOINT)
+        sparql.setQuery(TREE_QUERY.format(graph=graph_uri))
+        sparql.setReturnFormat(JSON)
+        rows = sparql.query().convert()["results"]["bindings"]
+        # One row per invocation; keep the first binding if the store returns duplicates
+        seen = {}
+        for row in rows:
+            seen.setdefault(row["id"]["value"], (row["parent"]["value"], row["name"]["value"]))
+        ids = list(seen)
+        return cls(ids, [seen[i][0] for i in ids], [seen[i][1] for i in ids])
+
+    def _build_euler_tour(self, children):
+        n = len(self.ids)
+        self.depth = np.zeros(n, dtype=np.int64)
+        self.first = np.zeros(n, dtype=np.int64)
+        euler = []
+        # Iterative DFS; each node is appended on entry and again after each child
+        stack = [(self.root, 0)]
+        while stack:
+            node, child_pos = stack.pop()
+            if child_pos == 0:
+                self.first[node] = len(euler)
+            euler.append(node)
+            if child_pos < len(children[node]):
+                stack.append((node, child_pos + 1))
+                child = children[node][child_pos]
+                self.depth[child] = self.depth[node] + 1
+                stack.append((child, 0))
+        self.euler = np.array(euler, dtype=np.int64)
+        self.children = children
+
+    def _build_sparse_table(self):
+        """table[k][i] = Euler index of the shallowest node in euler[i : i + 2**k]."""
+        euler_depth = self.depth[self.euler]
+        m = len(self.euler)
+        table = [np.arange(m, dtype=np.int64)]
+        k = 1
+        while (1 << k) <= m:
+            prev = table[-1]
+            half = 1 << (k - 1)
+            left, right = prev[:m - (1 << k) + 1], prev[half:half + m - (1 << k) + 1]
+            table.append(np.where(euler_depth[left] <= euler_depth[right], left, right))
+            k += 1
+        self._table = table
+        self._euler_depth = euler_depth
+
+    def lca(self, a, b):
+        """Lowest common ancestor of node indices a and b (scalars or equally shaped arrays)."""
+        fa, fb = self.first[a], self.first[b]
+        lo, hi = np.minimum(fa, fb), np.maximum(fa, fb)
+        k = np.floor(np.log2(hi - lo + 1)).astype(np.int64)
+        if np.ndim(k) == 0:
+            left = self._table[k][lo]
+            right = self._table[k][hi - (1 << int(k)) + 1]
+        else:
+            # Vectorized per table level; there are at most log2(len(euler)) distinct levels
+            left = np.empty_like(lo)
+            right = np.empty_like(hi)
+            for level in np.unique(k):
+                mask = k == level
+                left[mask] = self._table[level][lo[mask]]
+                right[mask] = self._table[level][hi[mask] - (1 << int(level)) + 1]
+        best = np.where(self._euler_depth[left] <= self._euler_depth[right], left, right)
+        return self.euler[best]
+
+    def distance(self, a, b):
+        """Hop distance between invocations a and b (node indices) in O(1)."""
+        return self.depth[a] + self.depth[b] - 2 * self.depth[self.lca(a, b)]
+
+    def path(self, a: int, b: int):
+        """Invocation indices from a up to lca(a, b) and down to b."""
+        top = int(self.lca(a, b))
+        up, down = [], []
+        while a != top:
+            up.append(a)
+            a = int(self.parent[a])
+        while b != top:
+            down.append(b)
+            b = int(self.parent[b])
+        return up + [top] + list(reversed(down))
+
+    def adjacency(self) -> csr_matrix:
+        """Undirected CSR adjacency of the tree (built lazily, used for large set queries)."""
+        if not hasattr(self, "_adjacency"):
+            n = len(self.ids)
+            child = np.flatnonzero(self.parent != np.arange(n))
+            rows = np.concatenate([child, self.parent[child]])
+            cols = np.concatenate([self.parent[child], child])
+            self._adjacency = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+        return self._adjacency
+
+    def match(self, pattern: str):
+        """Indices of all invocations whose method name matches a dijkstra_kg-style pattern."""
+        if not hasattr(self, "_name_index"):
+            # Patterns are resolved on the distinct method names, then expanded to invocations
+            distinct, inverse = np.unique(np.array(self.names, dtype=str), return_inverse=True)
+            self._name_index = NameIndex(distinct)
+            order = np.argsort(inverse, kind="stable")
+            self._invocations = np.split(order, np.cumsum(np.bincount(inverse, minlength=len(distinct)))[:-1])
+        names = self._name_index.resolve([pattern])[pattern]
+        if not names:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate([self._invocations[i] for i in names])).astype(np.int64)
+
+    def set_distance(self, sources, targets):
+        """Minimum distance between two sets of invocations; returns (distance, a, b)."""
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if len(sources) == 0 or len(targets) == 0:
+            return math.inf, None, None
+
+        if len(sources) * len(targets) <= PAIRWISE_LIMIT:
+            a = np.repeat(sources, len(targets))
+            b = np.tile(targets, len(sources))
+            d = self.distance(a, b)
+            best = int(np.argmin(d))
+            return float(d[best]), int(a[best]), int(b[best])
+
+        dist, _, origin = multi_source_search(self.adjacency(), sources)
+        best = int(targets[np.argmin(dist[targets])])
+        return float(dist[best]), int(origin[best]), best
+
+
+_loaded_trees = OrderedDict()
+
+
+def get_invocation_tree(graph_uri: str) -> InvocationTree:
+    """Return the InvocationTree of a graph, built at most once per process (LRU of TREE_CACHE_SIZE)."""
+    if graph_uri in _loaded_trees:
+        _loaded_trees.move_to_end(graph_uri)
+        return _loaded_trees[graph_uri]
+    tree = InvocationTree.from_sparql(graph_uri)
+    _loaded_trees[graph_uri] = tree
+    if len(_loaded_trees) > TREE_CACHE_SIZE:
+        _loaded_trees.popitem(last=False)
+    return tree
+
+
+def shortest_path(graph_uri: str, src: str, dst: str):
+    """Invocation-tree counterpart of dijkstra_kg.shortest_path (same return contract).
+
+    The path lists the method names of the invocations from the matched source
+    invocation via the lowest common ancestor to the matched destination invocation.
+    """
+    tree = get_invocation_tree(graph_uri)
+    distance, a, b = tree.set_distance(tree.match(src), tree.match(dst))
+    if a is None or not math.isfinite(distance):
+        return math.inf, [], src, dst
+    path = [tree.names[i] for i in tree.path(a, b)]
+    return distance, path, tree.names[a], tree.names[b]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Invocation-level hop distance on a KG-backed call tree.")
+    parser.add_argument("--graph", dest="graph_uri", required=True,
+                        help="Named graph URI to use in the SPARQL FROM clause.")
+    parser.add_argument("--src", required=True, help="Source method identifier (regex and inner-class patterns).")
+    parser.add_argument("--dst", required=True, help="Destination method identifier (regex and inner-class patterns).")
+    args = parser.parse_args()
+
+    distance, path, src_node, dst_node = shortest_path(args.graph_uri, args.src, args.dst)
+    print("Source node:", src_node)
+    print("Destination node:", dst_node)
+    print("Hop distance:", distance)
+    print("Path:", path)
+
+
+if __name__ == "__main__":
+    main()
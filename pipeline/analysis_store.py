@@ -0,0 +1,124 @@
+# Concurrency-safe storage of outputs/<repo>/<branch>/analysis.json.
+#
+# Every pipeline step owns a fixed set of top-level keys (see STEP_FIELDS) and only
+# merges those into the file. Updates take an exclusive per-branch file lock,
+# re-read the current file, merge, and replace it atomically (write to a temporary
+# file in the same directory, fsync, os.replace), so steps can run in parallel
+# across branches and stages and a crash never leaves a truncated analysis.json.
+
+import json
+import logging
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_FILENAME = "analysis.json"
+LOCK_FILENAME = ".analysis.lock"
+
+# Keys each step may write; updates with an owner are checked against this table
+STEP_FIELDS = {
+    "fetch_and_analyze": ("patched", "test", "patched_methods", "patched_constructors", "patched_definitions"),
+    "enrich_analysis_with_non_equi_tests": ("suitable_tests",),
+    "find_method_for_suitable_testclasses": ("suitable_test_methods",),
+    "extract_source_package": ("sourcePackage",),
+}
+
+
+@contextmanager
+def branch_lock(branch_path: str):
+    """Exclusive lock on a branch directory (blocks until acquired)."""
+    os.makedirs(branch_path, exist_ok=True)
+    with open(os.path.join(branch_path, LOCK_FILENAME), "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _current_umask() -> int:
+    # os.umask can only be read by setting it; done once at import, before worker threads start
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _current_umask()
+
+
+def write_text_atomic(path: str, text: str, encoding: str = "utf-8") -> None:
+    """Write a file via temporary file + rename, so readers see the old or the new content."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file as 0600; keep the mode of the file being replaced,
+        # or use the mode a plain open() would have given a new file
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_analysis(branch_path: str) -> Optional[Dict[str, Any]]:
+    """Current analysis.json of a branch, or None if it does not exist."""
+    path = os.path.join(branch_path, ANALYSIS_FILENAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def update_analysis(
+    branch_path: str,
+    fields: Optional[Dict[str, Any]] = None,
+    remove: Iterable[str] = (),
+    owner: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Merge fields into (and remove keys from) a branch's analysis.json under its lock.
+
+    With owner set, only the keys listed in STEP_FIELDS[owner] may be written or
+    removed. Returns the merged analysis.
+    """
+    fields = fields or {}
+    remove = list(remove)
+    if owner is not None:
+        foreign = (set(fields) | set(remove)) - set(STEP_FIELDS[owner])
+        if foreign:
+            raise ValueError(f"{owner} may not write {sorted(foreign)} to {ANALYSIS_FILENAME}")
+
+    with branch_lock(branch_path):
+        analysis = read_analysis(branch_path) or {}
+        analysis.update(fields)
+        for key in remove:
+            analysis.pop(key, None)
+        write_text_atomic(os.path.join(branch_path, ANALYSIS_FILENAME), json.dumps(analysis, indent=2, ensure_ascii=False))
+    logger.debug("Updated %s in %s (owner=%s)", sorted(fields) + sorted(remove), branch_path, owner)
+    return analysis
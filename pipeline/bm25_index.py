@@ -0,0 +1,149 @@
+# Lexical BM25 index over the invocations of one call tree.
+#
+# Each invocation is a document made of its method name, argument values and result
+# type/value, tokenized on package dots, '$' and camelCase. The index is queried with
+# the failure text of test-results.txt (assertion message and stack trace) to rank
+# invocations and subtrees. Fully local, no embedding service needed.
+
+import argparse
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from calltree import ancestors_closure, iter_postorder, iter_preorder, load_calltree, pruned_to_xml
+
+logger = logging.getLogger(__name__)
+
+_SPLIT_RE = re.compile(r"[^A-Za-z0-9]+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+# Lines of a Maven/Surefire log that carry the failure
+_FAILURE_LINE_RE = re.compile(
+    r"(Exception|Error|Caused by|Tests in error|Failed tests|expected|assert|^\s+at |<<< (FAILURE|ERROR))"
+)
+MAX_FAILURE_LINES = 400
+
+
+def tokenize(text: str) -> List[str]:
+    """Split on dots and other separators, then on camelCase; keep the compound word too.
+
+    'org.apache.camel.util.ExchangeHelper$Inner' ->
+    ['org', 'apache', 'camel', 'util', 'exchangehelper', 'exchange', 'helper', 'inner']
+    """
+    tokens = []
+    for word in _SPLIT_RE.split(text):
+        if not word:
+            continue
+        parts = _CAMEL_RE.findall(word)
+        tokens.append(word.lower())
+        if len(parts) > 1:
+            tokens.extend(p.lower() for p in parts)
+    return tokens
+
+
+def failure_text(test_log: str, max_lines: int = MAX_FAILURE_LINES) -> str:
+    """Extract the assertion messages and stack traces from a test log."""
+    lines = [line for line in test_log.splitlines() if _FAILURE_LINE_RE.search(line)]
+    return "\n".join(lines[:max_lines])
+
+
+def node_text(m: dict) -> str:
+    parts = [m["name"]]
+    parts.extend(arg["value"] for arg in m["args"])
+    if m["result"]:
+        parts.append(m["result"]["type"])
+        parts.append(m["result"]["value"])
+    return " ".join(parts)
+
+
+class BM25Index:
+    """Okapi BM25 over the invocations of one call tree."""
+
+    def __init__(self, methods: Dict[str, dict], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.doc_len: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+        for method_id, m in methods.items():
+            terms = Counter(tokenize(node_text(m)))
+            doc = len(self.doc_ids)
+            self.doc_ids.append(method_id)
+            self.doc_len.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((doc, tf))
+
+        self.avg_len = (sum(self.doc_len) / len(self.doc_len)) if self.doc_len else 0.0
+
+    def idf(self, term: str) -> float:
+        n = len(self.doc_ids)
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str) -> Dict[str, float]:
+        """Return {method_id: score} for every invocation matching at least one query term."""
+        scores: Dict[int, float] = defaultdict(float)
+        # Repeated query terms (e.g. the same frame in a long trace) only count once
+        for term in sorted(set(tokenize(query))):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc] / self.avg_len)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return {self.doc_ids[doc]: score for doc, score in scores.items()}
+
+
+def rank_subtrees(methods: Dict[str, dict], root_id: str, node_scores: Dict[str, float]) -> List[Tuple[str, float]]:
+    """Rank subtrees by the best node score they contain, deeper subtrees first on ties."""
+    best: Dict[str, float] = {}
+    for method_id in iter_postorder(methods, root_id):
+        own = node_scores.get(method_id, 0.0)
+        best[method_id] = max([own] + [best[c] for c in methods[method_id]["children"]])
+    depth = {method_id: d for method_id, d in iter_preorder(methods, root_id)}
+    ranked = [(method_id, score) for method_id, score in best.items() if score > 0]
+    ranked.sort(key=lambda item: (-item[1], -depth[item[0]], item[0]))
+    return ranked
+
+
+def relevant_keep_set(methods: Dict[str, dict], root_id: str, node_scores: Dict[str, float],
+                      top_n: int = 50) -> set:
+    """Top-n scoring invocations with their direct children and all ancestors."""
+    top = sorted(node_scores, key=lambda method_id: (-node_scores[method_id], method_id))[:top_n]
+    context = [c for method_id in top for c in methods[method_id]["children"]]
+    return ancestors_closure(methods, list(top) + context + [root_id])
+
+
+def relevance_filtered_xml(graph_uri: str, test_log: str, top_n: int = 50) -> str:
+    """Return the call tree XML restricted to the invocations most relevant to the failure."""
+    methods, root_id = load_calltree(graph_uri)
+    index = BM25Index(methods)
+    scores = index.search(failure_text(test_log))
+    keep = relevant_keep_set(methods, root_id, scores, top_n=top_n)
+    logger.info("BM25 relevance filter kept %d of %d invocations (%d matched)", len(keep), len(methods), len(scores))
+    return pruned_to_xml(methods, root_id, keep)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rank call tree subtrees by BM25 relevance to a failure log.")
+    parser.add_argument("graph_uri", help="Named graph URI of the calltree in the Virtuoso SPARQL store.")
+    parser.add_argument("test_log", help="Path to the test-results.txt of the branch.")
+    parser.add_argument("--top", type=int, default=20, help="Number of subtrees to print (default: 20).")
+    args = parser.parse_args()
+
+    with open(args.test_log, "r", encoding="utf-8", errors="replace") as f:
+        query = failure_text(f.read())
+
+    methods, root_id = load_calltree(args.graph_uri)
+    scores = BM25Index(methods).search(query)
+    for method_id, score in rank_subtrees(methods, root_id, scores)[:args.top]:
+        print(f"{score:8.3f}  {methods[method_id]['name']}  ({method_id})")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -8,99 +8,94 @@ SPARQL_ENDPOINT = "http://localhost:8890/sparql"  # anpassen
 # default graph (keeps previous behaviour when no CLI arg is given)
 DEFAULT_GRAPH = "urn:graph:07399ab8-e64f-463f-bff6-692c8473e19c"
 
-# CLI: optional positional argument for graph URI
-parser = argparse.ArgumentParser(description="Build method hierarchy from a SPARQL graph")
-parser.add_argument('graph', nargs='?', default=DEFAULT_GRAPH,
-                    help='Graph URI to query (default: %(default)s)')
-parser.add_argument('--format', choices=['xml', 'ttl', 'json'], default='xml',
-                    help='Output format: xml, ttl, or json (default: xml)')
-parser.add_argument('--output', '-o', 
-                    help='Output filename (default: methods_hierarchy.xml or methods_hierarchy.ttl)')
-args = parser.parse_args()
-GRAPH_URI = args.graph
-
 sparql = SPARQLWrapper(SPARQL_ENDPOINT)
 sparql.setReturnFormat(JSON)
 
-# --- SPARQL: Traversal der RDF-List für args, single result ---
-sparql.setQuery(f"""
-PREFIX ex: <http://example.org/>
-PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-
-SELECT ?method ?name ?callee ?argType ?argValue ?resType ?resValue
-FROM <{GRAPH_URI}>
-WHERE {{
-    ?method ex:method ?name ;
-            ex:callee ?callee .
-
-    OPTIONAL {{
-        ?method ex:args ?argList .
-        ?argList rdf:rest*/rdf:first ?argNode .
-        ?argNode rdf:type ?argType ;
-                 rdf:value ?argValue .
-    }}
 
-    OPTIONAL {{
-        ?method ex:result ?resNode .
-        ?resNode rdf:type ?resType ;
-                 rdf:value ?resValue .
+def load_methods(graph_uri: str):
+    """Query the call tree of a graph; returns the methods dict and the root method."""
+    sparql.setReturnFormat(JSON)
+    # --- SPARQL: Traversal der RDF-List für args, single result ---
+    sparql.setQuery(f"""
+    PREFIX ex: <http://example.org/>
+    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+
+    SELECT ?method ?name ?callee ?argType ?argValue ?resType ?resValue
+    FROM <{graph_uri}>
+    WHERE {{
+        ?method ex:method ?name ;
+                ex:callee ?callee .
+
+        OPTIONAL {{
+            ?method ex:args ?argList .
+            ?argList rdf:rest*/rdf:first ?argNode .
+            ?argNode rdf:type ?argType ;
+                     rdf:value ?argValue .
+        }}
+
+        OPTIONAL {{
+            ?method ex:result ?resNode .
+            ?resNode rdf:type ?resType ;
+                     rdf:value ?resValue .
+        }}
     }}
-}}
-""")
-
-results = sparql.query().convert()
-
-# --- Methoden-Dict aufbauen (aggregiert args und single result) ---
-methods = {}
-for row in results["results"]["bindings"]:
-    method_id = row["method"]["value"]
-    # Name und callee könnten in manchen DBs fehlen – defensiv behandeln
-    name = row["name"]["value"] if "name" in row else ""
-    callee = row["callee"]["value"] if "callee" in row else method_id
-
-    if method_id not in methods:
-        methods[method_id] = {
-            "id": method_id,
-            "name": name,
-            "callee": callee,
-            "args": [],        # list of {"type":..., "value":...}
-            "result": None,    # single {"type":..., "value":...} or None
-            "children": []     # list of method ids called by this method
-        }
-    else:
-        # Falls Name/Callee in späteren Zeilen nicht gesetzt waren, aktualisieren
-        if not methods[method_id]["name"] and name:
-            methods[method_id]["name"] = name
-        if not methods[method_id]["callee"] and callee:
-            methods[method_id]["callee"] = callee
-
-    # args (können mehrere Zeilen erzeugen)
-    if "argType" in row and "argValue" in row:
-        methods[method_id]["args"].append({
-            "type": row["argType"]["value"],
-            "value": row["argValue"]["value"]
-        })
-
-    # result (falls mehrfach wegen SPARQL-Duplikaten auftaucht, überschreiben wir nicht - behalten erstes)
-    if methods[method_id]["result"] is None and "resType" in row and "resValue" in row:
-        methods[method_id]["result"] = {
-            "type": row["resType"]["value"],
-            "value": row["resValue"]["value"]
-        }
+    """)
+
+    results = sparql.query().convert()
+
+    # --- Methoden-Dict aufbauen (aggregiert args und single result) ---
+    methods = {}
+    for row in results["results"]["bindings"]:
+        method_id = row["method"]["value"]
+        # Name und callee könnten in manchen DBs fehlen – defensiv behandeln
+        name = row["name"]["value"] if "name" in row else ""
+        callee = row["callee"]["value"] if "callee" in row else method_id
+
+        if method_id not in methods:
+            methods[method_id] = {
+                "id": method_id,
+                "name": name,
+                "callee": callee,
+                "args": [],        # list of {"type":..., "value":...}
+                "result": None,    # single {"type":..., "value":...} or None
+                "children": []     # list of method ids called by this method
+            }
+        else:
+            # Falls Name/Callee in späteren Zeilen nicht gesetzt waren, aktualisieren
+            if not methods[method_id]["name"] and name:
+                methods[method_id]["name"] = name
+            if not methods[method_id]["callee"] and callee:
+                methods[method_id]["callee"] = callee
 
-# --- Kinder (aufgerufene Methoden) zuweisen ---
-for m in methods.values():
-    if m["id"] != m["callee"]:  # selbstaufruf ignorieren bei Zuordnung
-        if m["callee"] in methods:
-            methods[m["callee"]]["children"].append(m["id"])
+        # args (können mehrere Zeilen erzeugen)
+        if "argType" in row and "argValue" in row:
+            methods[method_id]["args"].append({
+                "type": row["argType"]["value"],
+                "value": row["argValue"]["value"]
+            })
+
+        # result (falls mehrfach wegen SPARQL-Duplikaten auftaucht, überschreiben wir nicht - behalten erstes)
+        if methods[method_id]["result"] is None and "resType" in row and "resValue" in row:
+            methods[method_id]["result"] = {
+                "type": row["resType"]["value"],
+                "value": row["resValue"]["value"]
+            }
+
+    # --- Kinder (aufgerufene Methoden) zuweisen ---
+    for m in methods.values():
+        if m["id"] != m["callee"]:  # selbstaufruf ignorieren bei Zuordnung
+            if m["callee"] in methods:
+                methods[m["callee"]]["children"].append(m["id"])
+
+    # --- Root finden (callee == id) ---
+    root = next((m for m in methods.values() if m["id"] == m["callee"]), None)
+    if root is None:
+        raise ValueError("Kein Root gefunden (keine Methode mit ex:callee == id)")
+    return methods, root
 
-# --- Root finden (callee == id) ---
-root = next((m for m in methods.values() if m["id"] == m["callee"]), None)
-if root is None:
-    raise ValueError("Kein Root gefunden (keine Methode mit ex:callee == id)")
 
 # --- XML Builder mit Zyklus-Schutz ---
-def build_xml_node(method_id, visited=None):
+def build_xml_node(methods, method_id, visited=None):
     if visited is None:
         visited = set()
     if method_id in visited:
@@ -130,7 +125,7 @@ def build_xml_node(method_id, visited=None):
     # methods (aufgerufene Methoden)
     methods_elem = ET.SubElement(elem, "called")
     for child_id in m["children"]:
-        child_node = build_xml_node(child_id, visited.copy())  # copy visited für getrennte Pfade
+        child_node = build_xml_node(methods, child_id, visited.copy())  # copy visited für getrennte Pfade
         methods_elem.append(child_node)
 
     return elem
@@ -422,26 +417,43 @@ def get_hierarchy_json_string(graph_uri: str) -> str:
     json_data = build_json_node(root["id"])
     return json.dumps(json_data, indent=2, ensure_ascii=False)
 
-# --- Dokument erstellen und speichern, nur wenn als Script ausgeführt ---
-if __name__ == "__main__":
+def main(argv=None):
+    # CLI: optional positional argument for graph URI. Parsed only when run as a script,
+    # so importing this module (e.g. from evaluate_calltree.py) never reads sys.argv
+    parser = argparse.ArgumentParser(description="Build method hierarchy from a SPARQL graph")
+    parser.add_argument('graph', nargs='?', default=DEFAULT_GRAPH,
+                        help='Graph URI to query (default: %(default)s)')
+    parser.add_argument('--format', choices=['xml', 'ttl', 'json'], default='xml',
+                        help='Output format: xml, ttl, or json (default: xml)')
+    parser.add_argument('--output', '-o',
+                        help='Output filename (default: methods_hierarchy.xml or methods_hierarchy.ttl)')
+    args = parser.parse_args(argv)
+    graph_uri = args.graph
+
     if args.format == 'ttl':
         # Generate TTL output
-        ttl_content = get_hierarchy_ttl_string(GRAPH_URI)
+        ttl_content = get_hierarchy_ttl_string(graph_uri)
         output_file = args.output or "methods_hierarchy.ttl"
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(ttl_content)
-        print(f"TTL hierarchy written to {output_file} (graph: {GRAPH_URI})")
+        print(f"TTL hierarchy written to {output_file} (graph: {graph_uri})")
     elif args.format == 'json':
         # Generate JSON output
-        json_content = get_hierarchy_json_string(GRAPH_URI)
+        json_content = get_hierarchy_json_string(graph_uri)
         output_file = args.output or "methods_hierarchy.json"
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(json_content)
-        print(f"JSON hierarchy written to {output_file} (graph: {GRAPH_URI})")
+        print(f"JSON hierarchy written to {output_file} (graph: {graph_uri})")
     else:
         # Generate XML output
-        root_elem = build_xml_node(root["id"])
+        methods, root = load_methods(graph_uri)
+        root_elem = build_xml_node(methods, root["id"])
         tree = ET.ElementTree(root_elem)
         output_file = args.output or "methods_hierarchy.xml"
         tree.write(output_file, encoding="utf-8", xml_declaration=True)
-        print(f"XML hierarchy written to {output_file} (graph: {GRAPH_URI})")
\ No newline at end of file
+        print(f"XML hierarchy written to {output_file} (graph: {graph_uri})")
+
+
+# --- Dokument erstellen und speichern, nur wenn als Script ausgeführt ---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import hashlib
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, Tuple
+
+from SPARQLWrapper import SPARQLWrapper, JSON
+
+SPARQL_ENDPOINT = os.getenv("SPARQL_ENDPOINT", "http://localhost:8890/sparql")
+
+# Same shape as the query in build_hierarchy.py: one row per (invocation, arg) combination.
+# The list cell and its rdf:rest are selected as well, because rows come back in
+# arbitrary order and the argument positions are recovered by walking the list
+CALLTREE_QUERY = """
+PREFIX ex: <http://example.org/>
+PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+
+SELECT ?method ?name ?callee ?argList ?argCell ?argRest ?argType ?argValue ?resType ?resValue
+FROM <{graph}>
+WHERE {{
+    ?method ex:method ?name ;
+            ex:callee ?callee .
+
+    OPTIONAL {{
+        ?method ex:args ?argList .
+        ?argList rdf:rest* ?argCell .
+        ?argCell rdf:first ?argNode ;
+                 rdf:rest ?argRest .
+        ?argNode rdf:type ?argType ;
+                 rdf:value ?argValue .
+    }}
+
+    OPTIONAL {{
+        ?method ex:result ?resNode .
+        ?resNode rdf:type ?resType ;
+                 rdf:value ?resValue .
+    }}
+}}
+"""
+
+
+def methods_from_bindings(bindings) -> Dict[str, dict]:
+    """Aggregate SPARQL result rows into the methods dict used by build_hierarchy.py.
+
+    Each entry has the keys id, name, callee, args, result and children. When the
+    rows carry the argument list cells (CALLTREE_QUERY), every arg gets its list
+    position and args are in list order; otherwise they keep the row order.
+    """
+    methods: Dict[str, dict] = {}
+    arg_cells: Dict[str, dict] = {}  # method id -> {"head": list, "rest": {cell: next}, "arg": {cell: arg}}
+    for row in bindings:
+        method_id = row["method"]["value"]
+        name = row["name"]["value"] if "name" in row else ""
+        callee = row["callee"]["value"] if "callee" in row else method_id
+
+        if method_id not in methods:
+            methods[method_id] = {
+                "id": method_id,
+                "name": name,
+                "callee": callee,
+                "args": [],
+                "result": None,
+                "children": [],
+            }
+        else:
+            if not methods[method_id]["name"] and name:
+                methods[method_id]["name"] = name
+            if not methods[method_id]["callee"] and callee:
+                methods[method_id]["callee"] = callee
+
+        if "argType" in row and "argValue" in row:
+            arg = {"type": row["argType"]["value"], "value": row["argValue"]["value"]}
+            if "argCell" in row and "argRest" in row and "argList" in row:
+                cells = arg_cells.setdefault(method_id, {"head": row["argList"]["value"], "rest": {}, "arg": {}})
+                cells["rest"][row["argCell"]["value"]] = row["argRest"]["value"]
+                cells["arg"][row["argCell"]["value"]] = arg
+            else:
+                methods[method_id]["args"].append(arg)
+        if methods[method_id]["result"] is None and "resType" in row and "resValue" in row:
+            methods[method_id]["result"] = {
+                "type": row["resType"]["value"],
+                "value": row["resValue"]["value"],
+            }
+
+    for method_id, cells in arg_cells.items():
+        methods[method_id]["args"] = _args_in_list_order(cells)
+
+    # Self references mark the root. The graph has no call-order predicate and the
+    # row order of a SPARQL result is arbitrary, so children are sorted by id
+    # (numbers in ids compared numerically) to make every traversal reproducible
+    for m in methods.values():
+        if m["id"] != m["callee"] and m["callee"] in methods:
+            methods[m["callee"]]["children"].append(m["id"])
+    for m in methods.values():
+        m["children"].sort(key=_id_sort_key)
+    return methods
+
+
+def _args_in_list_order(cells: dict) -> list:
+    """Walk the rdf:rest chain from the list head; each arg gets its 0-based position."""
+    args = []
+    cell = cells["head"]
+    while cell in cells["rest"] and len(args) < len(cells["rest"]):
+        args.append(dict(cells["arg"][cell], position=len(args)))
+        cell = cells["rest"][cell]
+    return args
+
+
+def _id_sort_key(method_id: str):
+    return [(0, int(part), "") if part.isdigit() else (1, 0, part) for part in re.split(r"(\d+)", method_id)]
+
+
+def find_root(methods: Dict[str, dict]) -> str:
+    """Return the id of the root invocation (the one whose ex:callee points to itself)."""
+    root = next((m for m in methods.values() if m["id"] == m["callee"]), None)
+    if root is None:
+        raise ValueError("No root found (no method with ex:callee == id)")
+    return root["id"]
+
+
+def load_calltree(graph_uri: str, endpoint: str = SPARQL_ENDPOINT) -> Tuple[Dict[str, dict], str]:
+    """Load the call tree of a named graph and return (methods, root_id)."""
+    sparql = SPARQLWrapper(endpoint)
+    sparql.setReturnFormat(JSON)
+    sparql.setQuery(CALLTREE_QUERY.format(graph=graph_uri))
+    bindings = sparql.query().convert()["results"]["bindings"]
+    methods = methods_from_bindings(bindings)
+    return methods, find_root(methods)
+
+
+def iter_preorder(methods: Dict[str, dict], root_id: str):
+    """Yield (method_id, depth) in pre-order without recursion (traces can be >10k calls deep)."""
+    stack = [(root_id, 0)]
+    seen = set()
+    while stack:
+        method_id, depth = stack.pop()
+        if method_id in seen:
+            continue
+        seen.add(method_id)
+        yield method_id, depth
+        for child_id in reversed(methods[method_id]["children"]):
+            stack.append((child_id, depth + 1))
+
+
+def iter_postorder(methods: Dict[str, dict], root_id: str):
+    """Yield method ids so that every child comes before its parent."""
+    order = [method_id for method_id, _ in iter_preorder(methods, root_id)]
+    return reversed(order)
+
+
+def subtree_hashes(methods: Dict[str, dict], root_id: str, ignore_values: bool = True) -> Dict[str, str]:
+    """Return a structural hash for every subtree below root_id.
+
+    The hash covers the method name, argument types in list order, the result type
+    and the sorted child hashes (children carry no call order, and their ids differ between
+    graphs). With ignore_values=False the argument and result values are included
+    as well, so only byte-identical subtrees share a key.
+    """
+    hashes: Dict[str, str] = {}
+    for method_id in iter_postorder(methods, root_id):
+        m = methods[method_id]
+        h = hashlib.sha1()
+        h.update(m["name"].encode("utf-8"))
+        for arg in m["args"]:
+            h.update(b"\x00a" + arg["type"].encode("utf-8"))
+            if not ignore_values:
+                h.update(b"\x00v" + arg["value"].encode("utf-8"))
+        if m["result"]:
+            h.update(b"\x00r" + m["result"]["type"].encode("utf-8"))
+            if not ignore_values:
+                h.update(b"\x00v" + m["result"]["value"].encode("utf-8"))
+        h.update(b"(")
+        for child_hash in sorted(hashes[child_id] for child_id in m["children"]):
+            h.update(child_hash.encode("ascii"))
+        h.update(b")")
+        hashes[method_id] = h.hexdigest()
+    return hashes
+
+
+def subtree_sizes(methods: Dict[str, dict], root_id: str) -> Dict[str, int]:
+    """Return the number of invocations in every subtree below root_id."""
+    sizes: Dict[str, int] = {}
+    for method_id in iter_postorder(methods, root_id):
+        sizes[method_id] = 1 + sum(sizes[c] for c in methods[method_id]["children"])
+    return sizes
+
+
+def split_method_name(name: str) -> Tuple[str, str]:
+    """Split 'org.foo.Bar$Inner.baz' into ('org.foo.Bar$Inner', 'baz')."""
+    if "." not in name:
+        return "", name
+    class_name, method_name = name.rsplit(".", 1)
+    return class_name, method_name
+
+
+def is_exception_result(method: dict) -> bool:
+    """True when the invocation ended with an exception (result type 'exception:...')."""
+    result = method.get("result")
+    return bool(result) and str(result.get("type", "")).startswith("exception:")
+
+
+def subtree_to_xml(methods: Dict[str, dict], method_id: str) -> str:
+    """Serialize one subtree in the same XML format that build_hierarchy.py sends to the LLM."""
+    def build(node_id, visited):
+        if node_id in visited:
+            return ET.Element("methodRef", attrib={"id": node_id})
+        visited = visited | {node_id}
+        m = methods[node_id]
+        elem = ET.Element("method", attrib={"id": m["id"]})
+        if m["name"]:
+            elem.set("name", m["name"])
+        if m["args"]:
+            args_elem = ET.SubElement(elem, "args")
+            for arg in m["args"]:
+                arg_elem = ET.SubElement(args_elem, "arg", attrib={"type": arg["type"]})
+                arg_elem.text = arg["value"]
+        if m["result"]:
+            res_elem = ET.SubElement(elem, "result", attrib={"type": m["result"]["type"]})
+            res_elem.text = m["result"]["value"]
+        methods_elem = ET.SubElement(elem, "methods")
+        for child_id in m["children"]:
+            methods_elem.append(build(child_id, visited))
+        return elem
+
+    return ET.tostring(build(method_id, frozenset()), encoding="utf-8", method="xml").decode("utf-8")
+
+
+def ancestors_closure(methods: Dict[str, dict], method_ids) -> set:
+    """Return method_ids together with all their ancestors up to the root."""
+    keep = set()
+    for method_id in method_ids:
+        cur = method_id
+        while cur in methods and cur not in keep:
+            keep.add(cur)
+            parent = methods[cur]["callee"]
+            if parent == cur:
+                break
+            cur = parent
+    return keep
+
+
+def pruned_to_xml(methods: Dict[str, dict], root_id: str, keep: set) -> str:
+    """Serialize the call tree restricted to the invocations in keep.
+
+    keep should be closed under ancestors (see ancestors_closure), otherwise
+    kept nodes below a dropped parent are not reachable from the root.
+    """
+    pruned = {
+        method_id: dict(m, children=[c for c in m["children"] if c in keep])
+        for method_id, m in methods.items() if method_id in keep
+    }
+    return subtree_to_xml(pruned, root_id)
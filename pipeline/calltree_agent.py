@@ -0,0 +1,378 @@
+# Tool-calling navigation of a call tree.
+#
+# Instead of shipping the full XML, the LLM starts with the root invocation and a
+# summary of the invocations that ended with an exception, and then explores the tree
+# through tools (children, bounded subtrees, name search). Nodes are fetched lazily
+# via small SPARQL queries and cached, so only the explored part of the tree is ever
+# loaded and tokenized. ScriptedChat replays scripted tool calls for offline runs.
+
+import json
+import logging
+import os
+import re
+from typing import Callable, Dict, List, Optional
+
+import requests
+from SPARQLWrapper import SPARQLWrapper, JSON
+
+from calltree import SPARQL_ENDPOINT
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
+AGENT_MODEL = os.getenv("AGENT_MODEL", "openai/gpt-5")
+AGENT_PROMPT_FILE = "prompts/agent_prompt.txt"
+
+MAX_VALUE_CHARS = 200
+MAX_SUBTREE_NODES = 200
+
+# Node ids come from the model; only plain IRIs may be put into <...> in a query
+_IRI = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*:[^\s<>"{}|\\^`]+$')
+
+_PREFIXES = """
+PREFIX ex: <http://example.org/>
+PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+"""
+
+_NODE_FIELDS = """
+    OPTIONAL {{
+        ?m ex:args ?argList .
+        ?argList rdf:rest*/rdf:first ?argNode .
+        ?argNode rdf:type ?argType ;
+                 rdf:value ?argValue .
+    }}
+    OPTIONAL {{
+        ?m ex:result ?resNode .
+        ?resNode rdf:type ?resType ;
+                 rdf:value ?resValue .
+    }}
+"""
+
+ROOT_QUERY = _PREFIXES + """
+SELECT ?m ?name ?argType ?argValue ?resType ?resValue
+FROM <{graph}>
+WHERE {{
+    ?m ex:method ?name ;
+       ex:callee ?m .
+""" + _NODE_FIELDS + "}}"
+
+CHILDREN_QUERY = _PREFIXES + """
+SELECT ?m ?name ?argType ?argValue ?resType ?resValue
+FROM <{graph}>
+WHERE {{
+    ?m ex:callee <{node}> ;
+       ex:method ?name .
+    FILTER (?m != <{node}>)
+""" + _NODE_FIELDS + "}}"
+
+SEARCH_QUERY = _PREFIXES + """
+SELECT ?m ?name ?argType ?argValue ?resType ?resValue
+FROM <{graph}>
+WHERE {{
+    {{
+        SELECT DISTINCT ?m ?name WHERE {{
+            ?m ex:method ?name .
+            FILTER (CONTAINS(STR(?name), "{pattern}"))
+        }} LIMIT {limit}
+    }}
+""" + _NODE_FIELDS + "}}"
+
+EXCEPTIONS_QUERY = _PREFIXES + """
+SELECT ?m ?name ?argType ?argValue ?resType ?resValue
+FROM <{graph}>
+WHERE {{
+    {{
+        SELECT DISTINCT ?m ?name WHERE {{
+            ?m ex:method ?name ;
+               ex:result ?r .
+            ?r rdf:type ?t .
+            FILTER (STRSTARTS(STR(?t), "exception:"))
+        }} LIMIT {limit}
+    }}
+""" + _NODE_FIELDS + "}}"
+
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "get_children",
+            "description": "List the invocations directly called by the given invocation.",
+            "parameters": {
+                "type": "object",
+                "properties": {"node_id": {"type": "string"}},
+                "required": ["node_id"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_subtree",
+            "description": "Return the subtree below an invocation up to max_depth levels (at most 200 nodes).",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "node_id": {"type": "string"},
+                    "max_depth": {"type": "integer", "minimum": 1, "maximum": 5},
+                },
+                "required": ["node_id"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_methods",
+            "description": "Find invocations whose fully-qualified method name contains the given text.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "pattern": {"type": "string"},
+                    "limit": {"type": "integer", "minimum": 1, "maximum": 50},
+                },
+                "required": ["pattern"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "submit_answer",
+            "description": "Submit the class and method that causes the failure. Ends the session.",
+            "parameters": {
+                "type": "object",
+                "properties": {"class": {"type": "string"}, "method": {"type": "string"}},
+                "required": ["class", "method"],
+            },
+        },
+    },
+]
+
+
+def _truncate(value: str) -> str:
+    return value if len(value) <= MAX_VALUE_CHARS else value[:MAX_VALUE_CHARS] + "..."
+
+
+def node_summary(m: dict) -> dict:
+    """Compact view of one invocation as shown to the model."""
+    summary = {"id": m["id"], "name": m["name"]}
+    if m["args"]:
+        summary["args"] = [f"{a['type']}={_truncate(a['value'])}" for a in m["args"]]
+    if m["result"]:
+        summary["result"] = f"{m['result']['type']}={_truncate(m['result']['value'])}"
+    return summary
+
+
+class InMemoryCalltreeSource:
+    """Navigation backed by an already loaded methods dict (see calltree.load_calltree)."""
+
+    def __init__(self, methods: Dict[str, dict], root_id: str):
+        self.methods = methods
+        self.root_id = root_id
+        self.fetched = set()
+
+    def _get(self, method_id: str) -> dict:
+        self.fetched.add(method_id)
+        return self.methods[method_id]
+
+    def root(self) -> dict:
+        return self._get(self.root_id)
+
+    def children(self, node_id: str) -> List[dict]:
+        if node_id not in self.methods:
+            raise ValueError(f"Unknown node id: {node_id!r}")
+        return [self._get(c) for c in self.methods[node_id]["children"]]
+
+    def search(self, pattern: str, limit: int = 20) -> List[dict]:
+        hits = [m for m in self.methods.values() if pattern in m["name"]][:limit]
+        return [self._get(m["id"]) for m in hits]
+
+    def exceptions(self, limit: int = 20) -> List[dict]:
+        hits = [m for m in self.methods.values()
+                if m["result"] and m["result"]["type"].startswith("exception:")][:limit]
+        return [self._get(m["id"]) for m in hits]
+
+
+class SparqlCalltreeSource:
+    """Lazy navigation: every call issues a small SPARQL query; results are cached per node."""
+
+    def __init__(self, graph_uri: str, endpoint: str = SPARQL_ENDPOINT):
+        self.graph_uri = graph_uri
+        self.sparql = SPARQLWrapper(endpoint)
+        self.sparql.setReturnFormat(JSON)
+        self.nodes: Dict[str, dict] = {}
+        self.children_of: Dict[str, List[str]] = {}
+        self.queries = 0
+        self._root_id: Optional[str] = None
+
+    @property
+    def fetched(self):
+        return set(self.nodes)
+
+    def _select(self, query: str) -> List[dict]:
+        self.queries += 1
+        self.sparql.setQuery(query)
+        bindings = self.sparql.query().convert()["results"]["bindings"]
+        ordered: Dict[str, dict] = {}
+        for row in bindings:
+            method_id = row["m"]["value"]
+            m = ordered.setdefault(method_id, {
+                "id": method_id, "name": row["name"]["value"], "args": [], "result": None,
+            })
+            if "argType" in row and "argValue" in row:
+                m["args"].append({"type": row["argType"]["value"], "value": row["argValue"]["value"]})
+            if m["result"] is None and "resType" in row and "resValue" in row:
+                m["result"] = {"type": row["resType"]["value"], "value": row["resValue"]["value"]}
+        for method_id, m in ordered.items():
+            self.nodes.setdefault(method_id, m)
+        return [self.nodes[method_id] for method_id in ordered]
+
+    def root(self) -> dict:
+        if self._root_id is None:
+            found = self._select(ROOT_QUERY.format(graph=self.graph_uri))
+            if not found:
+                raise ValueError(f"No root invocation (ex:callee pointing to itself) in graph {self.graph_uri}")
+            self._root_id = found[0]["id"]
+        return self.nodes[self._root_id]
+
+    def children(self, node_id: str) -> List[dict]:
+        if node_id not in self.nodes and not _IRI.match(node_id):
+            raise ValueError(f"Unknown node id: {node_id!r}")
+        if node_id not in self.children_of:
+            found = self._select(CHILDREN_QUERY.format(graph=self.graph_uri, node=node_id))
+            self.children_of[node_id] = [m["id"] for m in found]
+        return [self.nodes[c] for c in self.children_of[node_id]]
+
+    def search(self, pattern: str, limit: int = 20) -> List[dict]:
+        pattern = pattern.replace("\\", "\\\\").replace('"', '\\"')
+        return self._select(SEARCH_QUERY.format(graph=self.graph_uri, pattern=pattern, limit=int(limit)))
+
+    def exceptions(self, limit: int = 20) -> List[dict]:
+        return self._select(EXCEPTIONS_QUERY.format(graph=self.graph_uri, limit=int(limit)))
+
+
+def subtree(source, node_id: str, max_depth: int = 2) -> List[dict]:
+    """Breadth-limited subtree view: each entry carries the id of its parent."""
+    result = []
+    frontier = [(node_id, 0)]
+    while frontier and len(result) < MAX_SUBTREE_NODES:
+        current, depth = frontier.pop(0)
+        if depth >= max_depth:
+            continue
+        for child in source.children(current):
+            result.append(dict(node_summary(child), parent=current))
+            frontier.append((child["id"], depth + 1))
+    return result[:MAX_SUBTREE_NODES]
+
+
+def execute_tool(source, name: str, arguments: dict):
+    """Run one tool call against the call tree source and return a JSON-serializable result."""
+    if name == "get_children":
+        return [node_summary(m) for m in source.children(arguments["node_id"])]
+    if name == "get_subtree":
+        return subtree(source, arguments["node_id"], min(int(arguments.get("max_depth", 2)), 5))
+    if name == "search_methods":
+        return [node_summary(m) for m in source.search(arguments["pattern"], min(int(arguments.get("limit", 20)), 50))]
+    raise ValueError(f"Unknown tool: {name}")
+
+
+class OpenRouterChat:
+    """Chat client for OpenRouter's tool-calling API (OpenAI message format)."""
+
+    def __init__(self, model: str = AGENT_MODEL, api_key: str = OPENROUTER_API_KEY):
+        self.model = model
+        self.api_key = api_key
+        self.session = requests.Session()
+
+    def __call__(self, messages: List[dict], tools: List[dict]) -> dict:
+        res = self.session.post(
+            url="https://openrouter.ai/api/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            },
+            data=json.dumps({"model": self.model, "messages": messages, "tools": tools}),
+            timeout=120,
+        )
+        try:
+            res.raise_for_status()
+        except requests.HTTPError as e:
+            logger.error("HTTP error from OpenRouter: %s - body: %s", e, res.text)
+            raise
+        data = res.json()
+        if "choices" not in data or not data["choices"]:
+            raise RuntimeError(f"Unexpected OpenRouter response: {data}")
+        return data["choices"][0]["message"]
+
+
+class ScriptedChat:
+    """Offline stand-in for the LLM that replays a fixed script.
+
+    Each script entry is either {"tool": <name>, "arguments": {...}} or
+    {"content": "<final answer>"}. Received message lists are kept in self.calls.
+    """
+
+    def __init__(self, script: List[dict]):
+        self.script = list(script)
+        self.calls: List[List[dict]] = []
+
+    def __call__(self, messages: List[dict], tools: List[dict]) -> dict:
+        self.calls.append([dict(m) for m in messages])
+        if not self.script:
+            raise RuntimeError("ScriptedChat: script exhausted")
+        step = self.script.pop(0)
+        if "tool" in step:
+            return {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": f"call_{len(self.calls)}",
+                    "type": "function",
+                    "function": {"name": step["tool"], "arguments": json.dumps(step.get("arguments", {}))},
+                }],
+            }
+        return {"role": "assistant", "content": step["content"]}
+
+
+def build_initial_prompt(source, exception_limit: int = 20) -> str:
+    with open(AGENT_PROMPT_FILE, "r", encoding="utf-8") as f:
+        template = f.read()
+    root = node_summary(source.root())
+    exceptions = [node_summary(m) for m in source.exceptions(exception_limit)]
+    return (template
+            .replace("{root}", json.dumps(root, ensure_ascii=False))
+            .replace("{exceptions}", json.dumps(exceptions, indent=1, ensure_ascii=False)))
+
+
+def run_agent(source, chat: Callable[[List[dict], List[dict]], dict], max_steps: int = 30,
+              initial_prompt: Optional[str] = None) -> str:
+    """Let the model explore the call tree via tools until it submits an answer.
+
+    Returns the answer as JSON string ({"class": ..., "method": ...}), like the
+    content returned by evaluate_calltree.
+    """
+    messages = [{"role": "user", "content": initial_prompt or build_initial_prompt(source)}]
+    tool_chars = 0
+    for step in range(max_steps):
+        message = chat(messages, TOOLS)
+        tool_calls = message.get("tool_calls") or []
+        if not tool_calls:
+            logger.info("Agent finished after %d steps, %d nodes fetched", step + 1, len(source.fetched))
+            return message.get("content") or ""
+        messages.append({"role": "assistant", "content": message.get("content"), "tool_calls": tool_calls})
+        for call in tool_calls:
+            name = call["function"]["name"]
+            arguments = json.loads(call["function"].get("arguments") or "{}")
+            if name == "submit_answer":
+                logger.info("Agent submitted answer after %d steps, %d nodes fetched, %d tool output chars",
+                            step + 1, len(source.fetched), tool_chars)
+                return json.dumps({"class": arguments.get("class"), "method": arguments.get("method")})
+            try:
+                output = json.dumps(execute_tool(source, name, arguments), ensure_ascii=False)
+            except Exception as e:
+                output = json.dumps({"error": str(e)})
+            tool_chars += len(output)
+            logger.debug("Tool %s(%s) -> %d chars", name, arguments, len(output))
+            messages.append({"role": "tool", "tool_call_id": call["id"], "content": output})
+    raise RuntimeError(f"Agent did not submit an answer within {max_steps} steps")
+
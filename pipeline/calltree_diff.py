@@ -0,0 +1,146 @@
+# Failing-vs-passing call tree diff.
+#
+# Aligns a failing call tree with a passing one (e.g. the same test after applying
+# developer-patch.diff, or a passing sibling test) and keeps only the regions where
+# the failing run diverges, together with their ancestors. Identical subtrees are
+# matched by structural hash first; the remaining children are paired by method name
+# and compared recursively. Children are matched as multisets rather than sequences,
+# so the result does not depend on the order the store returns them in.
+
+import argparse
+import logging
+from typing import Dict, List, Set, Tuple
+
+from calltree import ancestors_closure, iter_preorder, load_calltree, pruned_to_xml, subtree_hashes
+
+logger = logging.getLogger(__name__)
+
+
+class CalltreeDiff:
+    """Result of diffing a failing tree against a passing tree."""
+
+    def __init__(self):
+        # failing invocations with no counterpart in the passing tree (subtree roots)
+        self.added: List[str] = []
+        # failing invocations whose counterpart has the same name but a different result/args
+        self.changed: List[str] = []
+        # passing invocations missing from the failing tree, as (failing parent id, passing id)
+        self.missing: List[Tuple[str, str]] = []
+        # number of matched pairs that were skipped because their subtrees are identical
+        self.identical = 0
+
+    @property
+    def divergent(self) -> List[str]:
+        return self.added + self.changed + [parent for parent, _ in self.missing]
+
+
+def _node_signature(m: dict, ignore_values: bool):
+    # Args in list-position order (see calltree.methods_from_bindings), not in SPARQL row order
+    args = sorted(m["args"], key=lambda arg: arg.get("position", 0))
+    if ignore_values:
+        return (m["result"]["type"] if m["result"] else None), [arg["type"] for arg in args]
+    return m["result"], [(arg["type"], arg["value"]) for arg in args]
+
+
+def _node_differs(a: dict, b: dict, ignore_values: bool) -> bool:
+    return _node_signature(a, ignore_values) != _node_signature(b, ignore_values)
+
+
+def _pair_by(f_items: List[str], p_items: List[str], f_key, p_key):
+    """Pair items with equal keys as multisets; return the pairs and the unpaired rest of both lists.
+
+    Within one key, items are paired in list order (children are sorted by invocation id).
+    """
+    pending: Dict[object, List[str]] = {}
+    for item in p_items:
+        pending.setdefault(p_key(item), []).append(item)
+    pairs, f_left = [], []
+    for item in f_items:
+        candidates = pending.get(f_key(item))
+        if candidates:
+            pairs.append((item, candidates.pop(0)))
+        else:
+            f_left.append(item)
+    paired = {p for _, p in pairs}
+    return pairs, f_left, [item for item in p_items if item not in paired]
+
+
+def diff_calltrees(failing: Dict[str, dict], failing_root: str,
+                   passing: Dict[str, dict], passing_root: str,
+                   ignore_values: bool = False) -> CalltreeDiff:
+    """Align both trees top-down and collect the divergent regions of the failing tree."""
+    fail_hashes = subtree_hashes(failing, failing_root, ignore_values=ignore_values)
+    pass_hashes = subtree_hashes(passing, passing_root, ignore_values=ignore_values)
+    diff = CalltreeDiff()
+
+    if failing[failing_root]["name"] != passing[passing_root]["name"]:
+        diff.added.append(failing_root)
+        return diff
+
+    # Explicit stack instead of recursion, call trees can be very deep
+    stack = [(failing_root, passing_root)]
+    while stack:
+        f_id, p_id = stack.pop()
+        if fail_hashes[f_id] == pass_hashes[p_id]:
+            diff.identical += 1
+            continue
+        f_node, p_node = failing[f_id], passing[p_id]
+        if _node_differs(f_node, p_node, ignore_values):
+            diff.changed.append(f_id)
+
+        f_children, p_children = f_node["children"], p_node["children"]
+        # Children are matched as multisets, so the result does not depend on the order
+        # the triple store returned them in: equal subtree hashes first, then method names
+        same, f_rest, p_rest = _pair_by(f_children, p_children,
+                                        lambda c: fail_hashes[c], lambda c: pass_hashes[c])
+        diff.identical += len(same)
+        pairs, f_left, p_left = _pair_by(f_rest, p_rest,
+                                         lambda c: failing[c]["name"], lambda c: passing[c]["name"])
+        stack.extend(pairs)
+        diff.added.extend(f_left)
+        diff.missing.extend((f_id, c) for c in p_left)
+    return diff
+
+
+def divergent_keep_set(failing: Dict[str, dict], failing_root: str, diff: CalltreeDiff,
+                       context_depth: int = 2) -> Set[str]:
+    """Divergent invocations, up to context_depth levels of their subtrees, and all ancestors."""
+    keep = set(diff.divergent)
+    for start in diff.added:
+        for method_id, depth in iter_preorder(failing, start):
+            if depth > context_depth:
+                continue
+            keep.add(method_id)
+    return ancestors_closure(failing, keep | {failing_root})
+
+
+def diff_xml(failing_graph: str, passing_graph: str, context_depth: int = 2, ignore_values: bool = False) -> str:
+    """Return the failing call tree XML reduced to the regions that differ from the passing run."""
+    failing, failing_root = load_calltree(failing_graph)
+    passing, passing_root = load_calltree(passing_graph)
+    diff = diff_calltrees(failing, failing_root, passing, passing_root, ignore_values=ignore_values)
+    keep = divergent_keep_set(failing, failing_root, diff, context_depth=context_depth)
+    logger.info(
+        "Calltree diff: %d added, %d changed, %d missing, kept %d of %d invocations",
+        len(diff.added), len(diff.changed), len(diff.missing), len(keep), len(failing),
+    )
+    return pruned_to_xml(failing, failing_root, keep)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Diff a failing call tree against a passing one.")
+    parser.add_argument("failing_graph", help="Graph URI of the failing run.")
+    parser.add_argument("passing_graph", help="Graph URI of the passing run.")
+    parser.add_argument("--context-depth", type=int, default=2,
+                        help="Levels kept below each added subtree root (default: 2).")
+    parser.add_argument("--ignore-values", action="store_true",
+                        help="Treat subtrees with equal names and types but different values as identical.")
+    args = parser.parse_args()
+
+    print(diff_xml(args.failing_graph, args.passing_graph,
+                   context_depth=args.context_depth, ignore_values=args.ignore_values))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,27 +1,12 @@
 
-import json
 import os
 from typing import Dict, List
 
+from outputs_catalog import get_catalog
+
 repos:list = ["jackrabbit-oak", "wicket", "camel", "commons-math", "logging-log4j2", "flink", "accumulo","maven"]
 OUTPUTS_DIR = "outputs"
 
-def iter_output_branch_dirs(outputs_root: str):
-    """Yield (repo, branch_dir, branch_path) for each branch directory under outputs_root/<repo>/*.
-
-    Skips non-directories.
-    """
-    if not os.path.isdir(outputs_root):
-        return
-    for repo in os.listdir(outputs_root):
-        repo_path = os.path.join(outputs_root, repo)
-        if not os.path.isdir(repo_path):
-            continue
-        for branch_dir in os.listdir(repo_path):
-            branch_path = os.path.join(repo_path, branch_dir)
-            if os.path.isdir(branch_path):
-                yield repo, branch_dir, branch_path
-
 def transform_patched_list_to_classes(patched_list: List[str]) -> List[str]:
     """Transform fully-qualified class names to simple class names.
 
@@ -44,16 +29,11 @@ def check_test_patch_equi():
   written = 0
   skipped = 0
 
-  for repo, branch_dir, branch_path in iter_output_branch_dirs(OUTPUTS_DIR):
-      if repos and repo not in repos:
-          continue
-      analysis_path =  os.path.join(branch_path, "analysis.json")
-      if not os.path.isfile(analysis_path):
+  for repo, branch_dir, branch_path, analysis_data in get_catalog(OUTPUTS_DIR).analyses(repos or None):
+      if analysis_data is None:
         print("Skipping missing analysis for %s/%s" % (repo, branch_dir))
         skipped += 1
         continue
-      with open(analysis_path, "r") as f:
-          analysis_data = json.load(f)
       if not analysis_data:
           print("Skipping empty analysis for %s/%s" % (repo, branch_dir))
           skipped += 1
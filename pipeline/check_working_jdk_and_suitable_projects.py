@@ -1,11 +1,10 @@
 # Check for each entry in data/working-examples-jdk6.txt if the project (line) can be found in outputs/ and if it has at least one branch with analysis.json containing suitable_tests with at least one entry.
-import os
-import json
-from typing import List
-from helper import iter_output_branch_dirs, send_to_chat_api, TEST_METHOD_SCHEMA, TEST_METHOD_SCHEMA_V2, validate_json
+from typing import Dict, List, Optional, Tuple
+from outputs_catalog import get_catalog
 WORKING_EXAMPLES_FILE = "data/working-examples-jdk6.txt"
 
-def check_working_jdk_and_suitable_projects():
+def check_working_jdk_and_suitable_projects(analyses: Optional[Dict[Tuple[str, str], dict]] = None):
+  """analyses maps (project_name, branch_dir) to analysis.json contents; defaults to the outputs catalog."""
   working_projects_with_suitable_tests: List[str] = []
   working_projects_without_suitable_tests: List[str] = []
   missing_projects: List[str] = []
@@ -13,27 +12,16 @@ def check_working_jdk_and_suitable_projects():
   with open(WORKING_EXAMPLES_FILE, "r") as f:
     working_projects = [line.strip() for line in f if line.strip()]
 
-  output_root = "outputs"
+  if analyses is None:
+    analyses = {(repo, branch): analysis or {} for repo, branch, _, analysis in get_catalog("outputs").analyses()}
 
   for project in working_projects:
-    project_found = False
-    has_suitable_tests = False
-
     project_name = findProjectName(project)
 
-    project_path = os.path.join(output_root, f"{project_name}/{project}")
-    if os.path.isdir(project_path):
-      project_found = True
-      for _, _, branch_path in iter_output_branch_dirs(output_root):
-        if os.path.commonpath([branch_path, project_path]) != project_path:
-          continue
-        analysis_path = os.path.join(branch_path, "analysis.json")
-        if os.path.isfile(analysis_path):
-          with open(analysis_path, "r") as f:
-            analysis_data = json.load(f)
-          if analysis_data.get("suitable_tests"):
-            has_suitable_tests = True
-            break
+    # The project is the branch directory outputs/<project_name>/<project>
+    project_found = (project_name, project) in analyses
+    analysis_data = analyses.get((project_name, project))
+    has_suitable_tests = bool(analysis_data and analysis_data.get("suitable_tests"))
 
     if not project_found:
       missing_projects.append(project)
@@ -1,9 +1,31 @@
-from helper import iter_output_branch_dirs, transform_patched_list_to_classes
-import os
-import json
+from analysis_store import update_analysis
+from helper import transform_patched_list_to_classes
+from outputs_catalog import get_catalog
 
 OUTPUTS_DIR = "outputs"
 
+def non_equi_tests(analysis_data):
+    """Simple names of the failing test classes whose name does not contain a patched class name."""
+    patched_list = analysis_data.get("patched", [])
+    test_list = analysis_data.get("test", [])
+
+    patched_class_list = transform_patched_list_to_classes(patched_list)
+    test_class_list = transform_patched_list_to_classes(test_list)
+
+    suitable_tests = []
+
+    for test_class in test_class_list:
+        test_class_lower = str(test_class).lower()
+        equi_found = False
+        for patched_class in patched_class_list:
+            patched_class_lower = str(patched_class).lower()
+            if patched_class_lower in test_class_lower:
+                equi_found = True
+                break
+        if not equi_found:
+            suitable_tests.append(test_class)
+    return suitable_tests
+
 def enrich_analysis_with_non_equi_tests():
     """Enrich analysis.json files with non-equivalent test and patch information."""
 
@@ -11,15 +33,12 @@ def enrich_analysis_with_non_equi_tests():
     enriched = 0
     count = 0
 
-    for repo, branch_dir, branch_path in iter_output_branch_dirs(OUTPUTS_DIR):
+    for repo, branch_dir, branch_path, analysis_data in get_catalog(OUTPUTS_DIR).analyses():
         count += 1
-        analysis_path = os.path.join(branch_path, "analysis.json")
-        if not os.path.isfile(analysis_path):
+        if analysis_data is None:
             print("Skipping missing analysis for %s/%s" % (repo, branch_dir))
             skipped += 1
             continue
-        with open(analysis_path, "r") as f:
-            analysis_data = json.load(f)
         if not analysis_data:
             print("Skipping empty analysis for %s/%s" % (repo, branch_dir))
             skipped += 1
@@ -29,29 +48,10 @@ def enrich_analysis_with_non_equi_tests():
             enriched += 1
             continue
 
-        patched_list = analysis_data.get("patched", [])
-        test_list = analysis_data.get("test", [])
-
-        patched_class_list = transform_patched_list_to_classes(patched_list)
-        test_class_list = transform_patched_list_to_classes(test_list)
-
-        suitable_tests = []
-
-        for test_class in test_class_list:
-            test_class_lower = str(test_class).lower()
-            equi_found = False
-            for patched_class in patched_class_list:
-                patched_class_lower = str(patched_class).lower()
-                if patched_class_lower in test_class_lower:
-                    equi_found = True
-                    break
-            if not equi_found:
-                suitable_tests.append(test_class)
+        suitable_tests = non_equi_tests(analysis_data)
 
         if len(suitable_tests) > 0:
-            analysis_data["suitable_tests"] = suitable_tests
-            with open(analysis_path, "w", encoding="utf-8") as f:
-                json.dump(analysis_data, f, indent=2)
+            update_analysis(branch_path, {"suitable_tests": suitable_tests}, owner="enrich_analysis_with_non_equi_tests")
             print("Enriched analysis for %s/%s with %d non-equivalent tests" % (repo, branch_dir, len(suitable_tests)))
             enriched += 1
         else:
@@ -62,13 +62,10 @@ def enrich_analysis_with_non_equi_tests():
 
 def remove_all_suitable_tests_from_analyses():
     """Remove suitable_tests field from all analysis.json files."""
-    for repo, branch_dir, branch_path in iter_output_branch_dirs(OUTPUTS_DIR):
-        analysis_path = os.path.join(branch_path, "analysis.json")
-        if not os.path.isfile(analysis_path):
+    for repo, branch_dir, branch_path, analysis_data in get_catalog(OUTPUTS_DIR).analyses():
+        if analysis_data is None:
             print("Skipping missing analysis for %s/%s" % (repo, branch_dir))
             continue
-        with open(analysis_path, "r") as f:
-            analysis_data = json.load(f)
         if not analysis_data:
             print("Skipping empty analysis for %s/%s" % (repo, branch_dir))
             continue
@@ -76,9 +73,7 @@ def remove_all_suitable_tests_from_analyses():
             print("No suitable_tests to remove for %s/%s" % (repo, branch_dir))
             continue
 
-        analysis_data.pop("suitable_tests", None)
-        with open(analysis_path, "w", encoding="utf-8") as f:
-            json.dump(analysis_data, f, indent=2)
+        update_analysis(branch_path, remove=["suitable_tests"], owner="enrich_analysis_with_non_equi_tests")
         print("Removed suitable_tests from analysis for %s/%s" % (repo, branch_dir))
 
 if __name__ == "__main__":
@@ -3,9 +3,14 @@ import logging
 import os
 import requests
 import json
+from typing import Iterable, Optional
 
 import tiktoken
 from build_hierarchy import get_hierarchy_xml_string
+from bm25_index import relevance_filtered_xml
+from calltree_agent import OpenRouterChat, SparqlCalltreeSource, run_agent
+from calltree_diff import diff_xml
+from sbfl_rank import rank_graph, top_k_xml
 
 logger = logging.getLogger(__name__)
 
@@ -40,13 +45,58 @@ def select_model(token_count: int) -> str:
     )
 
 
-def evaluate_calltree(graph_uri: str) -> str:
+def load_calltree_xml(graph_uri: str, top_k: Optional[int] = None, passing_graphs: Iterable[str] = (),
+                      diff_against: Optional[str] = None, failure_log: Optional[str] = None,
+                      relevance_top: int = 50) -> str:
+    """Return the calltree XML for the prompt.
+
+    With diff_against, only the regions where the failing run diverges from the given
+    passing run are kept (see calltree_diff.py). With top_k, only the invocations of the
+    k most suspicious methods (spectrum-based ranking, see sbfl_rank.py) are kept,
+    together with their ancestors and direct children. With failure_log (path to the
+    branch's test-results.txt), only the relevance_top invocations that best match the
+    failure text (BM25, see bm25_index.py) are kept, with the same context. The three
+    filters are mutually exclusive; ValueError is raised when more than one is given
+    or when top_k is below 1.
+    """
+    selected = [name for name, value in (("top_k", top_k), ("diff_against", diff_against),
+                                         ("failure_log", failure_log)) if value]
+    if len(selected) > 1:
+        raise ValueError(f"Only one call tree filter can be used at a time, got {', '.join(selected)}")
+    if diff_against:
+        return diff_xml(graph_uri, diff_against)
+    if failure_log:
+        with open(failure_log, "r", encoding="utf-8", errors="replace") as f:
+            return relevance_filtered_xml(graph_uri, f.read(), top_n=relevance_top)
+    if top_k is None:
+        return get_hierarchy_xml_string(graph_uri=graph_uri)
+    if top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
+    methods, root_id, ranking = rank_graph(graph_uri, passing_graphs)
+    logger.info("SBFL pre-ranking kept top %d of %d distinct methods", min(top_k, len(ranking)), len(ranking))
+    return top_k_xml(methods, root_id, ranking, top_k)
+
+
+def evaluate_calltree_agentic(graph_uri: str, model: str = _MODEL_TIERS[0][1], max_steps: int = 30) -> str:
+    """Tool-calling mode: the model explores the tree lazily instead of receiving the full XML."""
+    source = SparqlCalltreeSource(graph_uri)
+    content = run_agent(source, OpenRouterChat(model=model), max_steps=max_steps)
+    logger.info("Agent fetched %d invocations with %d SPARQL queries", len(source.fetched), source.queries)
+    logger.info("Response: %s", content)
+    return content
+
+
+def evaluate_calltree(graph_uri: str, top_k: Optional[int] = None, passing_graphs: Iterable[str] = (),
+                      diff_against: Optional[str] = None, failure_log: Optional[str] = None,
+                      relevance_top: int = 50) -> str:
     # Load prompt template
     with open("prompts/evaluation_prompt.txt", "r", encoding="utf-8") as f:
         prompt_template = f.read()
 
     # Load calltree as XML
-    calltree_xml = get_hierarchy_xml_string(graph_uri=graph_uri)
+    calltree_xml = load_calltree_xml(graph_uri, top_k=top_k, passing_graphs=passing_graphs,
+                                     diff_against=diff_against, failure_log=failure_log,
+                                     relevance_top=relevance_top)
 
     # Build prompt
     prompt = prompt_template.replace("{calltree_xml}", calltree_xml)
@@ -98,6 +148,13 @@ def evaluate_calltree(graph_uri: str) -> str:
     return content
 
 
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Evaluate a calltree graph by URI."
@@ -106,9 +163,59 @@ def main() -> None:
         "graph_uri",
         help="Named graph URI of the calltree in the Virtuoso SPARQL store.",
     )
+    filters = parser.add_mutually_exclusive_group()
+    filters.add_argument(
+        "--top-k",
+        type=_positive_int,
+        help="Only send the k most suspicious methods (spectrum-based pre-ranking) with their context.",
+    )
+    parser.add_argument(
+        "--passing",
+        nargs="*",
+        default=[],
+        help="Graph URIs of passing runs of the same branch, used by the pre-ranking.",
+    )
+    filters.add_argument(
+        "--diff-against",
+        help="Graph URI of a passing run; only the regions where the failing run diverges are sent.",
+    )
+    filters.add_argument(
+        "--failure-log",
+        help="Path to the branch's test-results.txt; only invocations relevant to the failure (BM25) are sent.",
+    )
+    parser.add_argument(
+        "--relevance-top",
+        type=_positive_int,
+        help="Number of invocations kept by the --failure-log relevance filter (default: 50).",
+    )
+    parser.add_argument(
+        "--agent",
+        action="store_true",
+        help="Tool-calling mode: the model navigates the tree lazily starting from the root and exceptions.",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=30,
+        help="Maximum number of model turns in --agent mode (default: 30).",
+    )
     args = parser.parse_args()
 
-    evaluate_calltree(args.graph_uri)
+    # The agent explores the tree itself, the prompt filters do not apply to it
+    ignored = [option for option, value in (("--top-k", args.top_k), ("--passing", args.passing),
+                                            ("--diff-against", args.diff_against),
+                                            ("--failure-log", args.failure_log),
+                                            ("--relevance-top", args.relevance_top)) if value]
+    if args.agent and ignored:
+        parser.error(f"--agent cannot be combined with {', '.join(ignored)}")
+
+    if args.agent:
+        evaluate_calltree_agentic(args.graph_uri, max_steps=args.max_steps)
+        return
+
+    evaluate_calltree(args.graph_uri, top_k=args.top_k, passing_graphs=args.passing,
+                      diff_against=args.diff_against, failure_log=args.failure_log,
+                      relevance_top=args.relevance_top or 50)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,26 @@
-from helper import iter_output_branch_dirs
+from analysis_store import update_analysis
+from outputs_catalog import get_catalog
 import os
-import json
 import re
-from typing import Any, Dict
+from typing import Optional
+
+def source_package_from_log(branch_dir: str, test_result_file: str) -> Optional[str]:
+    """Maven module of the failing build from '[ERROR] Please refer to .../<module>/target/', or None.
+
+    Returns "" when the failure is in the root module.
+    """
+    branch_clean = branch_dir
+    if branch_clean.startswith("bugs-dot-jar_"):
+        branch_clean = branch_clean[len("bugs-dot-jar_"):]
+    with open(test_result_file, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            if line.startswith("[ERROR] Please refer to"):
+                pattern = rf"{re.escape(branch_clean)}[^/]*/(?:(.+)/)?target/"
+                match = re.search(pattern, line)
+                if match:
+                    return match.group(1) or ""
+                break
+    return None
 
 def step_enrich_packages(outputs_dir: str = "outputs") -> None:
     """Step 4: infer and attach 'sourcePackage' to each analysis.json where possible.
@@ -13,40 +31,25 @@ def step_enrich_packages(outputs_dir: str = "outputs") -> None:
     updated = 0
     skipped = 0
     skipped_list = []
-    for repo, branch_dir, branch_path in iter_output_branch_dirs(outputs_dir):
+    catalog = get_catalog(outputs_dir)
+    for repo, branch_dir, branch_path, analysis_data in catalog.analyses():
         test_result_file = os.path.join(branch_path, "test-results.txt")
-        if not os.path.isfile(test_result_file):
+        if not catalog.has_artifact(repo, branch_dir, "test-results.txt"):
             skipped += 1
             skipped_list.append(branch_path)
             continue
-        branch_clean = branch_dir
-        if branch_clean.startswith("bugs-dot-jar_"):
-            branch_clean = branch_clean[len("bugs-dot-jar_"):]
-        found_pkg = None
         try:
-            with open(test_result_file, "r", encoding="utf-8", errors="ignore") as f:
-                for line in f:
-                    if line.startswith("[ERROR] Please refer to"):
-                        pattern = rf"{re.escape(branch_clean)}[^/]*/(?:(.+)/)?target/"
-                        match = re.search(pattern, line)
-                        if match:
-                            found_pkg = match.group(1) or ""
-                        break
+            found_pkg = source_package_from_log(branch_dir, test_result_file)
         except Exception:
             continue
         if found_pkg is None:
             continue
-        analysis_file = os.path.join(branch_path, "analysis.json")
-        if not os.path.isfile(analysis_file):
+        if analysis_data is None:
             skipped += 1
             skipped_list.append(branch_path)
             continue
-        with open(analysis_file, "r", encoding="utf-8") as f:
-            analysis_data: Dict[str, Any] = json.load(f)
         if "sourcePackage" not in analysis_data:
-            analysis_data["sourcePackage"] = found_pkg
-            with open(analysis_file, "w", encoding="utf-8") as f:
-                json.dump(analysis_data, f, indent=2)
+            update_analysis(branch_path, {"sourcePackage": found_pkg}, owner="extract_source_package")
             updated += 1
         elif "sourcePackage" in analysis_data:
             updated += 1
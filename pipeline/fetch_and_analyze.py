@@ -1,8 +1,13 @@
-import base64
-import requests
+import argparse
 import os
-from typing import Dict, List
+from typing import List, Optional, Union
+from analysis_store import update_analysis, write_text_atomic
+from git_mirror import GitMirrorSource
+from github_client import GitHubClient
 from helper import send_to_chat_api, ANALYSIS_V1_SCHEMA, validate_json
+from log_reducer import reduce_for_prompt
+from patch_parser import analyze_patch, checkout_reader
+from surefire_parser import parse_failing_tests
 
 import json
 import logging
@@ -17,16 +22,27 @@ logging.basicConfig(
 logger: Logger = logging.getLogger("fetch_and_analyze")
 
 repos:list = ["jackrabbit-oak", "wicket", "camel", "commons-math", "logging-log4j2", "flink", "accumulo","maven"]
-GITHUB_API = "https://api.github.com"
 _github_pat = os.getenv("GITHUB_PAT", "")
-gh_headers: Dict[str, str] = {
-  "Authorization": f"Bearer {_github_pat}",
-  "Accept": "application/vnd.github+json",
-  "User-Agent": "bugs-dot-jar-script",
-}
+ARTIFACT_SOURCE = os.getenv("ARTIFACT_SOURCE", "github")  # "github" or "mirror"
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "llm")  # "llm", "local" or "auto" (local, LLM only if that finds nothing)
+SCRIPTS_DIR = "scripts"  # checked-out bug branches (Steps 3 and 4)
+_source: Optional[Union[GitHubClient, GitMirrorSource]] = None
 
 BUGS_DOT_JAR = "bugs-dot-jar"
 
+
+def get_source() -> Union[GitHubClient, GitMirrorSource]:
+  """Process-wide artifact source: the GitHub API or the local git mirrors (ARTIFACT_SOURCE)."""
+  global _source
+  if _source is None:
+    if ARTIFACT_SOURCE == "mirror":
+      _source = GitMirrorSource()
+    elif ARTIFACT_SOURCE == "github":
+      _source = GitHubClient(_github_pat)
+    else:
+      raise ValueError(f"Unknown ARTIFACT_SOURCE {ARTIFACT_SOURCE!r} (expected 'github' or 'mirror')")
+  return _source
+
 def build_prompt(patch:bytes, test:bytes) -> str:
   with open("prompts/analysis_prompt.txt", "r") as f:
     base_prompt = f.read()
@@ -36,9 +52,11 @@ def build_prompt(patch:bytes, test:bytes) -> str:
   p = p.replace("{test_log}", test.strip())
   return p
 
-def process_branch(repo:str, branch:str, output_dir:str):
-  logger.info("Process branch: %s of repo: %s", branch, repo)
+def download_artifacts(repo:str, branch:str, output_dir:str):
+  """Fetch developer-patch.diff and test-results.txt of a branch unless both are on disk.
 
+  Returns (patch_text, test_text), or None if neither file exists on the branch.
+  """
   branch_dir = os.path.join(output_dir, branch.replace("/", "__"))
   patch_path = os.path.join(branch_dir, "developer-patch.diff")
   test_path = os.path.join(branch_dir, "test-results.txt")
@@ -54,7 +72,7 @@ def process_branch(repo:str, branch:str, output_dir:str):
     # If neither file was found, nothing to do for this branch
     if not (patch_exists or test_exists):
       logger.debug("No patch or test found for %s@%s", repo, branch)
-      return False
+      return None
 
     # Ensure output directory exists when we will write files
     os.makedirs(branch_dir, exist_ok=True)
@@ -63,12 +81,10 @@ def process_branch(repo:str, branch:str, output_dir:str):
     test_text = test.decode("utf-8", errors="replace") if test else None
 
     if patch_text:
-      with open(os.path.join(branch_dir, "developer-patch.diff"), "w", encoding="utf-8") as f:
-        f.write(patch_text)
+      write_text_atomic(patch_path, patch_text)
       logger.debug("Wrote patch to %s", patch_path)
     if test_text:
-      with open(os.path.join(branch_dir, "test-results.txt"), "w", encoding="utf-8") as f:
-        f.write(test_text)
+      write_text_atomic(test_path, test_text)
       logger.debug("Wrote test results to %s", test_path)
   
   else:
@@ -77,12 +93,70 @@ def process_branch(repo:str, branch:str, output_dir:str):
     with open(test_path, "rb") as f:
       test_text = f.read().decode("utf-8", errors="replace") if os.path.isfile(test_path) else None
     logger.debug("Loaded existing files for branch %s: patch=%s test=%s", branch, bool(patch_text), bool(test_text))
+  return patch_text, test_text
+
+
+def source_reader(repo:str, branch:str, remote:bool=True):
+  """Reader of the buggy sources of a branch: its checkout in scripts/ if present, else the artifact source.
+
+  With remote=False, None is returned instead of falling back to the artifact source.
+  """
+  checkout = os.path.join(SCRIPTS_DIR, branch.replace("/", "__"))
+  if os.path.isdir(checkout) and os.listdir(checkout):
+    return checkout_reader(checkout)
+  if not remote:
+    return None
+
+  def read(path:str):
+    try:
+      content = get_source().read_file(repo, branch, path)
+    except (RuntimeError, FileNotFoundError) as e:
+      logger.debug("No source %s for %s@%s: %s", path, repo, branch, e)
+      return None
+    return content.decode("utf-8", errors="replace") if content is not None else None
+  return read
+
+
+def local_analysis(repo:str, branch:str, patch_text:Optional[str], test_text:Optional[str], remote:bool=True) -> dict:
+  """patched/test and the patched methods, derived without the LLM (see patch_parser.py, surefire_parser.py).
+
+  With remote=False the sources are only read from a local checkout; without one the
+  patched methods are derived from the diff hunks alone.
+  """
+  result = analyze_patch(patch_text or "", source_reader(repo, branch, remote=remote))
+  failing = parse_failing_tests(test_text.splitlines()) if test_text else []
+  result["test"] = list(dict.fromkeys(cls.split("$", 1)[0] for cls, _ in failing))
+  return result
 
-  if os.path.isfile(os.path.join(branch_dir, "analysis.json")):
+
+def process_branch(repo:str, branch:str, output_dir:str, force:bool=False):
+  logger.info("Process branch: %s of repo: %s", branch, repo)
+
+  branch_dir = os.path.join(output_dir, branch.replace("/", "__"))
+  artifacts = download_artifacts(repo, branch, output_dir)
+  if artifacts is None:
+    return False
+  patch_text, test_text = artifacts
+
+  if not force and os.path.isfile(os.path.join(branch_dir, "analysis.json")):
     logger.info("Analysis already exists for %s on branch %s, skipping", repo, branch)
     return True
+
+  # In llm mode the local result only adds the patched method details; reading the buggy
+  # sources one file at a time through the GitHub contents API is not worth it there
+  remote = ANALYSIS_MODE in ("local", "auto") or ARTIFACT_SOURCE == "mirror"
+  local = local_analysis(repo, branch, patch_text, test_text, remote=remote)
+  details = {key: local[key] for key in ("patched_methods", "patched_constructors", "patched_definitions")}
+  if ANALYSIS_MODE in ("local", "auto"):
+    if local["patched"] and local["test"]:
+      update_analysis(branch_dir, {"patched": local["patched"], "test": local["test"], **details}, owner="fetch_and_analyze")
+      logger.info("Wrote local analysis for %s@%s", repo, branch)
+      return True
+    if ANALYSIS_MODE == "local":
+      logger.warning("Local analysis of %s@%s found patched=%d test=%d, skipping", repo, branch, len(local["patched"]), len(local["test"]))
+      return False
   
-  prompt = build_prompt(patch_text, test_text)
+  prompt = build_prompt(patch_text, reduce_for_prompt(test_text, f"{repo}@{branch}"))
   
   logger.debug("Sending prompt to analysis API for %s@%s (prompt length=%d)", repo, branch, len(prompt))
   try:
@@ -96,8 +170,7 @@ def process_branch(repo:str, branch:str, output_dir:str):
   
   if isValid and isinstance(answer, dict):
     out_path = os.path.join(branch_dir, "analysis.json")
-    with open(out_path, "w") as f:
-      json.dump(answer, f, indent=2, ensure_ascii=False)
+    update_analysis(branch_dir, {**answer, **details}, owner="fetch_and_analyze")
     logger.info("Wrote analysis for %s@%s to %s", repo, branch, out_path)
   else:
      return False
@@ -107,60 +180,15 @@ def process_branch(repo:str, branch:str, output_dir:str):
 
 
 def fetch_repo_files(repo:str, branch, target:str):
-  url = f"{GITHUB_API}/repos/{BUGS_DOT_JAR}/{repo}/contents/.{BUGS_DOT_JAR}/{target}" #.bugs-dot-jar/developer-patch.diff
-  logger.debug("Fetching repo file %s for %s@%s", target, repo, branch)
-  resp = requests.get(url, headers=gh_headers, params={"ref": branch}, timeout=30)
-  if resp.status_code != 200:
-      if resp.status_code == 401:
-          raise PermissionError("Unauthorized access to GitHub API")
-      else:
-        logger.error("GitHub API error fetching %s: %s %s", url, resp.status_code, resp.text)
-        raise RuntimeError(
-          f"GitHub API error fetching file: {resp.status_code} {resp.text}"
-      )
-  data = resp.json()
-  if isinstance(data, list):
-    return None
-  content_b64 = data.get("content")
-  if not isinstance(content_b64, str):
-    return None
-  content_b64 = content_b64.replace("\n", "")
-  try:
-    return base64.b64decode(content_b64)
-  except Exception:
-    return None
+  return get_source().fetch_file(repo, branch, target) #.bugs-dot-jar/developer-patch.diff
 
 
 def list_all_branches(owner:str, repo:str) -> List[str]:
-    """Return a list of all branch names for the given repo, with pagination.
+    """Return a list of all branch names for the given repo (see github_client.py / git_mirror.py).
 
     Raises RuntimeError on non-200 responses.
     """
-    logger.info("Listing all branches for repo %s/%s", owner, repo)
-    branches: List[str] = []
-    page = 1
-    per_page = 100
-    while True:
-        url = f"{GITHUB_API}/repos/{BUGS_DOT_JAR}/{repo}/branches"
-        resp = requests.get(url, headers=gh_headers, params={"per_page": per_page, "page": page}, timeout=30)
-        if resp.status_code != 200:
-            if resp.status_code == 401:
-               raise PermissionError("Unauthorized access to GitHub API")
-            else:
-              logger.error("GitHub API error listing branches for %s: %s %s", repo, resp.status_code, resp.text)
-              raise RuntimeError(f"GitHub API error listing branches: {resp.status_code} {resp.text}")
-        data = resp.json()
-        if not data:
-            break
-        for b in data:
-            name = b.get("name")
-            if isinstance(name, str):
-                branches.append(name)
-        if len(data) < per_page:
-            break
-        page += 1
-    logger.info("Total branches found for %s: %d", repo, len(branches))
-    return branches
+    return get_source().list_branches(repo)
 
 def fetch_and_analyze():
 
@@ -195,10 +223,16 @@ def fetch_and_analyze():
         # Branches should only contain items that start with "bugs-dot-jar"
         branches = [b for b in branches if b.startswith("bugs-dot-jar")]
 
+        # Download the artifacts of all branches up front (concurrently for the GitHub API); the LLM calls below stay sequential
+        downloads = get_source().map(lambda b: download_artifacts(repo, b, repo_output_dir), branches)
+
         for branch in branches:
             count += 1
             try:
-                did = process_branch(repo, branch, repo_output_dir)
+                if isinstance(downloads[branch], Exception):
+                    raise downloads[branch]
+                # Branches without any artifact are not fetched a second time
+                did = downloads[branch] is not None and process_branch(repo, branch, repo_output_dir)
                 if did:
                     repo_processed += 1
                 else:
@@ -223,6 +257,15 @@ def fetch_and_analyze():
     logger.info("All repos done. processed=%d skipped=%d total=%d", processed, skipped, overall_total)
     logger.info("Skipped branches so far: %s", skippedList)
     logger.info(f"Total branches processed: {count}")
+    logger.info("Artifact source (%s): %s", ARTIFACT_SOURCE, get_source().stats)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Step 1: fetch the bugs-dot-jar artifacts and analyze them with the LLM.")
+    parser.add_argument("--source", choices=["github", "mirror"], default=ARTIFACT_SOURCE,
+                        help=f"Read artifacts via the GitHub API or from local git mirrors (default: {ARTIFACT_SOURCE}).")
+    parser.add_argument("--mode", choices=["llm", "local", "auto"], default=ANALYSIS_MODE,
+                        help=f"Analyze with the LLM, locally from the patch and log, or locally with LLM fallback (default: {ANALYSIS_MODE}).")
+    args = parser.parse_args()
+    ARTIFACT_SOURCE = args.source
+    ANALYSIS_MODE = args.mode
     fetch_and_analyze()
\ No newline at end of file
@@ -1,13 +1,75 @@
 # Script to find the failing test method for each existing suitable test class
+# (parsed from the Surefire log; the LLM is only asked for classes the log does not name)
 
 import logging
 import os
 import json
-from helper import iter_output_branch_dirs, send_to_chat_api, TEST_METHOD_SCHEMA, TEST_METHOD_SCHEMA_V2, validate_json
+from analysis_store import update_analysis
+from helper import send_to_chat_api, TEST_METHOD_SCHEMA, TEST_METHOD_SCHEMA_V2, validate_json
+from log_reducer import reduce_for_prompt
+from outputs_catalog import get_catalog
+from surefire_parser import failing_methods, parse_failing_tests_file
 
 logger = logging.getLogger(__name__)
 
 TEST_RESULTS_FILENAME = "test-results.txt"
+TEST_METHOD_PROMPT_FILE = os.path.join("prompts", "test_method_prompt.txt")
+
+
+def find_test_methods(repo, branch_dir, branch_path, suitable_tests, prompt_template):
+    """Failing test methods of the suitable test classes of one branch.
+
+    The methods are parsed from the Surefire log; only test classes the log does not
+    name are sent to the LLM, in one batched prompt. Returns the failingTest cases
+    (schema V1 shape; V2 answers are converted).
+    """
+    test_results_path = os.path.join(branch_path, TEST_RESULTS_FILENAME)
+    failing = parse_failing_tests_file(test_results_path)
+
+    cases, unresolved = [], []
+    for test_class in suitable_tests:
+        methods = failing_methods(failing, test_class)
+        if not methods:
+            unresolved.append(test_class)
+            continue
+        cases.extend({"failingTest": {"failingTestClass": test_class, "failingTestMethod": method}}
+                     for method in methods)
+
+    if unresolved:
+        logger.info("Asking the LLM for %d of %d test classes of %s/%s", len(unresolved), len(suitable_tests), repo, branch_dir)
+        with open(test_results_path, "r") as f:
+            test_results = reduce_for_prompt(f.read(), f"{repo}/{branch_dir}")
+        cases.extend(ask_test_methods(repo, branch_dir, unresolved, test_results, prompt_template))
+    return cases
+
+
+def ask_test_methods(repo, branch_dir, test_classes, test_results, prompt_template):
+    """One LLM call for the failing test methods of several test classes."""
+    prompt = prompt_template.replace("{testClasses}", "\n".join(test_classes)).replace("{testLog}", test_results)
+
+    try:
+        response = send_to_chat_api(prompt)
+        response_json = json.loads(response)
+    except Exception as e:
+        logger.warning("Failed to get valid response for %s/%s test classes %s: %s", repo, branch_dir, test_classes, e)
+        return []
+
+    is_valid = validate_json(response_json, TEST_METHOD_SCHEMA)
+    if is_valid:
+        return response_json["failingTests"]
+
+    logger.debug("Schema V1 invalid, trying schema V2 for %s/%s test classes %s", repo, branch_dir, test_classes)
+    is_valid_v2 = validate_json(response_json, TEST_METHOD_SCHEMA_V2)
+    if is_valid_v2:
+        v2_items = response_json.get("failingTests") or []
+        return [
+            {"failingTest": {
+                "failingTestClass": item["failingTestClass"],
+                "failingTestMethod": item["failingTestMethod"],
+            }}
+            for item in v2_items
+        ]
+    return []
 
 
 def find_method_for_suitable_testclasses():
@@ -16,17 +78,13 @@ def find_method_for_suitable_testclasses():
     enriched = 0
     enriched_list = []
 
-    for repo, branch_dir, branch_path in iter_output_branch_dirs("outputs"):
-        analysis_path = os.path.join(branch_path, "analysis.json")
-
-        if not os.path.isfile(analysis_path):
+    catalog = get_catalog("outputs")
+    for repo, branch_dir, branch_path, analysis_data in catalog.analyses():
+        if analysis_data is None:
             logger.debug("Skipping missing analysis for %s/%s", repo, branch_dir)
             skipped += 1
             continue
 
-        with open(analysis_path, "r") as f:
-            analysis_data = json.load(f)
-
         if not analysis_data or not analysis_data.get("suitable_tests"):
             logger.debug("Skipping analysis without suitable tests for %s/%s", repo, branch_dir)
             skipped += 1
@@ -37,59 +95,23 @@ def find_method_for_suitable_testclasses():
             continue
 
         suitable_tests = analysis_data.get("suitable_tests")
-        cases = []
-        is_skip_for_all = True
 
-        with open(os.path.join("prompts", "test_method_prompt.txt"), "r") as f:
+        with open(TEST_METHOD_PROMPT_FILE, "r") as f:
             prompt_template = f.read()
 
-        for test_class in suitable_tests:
-            test_results_path = os.path.join(branch_path, TEST_RESULTS_FILENAME)
-
-            if not os.path.isfile(test_results_path):
-                logger.warning("Missing test results for %s/%s", repo, branch_dir)
-                continue
-
-            with open(test_results_path, "r") as f:
-                test_results = f.read()
-
-            prompt = prompt_template.replace("{testClass}", test_class).replace("{testLog}", test_results)
-
-            try:
-                response = send_to_chat_api(prompt)
-                response_json = json.loads(response)
-            except Exception as e:
-                logger.warning("Failed to get valid response for %s/%s test class %s: %s", repo, branch_dir, test_class, e)
-                continue
-
-            is_valid = validate_json(response_json, TEST_METHOD_SCHEMA)
-            if is_valid:
-                cases.extend(response_json["failingTests"])
-                is_skip_for_all = False
-            else:
-                logger.debug("Schema V1 invalid, trying schema V2 for %s/%s test class %s", repo, branch_dir, test_class)
-                is_valid_v2 = validate_json(response_json, TEST_METHOD_SCHEMA_V2)
-                if is_valid_v2:
-                    v2_items = response_json.get("failingTests") or []
-                    converted = [
-                        {"failingTest": {
-                            "failingTestClass": item["failingTestClass"],
-                            "failingTestMethod": item["failingTestMethod"],
-                        }}
-                        for item in v2_items
-                    ]
-                    cases.extend(converted)
-                    is_skip_for_all = False
-
-        if is_skip_for_all:
+        if not catalog.has_artifact(repo, branch_dir, TEST_RESULTS_FILENAME):
+            logger.warning("Missing test results for %s/%s", repo, branch_dir)
+            cases = []
+        else:
+            cases = find_test_methods(repo, branch_dir, branch_path, suitable_tests, prompt_template)
+
+        if not cases:
             logger.warning("No test methods found for any suitable test class in %s/%s", repo, branch_dir)
             skipped += 1
             continue
 
         if cases:
-            analysis_data["suitable_test_methods"] = cases
-            with open(analysis_path, "w", encoding="utf-8") as f:
-                json.dump(analysis_data, f, indent=2)
+            update_analysis(branch_path, {"suitable_test_methods": cases}, owner="find_method_for_suitable_testclasses")
             enriched += 1
             enriched_list.append((repo, branch_dir, len(cases)))
             logger.info("Enriched %s/%s with %d suitable test methods", repo, branch_dir, len(cases))
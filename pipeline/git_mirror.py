@@ -0,0 +1,156 @@
+# Local git-mirror source for the bugs-dot-jar artifacts.
+#
+# Alternative to github_client.GitHubClient for Step 1: each bugs-dot-jar repository
+# is kept as a bare mirror under GIT_MIRRORS_DIR, branches are enumerated with
+# git for-each-ref, and .bugs-dot-jar/<file> blobs are read through one long-lived
+# `git cat-file --batch` process per repository, so a full refresh needs no HTTP
+# requests and is bounded by local disk speed.
+#
+#   python pipeline/git_mirror.py --update          # clone or fetch all mirrors
+#   python pipeline/fetch_and_analyze.py --source mirror
+
+import argparse
+import logging
+import os
+import subprocess
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MIRRORS_DIR = os.getenv("GIT_MIRRORS_DIR", ".cache/git-mirrors")
+ORGANIZATION = "bugs-dot-jar"
+REMOTE_URL = "https://github.com/{org}/{repo}.git"
+
+
+class CatFile:
+    """A `git cat-file --batch` process answering object requests for one repository."""
+
+    def __init__(self, git_dir: str):
+        self.git_dir = git_dir
+        self.lock = threading.Lock()
+        self.proc = subprocess.Popen(
+            ["git", "--git-dir", git_dir, "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def read(self, spec: str):
+        """(type, content) of an object spec such as 'refs/heads/x:path', or None if it is missing."""
+        with self.lock:
+            self.proc.stdin.write(spec.encode("utf-8") + b"\n")
+            self.proc.stdin.flush()
+            header = self.proc.stdout.readline().decode("utf-8").split()
+            if len(header) != 3:  # "<spec> missing" / "<spec> ambiguous"
+                return None
+            _, obj_type, size = header
+            content = self.proc.stdout.read(int(size))
+            self.proc.stdout.read(1)  # trailing newline
+        return obj_type, content
+
+    def close(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.stdin.close()
+            self.proc.wait()
+
+
+class GitMirrorSource:
+    """Reads branches and .bugs-dot-jar artifacts from local bare mirrors.
+
+    Offers the same fetch_file / list_branches / map interface as GitHubClient.
+    """
+
+    def __init__(self, mirrors_dir: str = MIRRORS_DIR):
+        self.mirrors_dir = mirrors_dir
+        self._readers: Dict[str, CatFile] = {}
+        self._lock = threading.Lock()
+        self.stats = {"blobs": 0, "missing": 0}
+
+    def git_dir(self, repo: str) -> str:
+        return os.path.join(self.mirrors_dir, f"{repo}.git")
+
+    def update(self, repo: str) -> None:
+        """Clone the mirror of a repository, or fetch it if it already exists."""
+        git_dir = self.git_dir(repo)
+        if os.path.isdir(git_dir):
+            logger.info("Fetching mirror %s", git_dir)
+            subprocess.run(["git", "--git-dir", git_dir, "remote", "update", "--prune"], check=True)
+        else:
+            os.makedirs(self.mirrors_dir, exist_ok=True)
+            url = REMOTE_URL.format(org=ORGANIZATION, repo=repo)
+            logger.info("Cloning %s into %s", url, git_dir)
+            subprocess.run(["git", "clone", "--mirror", url, git_dir], check=True)
+
+    def _reader(self, repo: str) -> CatFile:
+        with self._lock:
+            if repo not in self._readers:
+                git_dir = self.git_dir(repo)
+                if not os.path.isdir(git_dir):
+                    raise FileNotFoundError(f"No mirror for {repo} at {git_dir} (run git_mirror.py --update)")
+                self._readers[repo] = CatFile(git_dir)
+            return self._readers[repo]
+
+    def list_branches(self, repo: str) -> List[str]:
+        """All branch names of the mirror."""
+        git_dir = self.git_dir(repo)
+        if not os.path.isdir(git_dir):
+            raise FileNotFoundError(f"No mirror for {repo} at {git_dir} (run git_mirror.py --update)")
+        out = subprocess.run(
+            ["git", "--git-dir", git_dir, "for-each-ref", "--format=%(refname:lstrip=2)", "refs/heads/"],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        branches = out.split()
+        logger.info("Total branches found for %s: %d", repo, len(branches))
+        return branches
+
+    def fetch_file(self, repo: str, branch: str, target: str) -> Optional[bytes]:
+        """Content of .bugs-dot-jar/<target> on a branch, or None if it is not a file."""
+        return self.read_file(repo, branch, f".{ORGANIZATION}/{target}")
+
+    def read_file(self, repo: str, branch: str, path: str) -> Optional[bytes]:
+        """Content of any repository path on a branch, or None if it is not a file."""
+        obj = self._reader(repo).read(f"refs/heads/{branch}:{path}")
+        if obj is None or obj[0] != "blob":
+            self.stats["missing"] += 1
+            return None
+        self.stats["blobs"] += 1
+        return obj[1]
+
+    def map(self, fn: Callable, items: Iterable) -> Dict:
+        """Run fn over items; returns {item: result or exception}.
+
+        Sequential: reads are served by one cat-file process per repository anyway.
+        """
+        results = {}
+        for item in items:
+            try:
+                results[item] = fn(item)
+            except Exception as e:
+                results[item] = e
+        return results
+
+    def close(self) -> None:
+        for reader in self._readers.values():
+            reader.close()
+        self._readers.clear()
+
+
+def main():
+    from fetch_and_analyze import repos
+
+    parser = argparse.ArgumentParser(description="Create or update the local bugs-dot-jar mirrors.")
+    parser.add_argument("--update", action="store_true", help="Clone missing mirrors and fetch existing ones.")
+    parser.add_argument("--mirrors", default=MIRRORS_DIR, help=f"Mirror directory (default: {MIRRORS_DIR}).")
+    parser.add_argument("repos", nargs="*", default=repos, help="Repositories (default: all eight projects).")
+    args = parser.parse_args()
+
+    source = GitMirrorSource(args.mirrors)
+    for repo in args.repos:
+        if args.update:
+            source.update(repo)
+        branches = [b for b in source.list_branches(repo) if b.startswith(ORGANIZATION)]
+        print(f"{repo}: {len(branches)} {ORGANIZATION} branches in {source.git_dir(repo)}")
+
+
+if __name__ == "__main__":
+    main()
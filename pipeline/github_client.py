@@ -0,0 +1,252 @@
+# GitHub REST client used by Step 1 to download the bugs-dot-jar artifacts.
+#
+# All requests go through one pooled requests.Session. Responses are stored with
+# their ETag in a SQLite cache and revalidated with If-None-Match, so unchanged
+# files and branch pages come back as 304 (which GitHub does not count against the
+# rate limit). X-RateLimit-Remaining/-Reset are tracked across threads: when the
+# remaining budget drops to RATE_LIMIT_RESERVE, requests wait until the reset.
+# Branch lists are cached for GITHUB_BRANCH_CACHE_TTL seconds. GITHUB_API can point
+# at a local mock server.
+
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API = os.getenv("GITHUB_API", "https://api.github.com").rstrip("/")
+CACHE_PATH = os.getenv("GITHUB_CACHE_PATH", ".cache/github_cache.sqlite")
+GITHUB_WORKERS = int(os.getenv("GITHUB_WORKERS", "8"))
+BRANCH_CACHE_TTL = int(os.getenv("GITHUB_BRANCH_CACHE_TTL", "86400"))
+RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "10"))
+MAX_RATE_LIMIT_WAITS = 3
+ORGANIZATION = "bugs-dot-jar"
+
+
+class ResponseCache:
+    """SQLite store of ETag'd response bodies and cached branch lists (thread-safe)."""
+
+    def __init__(self, path: str = CACHE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """CREATE TABLE IF NOT EXISTS responses (
+                 url TEXT PRIMARY KEY,
+                 etag TEXT,
+                 body TEXT NOT NULL,
+                 fetched REAL
+               );
+               CREATE TABLE IF NOT EXISTS branch_lists (
+                 repo TEXT PRIMARY KEY,
+                 branches TEXT NOT NULL,
+                 fetched REAL
+               );"""
+        )
+        self.conn.commit()
+
+    def response(self, url: str) -> Optional[Tuple[str, str]]:
+        """(etag, body) stored for a URL, or None."""
+        with self.lock:
+            return self.conn.execute("SELECT etag, body FROM responses WHERE url = ?", (url,)).fetchone()
+
+    def store_response(self, url: str, etag: str, body: str) -> None:
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (url, etag, body, time.time()))
+            self.conn.commit()
+
+    def branches(self, repo: str, max_age: float) -> Optional[List[str]]:
+        with self.lock:
+            row = self.conn.execute("SELECT branches, fetched FROM branch_lists WHERE repo = ?", (repo,)).fetchone()
+        if row is None or time.time() - row[1] > max_age:
+            return None
+        return json.loads(row[0])
+
+    def store_branches(self, repo: str, branches: List[str]) -> None:
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO branch_lists VALUES (?, ?, ?)",
+                              (repo, json.dumps(branches), time.time()))
+            self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class GitHubClient:
+    """Pooled, ETag-revalidating and rate-limit-aware access to the bugs-dot-jar repositories."""
+
+    def __init__(
+        self,
+        token: str = "",
+        api: str = GITHUB_API,
+        cache: Optional[ResponseCache] = None,
+        workers: int = GITHUB_WORKERS,
+        reserve: int = RATE_LIMIT_RESERVE,
+    ):
+        self.api = api.rstrip("/")
+        self.cache = cache if cache is not None else ResponseCache()
+        self.workers = max(1, workers)
+        self.reserve = reserve
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept": "application/vnd.github+json",
+            "User-Agent": "bugs-dot-jar-script",
+        })
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        # One connection per worker; transient 5xx responses are retried with back-off.
+        # Rate-limit rejections (Retry-After) are left to get_json, which tracks them
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=("GET",),
+                      respect_retry_after_header=False)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.workers, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._rate_lock = threading.Lock()
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.stats = {"requests": 0, "not_modified": 0, "rate_limit_waits": 0}
+
+    def _count(self, key: str) -> None:
+        # Requests run on worker threads, so the counters are updated under the lock
+        with self._rate_lock:
+            self.stats[key] += 1
+
+    # -- rate limit ---------------------------------------------------------
+
+    def _wait_for_budget(self) -> None:
+        with self._rate_lock:
+            remaining, reset_at = self.remaining, self.reset_at
+        if remaining is None or remaining > self.reserve:
+            return
+        delay = reset_at - time.time() + 1
+        if delay > 0:
+            logger.warning("GitHub rate limit nearly exhausted (%d left), waiting %.0fs", remaining, delay)
+            self._count("rate_limit_waits")
+            time.sleep(delay)
+        with self._rate_lock:
+            if self.reset_at == reset_at:
+                self.remaining = None  # unknown until the next response
+
+    def _record_rate_limit(self, resp: requests.Response) -> None:
+        remaining = resp.headers.get("X-RateLimit-Remaining")
+        reset = resp.headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        with self._rate_lock:
+            reset_at = float(reset)
+            # Responses complete out of order; keep the lowest budget of the current window
+            if reset_at > self.reset_at or self.remaining is None or int(remaining) < self.remaining:
+                self.remaining, self.reset_at = int(remaining), reset_at
+
+    def _rate_limited_delay(self, resp: requests.Response) -> Optional[float]:
+        """Seconds to wait if the response is a primary or secondary rate-limit rejection."""
+        if resp.status_code not in (403, 429):
+            return None
+        if "Retry-After" in resp.headers:
+            return float(resp.headers["Retry-After"])
+        if resp.headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in resp.headers:
+            return max(0.0, float(resp.headers["X-RateLimit-Reset"]) - time.time()) + 1
+        return None
+
+    # -- requests -----------------------------------------------------------
+
+    def get_json(self, path: str, params: Optional[Dict] = None):
+        """GET an API path and return the decoded JSON, revalidating cached responses by ETag.
+
+        Raises PermissionError on 401 and RuntimeError on other non-success responses.
+        """
+        url = requests.Request("GET", f"{self.api}{path}", params=params).prepare().url
+        cached = self.cache.response(url)
+        headers = {"If-None-Match": cached[0]} if cached and cached[0] else {}
+
+        for _ in range(MAX_RATE_LIMIT_WAITS + 1):
+            self._wait_for_budget()
+            resp = self.session.get(url, headers=headers, timeout=30)
+            self._count("requests")
+            self._record_rate_limit(resp)
+            delay = self._rate_limited_delay(resp)
+            if delay is None:
+                break
+            logger.warning("GitHub rate limit hit for %s, retrying in %.0fs", url, delay)
+            self._count("rate_limit_waits")
+            time.sleep(delay)
+
+        if resp.status_code == 304 and cached:
+            self._count("not_modified")
+            return json.loads(cached[1])
+        if resp.status_code == 200:
+            if resp.headers.get("ETag"):
+                self.cache.store_response(url, resp.headers["ETag"], resp.text)
+            return resp.json()
+        if resp.status_code == 401:
+            raise PermissionError("Unauthorized access to GitHub API")
+        logger.error("GitHub API error fetching %s: %s %s", url, resp.status_code, resp.text)
+        raise RuntimeError(f"GitHub API error fetching {url}: {resp.status_code} {resp.text}")
+
+    def fetch_file(self, repo: str, branch: str, target: str) -> Optional[bytes]:
+        """Content of .bugs-dot-jar/<target> on a branch, or None if it is not a file."""
+        return self.read_file(repo, branch, f".{ORGANIZATION}/{target}")
+
+    def read_file(self, repo: str, branch: str, path: str) -> Optional[bytes]:
+        """Content of any repository path on a branch, or None if it is not a file."""
+        logger.debug("Fetching repo file %s for %s@%s", path, repo, branch)
+        data = self.get_json(f"/repos/{ORGANIZATION}/{repo}/contents/{path}", {"ref": branch})
+        if isinstance(data, list):
+            return None
+        content_b64 = data.get("content")
+        if not isinstance(content_b64, str):
+            return None
+        try:
+            return base64.b64decode(content_b64.replace("\n", ""))
+        except Exception:
+            return None
+
+    def list_branches(self, repo: str, max_age: float = BRANCH_CACHE_TTL) -> List[str]:
+        """All branch names of a repository; served from the cache while younger than max_age."""
+        branches = self.cache.branches(repo, max_age)
+        if branches is not None:
+            logger.info("Using cached branch list for %s (%d branches)", repo, len(branches))
+            return branches
+
+        logger.info("Listing all branches for repo %s/%s", ORGANIZATION, repo)
+        branches, page, per_page = [], 1, 100
+        while True:
+            data = self.get_json(f"/repos/{ORGANIZATION}/{repo}/branches", {"per_page": per_page, "page": page})
+            if not data:
+                break
+            branches.extend(b["name"] for b in data if isinstance(b.get("name"), str))
+            if len(data) < per_page:
+                break
+            page += 1
+        self.cache.store_branches(repo, branches)
+        logger.info("Total branches found for %s: %d", repo, len(branches))
+        return branches
+
+    def map(self, fn: Callable, items: Iterable) -> Dict:
+        """Run fn over items in a pool of self.workers threads; returns {item: result or exception}."""
+        items = list(items)
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {item: pool.submit(fn, item) for item in items}
+            for item, future in futures.items():
+                try:
+                    results[item] = future.result()
+                except Exception as e:
+                    results[item] = e
+        return results
+
+    def close(self) -> None:
+        self.session.close()
+        self.cache.close()
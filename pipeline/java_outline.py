@@ -0,0 +1,176 @@
+# Lightweight outline of a Java source file: classes, methods and their line ranges.
+#
+# Not a full parser: the source is tokenized (comments, string and char literals are
+# skipped) and every "{" is classified from the tokens since the previous ";", "{" or
+# "}" as a class body, a method/constructor body, an anonymous class body or a plain
+# block. That is enough to answer "which class and method encloses line N" for
+# the Java 6-8 sources of the bugs-dot-jar projects.
+
+import bisect
+import re
+from typing import List, Optional, Tuple
+
+TOKEN = re.compile(
+    r"""(?P<space>\s+)
+      | (?P<comment>//[^\n]*|/\*.*?\*/)
+      | (?P<literal>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+      | (?P<ident>[A-Za-z_$][\w$]*)
+      | (?P<number>\d[\w.]*)
+      | (?P<symbol>->|::|.)""",
+    re.S | re.X,
+)
+TYPE_KEYWORDS = {"class", "interface", "enum"}
+NOT_METHODS = {"if", "for", "while", "switch", "catch", "synchronized", "return", "new", "throw",
+               "super", "this", "try", "do", "else", "assert"}
+
+
+class Scope:
+    """A brace-delimited region: kind is 'file', 'class', 'method', 'anonymous' or 'block'."""
+
+    def __init__(self, kind: str, name: Optional[str], start: int, parent: Optional["Scope"]):
+        self.kind = kind
+        self.name = name
+        self.start = start
+        self.end = start
+        self.parent = parent
+        self.children: List["Scope"] = []
+        self.enum_constants = False  # inside an enum body, before the first ";"
+
+    def __repr__(self):
+        return f"Scope({self.kind}, {self.name}, {self.start}-{self.end})"
+
+
+def tokenize(text: str) -> List[Tuple[str, int]]:
+    """(token, line) pairs without whitespace, comments and the content of literals."""
+    line_starts = [0] + [m.end() for m in re.finditer(r"\n", text)]
+    tokens = []
+    for match in TOKEN.finditer(text):
+        kind = match.lastgroup
+        if kind in ("space", "comment"):
+            continue
+        value = '""' if kind == "literal" else match.group()
+        tokens.append((value, bisect.bisect_right(line_starts, match.start())))
+    return tokens
+
+
+def _strip_annotations(tokens: List[str]) -> List[str]:
+    out, i = [], 0
+    while i < len(tokens):
+        if tokens[i] == "@" and i + 1 < len(tokens) and tokens[i + 1] != "interface":
+            i += 2
+            while i + 1 < len(tokens) and tokens[i] == ".":
+                i += 2
+            if i < len(tokens) and tokens[i] == "(":
+                depth = 0
+                while i < len(tokens):
+                    depth += {"(": 1, ")": -1}.get(tokens[i], 0)
+                    i += 1
+                    if depth == 0:
+                        break
+            continue
+        out.append(tokens[i])
+        i += 1
+    return out
+
+
+def _is_anonymous_class(tokens: List[str]) -> bool:
+    """Whether tokens end with 'new Type<...>(...)'."""
+    if not tokens or tokens[-1] != ")":
+        return False
+    depth, i = 0, len(tokens) - 1
+    while i >= 0:
+        depth += {")": 1, "(": -1}.get(tokens[i], 0)
+        if depth == 0:
+            break
+        i -= 1
+    i -= 1
+    while i >= 0 and (tokens[i] in (".", "<", ">", ",", "?") or re.match(r"[\w$]+$", tokens[i])):
+        if tokens[i] == "new":
+            return True
+        i -= 1
+    return False
+
+
+def _classify(pending: List[str], parent: Scope) -> Tuple[str, Optional[str], bool]:
+    """(kind, name, is_expression) of the scope opened by "{" after the pending tokens."""
+    tokens = _strip_annotations(pending)
+    if _is_anonymous_class(tokens):
+        return "anonymous", None, True
+    for i, tok in enumerate(tokens):
+        if tok in TYPE_KEYWORDS and (i == 0 or tokens[i - 1] != ".") and i + 1 < len(tokens):
+            return "class", tokens[i + 1], False
+    if tokens and tokens[-1] in ("=", "]", ",", "(", "->", "return"):
+        return "block", None, True  # array initializer or lambda body
+    if parent.kind in ("class", "anonymous") and not parent.enum_constants and "(" in tokens:
+        paren = tokens.index("(")
+        if paren > 0 and "=" not in tokens[:paren] and tokens[paren - 1] not in NOT_METHODS \
+                and re.match(r"[A-Za-z_$][\w$]*$", tokens[paren - 1]):
+            return "method", tokens[paren - 1], False
+    if parent.enum_constants:
+        return "anonymous", None, False  # enum constant with a body
+    return "block", None, False
+
+
+def outline(text: str) -> Scope:
+    """Scope tree of a Java source file."""
+    root = Scope("file", None, 1, None)
+    scope, pending, pending_start = root, [], None
+    saved = []  # pending tokens of the enclosing statement, restored after expression scopes
+    for value, line in tokenize(text):
+        if value == "{":
+            kind, name, expression = _classify(pending, scope)
+            child = Scope(kind, name, pending_start or line, scope)
+            child.enum_constants = kind == "class" and "enum" in pending
+            scope.children.append(child)
+            saved.append((pending, pending_start) if expression else ([], None))
+            scope, pending, pending_start = child, [], None
+        elif value == "}":
+            scope.end = line
+            if scope.parent is not None:
+                scope = scope.parent
+            pending, pending_start = saved.pop() if saved else ([], None)
+            if pending:
+                pending = pending + ["}"]
+        elif value == ";":
+            scope.enum_constants = False
+            pending, pending_start = [], None
+        else:
+            if not pending:
+                pending_start = line
+            pending.append(value)
+    root.end = max(root.end, text.count("\n") + 1)
+    return root
+
+
+def innermost(root: Scope, line: int) -> Scope:
+    scope = root
+    while True:
+        for child in scope.children:
+            if child.start <= line <= child.end:
+                scope = child
+                break
+        else:
+            return scope
+
+
+def member_at(root: Scope, line: int) -> Tuple[Optional[str], Optional[str]]:
+    """(class, method) enclosing a line.
+
+    class is the '$'-joined chain of named classes ('Outer$Inner'), None outside any
+    class. method is None for class-level lines (fields, initializers); code in
+    anonymous classes is attributed to the method that creates them.
+    """
+    scope = innermost(root, line)
+    method = None
+    while scope is not None and scope.kind != "class":
+        if scope.kind == "method" and scope.parent is not None and scope.parent.kind == "class" and method is None:
+            method = scope.name
+        scope = scope.parent
+    if scope is None:
+        return None, None
+    names = []
+    while scope is not None:
+        if scope.kind == "class":
+            names.append(scope.name)
+        scope = scope.parent
+    return "$".join(reversed(names)), method
@@ -0,0 +1,210 @@
+# Failure-focused reduction of Maven/Surefire test logs before prompting.
+#
+# test-results.txt files contain the full Maven output, mostly "Running X" /
+# "Tests run: ..." lines of passing test classes (up to ~1 MB per branch). The
+# reducer streams a log once and keeps only
+#   - the per-class summaries and per-test headers of the tests Surefire reports as
+#     failed (<<< FAILURE!/ERROR!); exceptions logged by passing tests are dropped,
+#   - their messages and stack traces, with runs of framework frames (JDK, JUnit,
+#     Maven, reflection) collapsed and repeated traces replaced by a back-reference,
+#   - the Surefire "Results :" section (consecutive duplicate lines counted),
+#   - the [ERROR] lines and the BUILD SUCCESS/FAILURE line.
+# Logs in which nothing of this is found are reduced to their last lines.
+#
+#   python pipeline/log_reducer.py outputs/camel/<branch>/test-results.txt
+#   python pipeline/log_reducer.py --report          # tokens saved per branch
+
+import argparse
+import hashlib
+import logging
+import os
+import re
+from collections import deque
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REDUCE_TEST_LOGS = os.getenv("REDUCE_TEST_LOGS", "1") != "0"
+CHARS_PER_TOKEN = 4
+FALLBACK_TAIL_LINES = 200
+MAX_FRAMES_PER_TRACE = 40
+
+FAILURE_MARKER = re.compile(r"<<< (FAILURE|ERROR)!(\s*$| - in )")
+CLASS_SUMMARY = re.compile(r"^Tests run: \d+, Failures: \d+, Errors: \d+")
+FRAME = re.compile(r"^\s+at ([\w$.<>]+)\(")
+FRAMEWORK_PREFIXES = (
+    "java.", "javax.", "jdk.", "sun.", "com.sun.",
+    "junit.", "org.junit.", "org.hamcrest.", "org.testng.",
+    "org.apache.maven.", "org.codehaus.plexus.",
+    "org.mockito.", "org.easymock.", "net.sf.cglib.",
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def is_framework_frame(line: str) -> bool:
+    match = FRAME.match(line)
+    return bool(match) and match.group(1).startswith(FRAMEWORK_PREFIXES)
+
+
+def compress_trace(lines: List[str]) -> List[str]:
+    """Collapse runs of framework frames and cap the number of frames of one trace."""
+    out, framework_run, frames = [], 0, 0
+    for line in lines:
+        if is_framework_frame(line):
+            framework_run += 1
+            continue
+        if framework_run:
+            out.append(f"\t... {framework_run} framework frames")
+            framework_run = 0
+        if FRAME.match(line):
+            frames += 1
+            if frames > MAX_FRAMES_PER_TRACE:
+                continue
+        out.append(line)
+    if framework_run:
+        out.append(f"\t... {framework_run} framework frames")
+    if frames > MAX_FRAMES_PER_TRACE:
+        out.append(f"\t... {frames - MAX_FRAMES_PER_TRACE} more frames")
+    return out
+
+
+def _squeeze(lines: List[str]) -> Iterator[str]:
+    """Replace consecutive duplicate lines by one line with a repeat count."""
+    previous, count = None, 0
+    for line in lines + [None]:
+        if line == previous:
+            count += 1
+            continue
+        if previous is not None:
+            yield previous if count == 1 else f"{previous} (x{count})"
+        previous, count = line, 1
+
+
+def reduce_lines(lines: Iterable[str]) -> str:
+    """Reduce a test log given as an iterable of lines (read once, in order)."""
+    out: List[str] = []
+    tail = deque(maxlen=FALLBACK_TAIL_LINES)
+    seen_traces = {}
+    block: Optional[List[str]] = None  # header + trace of the failing test being read
+    results: Optional[List[str]] = None  # lines of a "Results :" section
+    running = None  # last "Running <class>" line; older Surefire versions only name the class there
+    found = False
+
+    def flush_block():
+        header, trace = block[0], compress_trace(block[1:])
+        out.append(header)
+        key = hashlib.sha1("\n".join(trace).encode("utf-8")).hexdigest()
+        if key in seen_traces:
+            out.append(f"\t(same trace as {seen_traces[key]})")
+        else:
+            seen_traces[key] = header.split("  Time elapsed")[0].strip()
+            out.extend(trace)
+
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        tail.append(line)
+
+        if results is not None:
+            results.append(line)
+            if CLASS_SUMMARY.match(line):  # the overall "Tests run:" ends the section
+                out.extend(_squeeze(results))
+                out.append("")
+                results = None
+            continue
+
+        if block is not None:
+            if line.strip() and not line.startswith(("Running ", "Tests run: ")) and not FAILURE_MARKER.search(line):
+                block.append(line)
+                continue
+            flush_block()
+            block = None
+
+        if line.startswith("Running "):
+            running = line
+        elif line.strip() == "Results :":
+            results, found = [line], True
+        elif FAILURE_MARKER.search(line):
+            found = True
+            if CLASS_SUMMARY.match(line):
+                if running is not None and " - in " not in line:
+                    out.append(running)
+                out.append(line)
+            else:
+                block = [line]
+        elif line.startswith("[ERROR]"):
+            if line.strip() != "[ERROR]":
+                out.append(line)
+                found = True
+        elif line.startswith("[INFO] BUILD "):
+            out.append(line)
+
+    if block is not None:
+        flush_block()
+    if results is not None:
+        out.extend(_squeeze(results))
+    if not found:
+        return "\n".join(tail)
+    return "\n".join(out)
+
+
+def reduce_log(text: str) -> str:
+    return reduce_lines(text.splitlines())
+
+
+def reduce_log_file(path: str) -> str:
+    """Reduce a test log file, streaming it line by line."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return reduce_lines(f)
+
+
+def reduce_for_prompt(test_log: str, label: str) -> str:
+    """Reduced test log for a prompt (unless REDUCE_TEST_LOGS=0); logs the tokens saved."""
+    if not REDUCE_TEST_LOGS or not test_log:
+        return test_log
+    reduced = reduce_log(test_log)
+    before, after = estimate_tokens(test_log), estimate_tokens(reduced)
+    logger.info("Reduced test log of %s: %d -> %d tokens (%d saved)", label, before, after, before - after)
+    return reduced
+
+
+def reduction_report(path: str) -> Tuple[int, int]:
+    """(tokens before, tokens after) for one test log."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        before = estimate_tokens(f.read())
+    return before, estimate_tokens(reduce_log_file(path))
+
+
+def main():
+    from outputs_catalog import get_catalog
+
+    parser = argparse.ArgumentParser(description="Reduce Surefire test logs to their failures.")
+    parser.add_argument("path", nargs="?", help="A test-results.txt to reduce and print.")
+    parser.add_argument("--report", action="store_true",
+                        help="Print the estimated tokens saved for every branch in outputs/.")
+    args = parser.parse_args()
+
+    if args.path:
+        print(reduce_log_file(args.path))
+        return
+    if not args.report:
+        parser.error("give a log file or --report")
+
+    total_before = total_after = 0
+    for repo, branch_dir, branch_path in get_catalog().branches():
+        path = os.path.join(branch_path, "test-results.txt")
+        if not os.path.isfile(path):
+            continue
+        before, after = reduction_report(path)
+        total_before += before
+        total_after += after
+        print(f"{repo}/{branch_dir}: {before} -> {after} tokens ({before - after} saved)")
+    if total_before:
+        print(f"Total: {total_before} -> {total_after} tokens "
+              f"({100 * (total_before - total_after) / total_before:.1f}% saved)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# SQLite catalog of the outputs/<repo>/<branch> tree.
+#
+# Records every branch directory, its artifacts (size, mtime) and the parsed
+# analysis.json fields. refresh() walks the tree with os.scandir and only re-reads
+# analysis.json files whose mtime changed, so the pipeline steps query the catalog
+# instead of listing directories and parsing every analysis.json on each run.
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OUTPUTS_DIR = "outputs"
+CATALOG_PATH = os.getenv("OUTPUTS_CATALOG_PATH", ".cache/outputs_catalog.sqlite")
+ANALYSIS_FILENAME = "analysis.json"
+
+
+class OutputsCatalog:
+    """Incrementally refreshed index of branches, artifacts and analysis.json contents."""
+
+    def __init__(self, outputs_root: str = OUTPUTS_DIR, path: str = CATALOG_PATH):
+        self.outputs_root = outputs_root
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            """CREATE TABLE IF NOT EXISTS branches (
+                 repo TEXT,
+                 branch TEXT,
+                 path TEXT,
+                 PRIMARY KEY (repo, branch)
+               );
+               CREATE TABLE IF NOT EXISTS artifacts (
+                 repo TEXT,
+                 branch TEXT,
+                 name TEXT,
+                 size INTEGER,
+                 mtime REAL,
+                 PRIMARY KEY (repo, branch, name)
+               );
+               CREATE TABLE IF NOT EXISTS analyses (
+                 repo TEXT,
+                 branch TEXT,
+                 mtime REAL,
+                 data TEXT,
+                 suitable_tests INTEGER,
+                 suitable_test_methods INTEGER,
+                 source_package TEXT,
+                 PRIMARY KEY (repo, branch)
+               );"""
+        )
+        self.conn.commit()
+
+    def refresh(self) -> Dict[str, int]:
+        """Sync the catalog with the file system; returns counts of scanned and re-parsed entries."""
+        known = {(repo, branch, name): mtime for repo, branch, name, mtime in
+                 self.conn.execute("SELECT repo, branch, name, mtime FROM artifacts")}
+        seen_branches, seen_artifacts = set(), set()
+        stats = {"branches": 0, "parsed": 0, "removed": 0}
+
+        for repo_entry in _scandir(self.outputs_root):
+            if not repo_entry.is_dir():
+                continue
+            for branch_entry in _scandir(repo_entry.path):
+                if not branch_entry.is_dir():
+                    continue
+                repo, branch = repo_entry.name, branch_entry.name
+                seen_branches.add((repo, branch))
+                stats["branches"] += 1
+                self.conn.execute("INSERT OR REPLACE INTO branches VALUES (?, ?, ?)", (repo, branch, branch_entry.path))
+                for entry in _scandir(branch_entry.path):
+                    if not entry.is_file() or entry.name.startswith("."):
+                        continue
+                    st = entry.stat()
+                    key = (repo, branch, entry.name)
+                    seen_artifacts.add(key)
+                    if known.get(key) == st.st_mtime:
+                        continue
+                    self.conn.execute("INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?)",
+                                      (repo, branch, entry.name, st.st_size, st.st_mtime))
+                    if entry.name == ANALYSIS_FILENAME:
+                        self._store_analysis(repo, branch, entry.path, st.st_mtime)
+                        stats["parsed"] += 1
+
+        # Drop entries whose files or directories disappeared
+        for key in set(known) - seen_artifacts:
+            self.conn.execute("DELETE FROM artifacts WHERE repo = ? AND branch = ? AND name = ?", key)
+            if key[2] == ANALYSIS_FILENAME:
+                self.conn.execute("DELETE FROM analyses WHERE repo = ? AND branch = ?", key[:2])
+            stats["removed"] += 1
+        for repo, branch in self.conn.execute("SELECT repo, branch FROM branches").fetchall():
+            if (repo, branch) not in seen_branches:
+                self.conn.execute("DELETE FROM branches WHERE repo = ? AND branch = ?", (repo, branch))
+        self.conn.commit()
+        logger.debug("Outputs catalog refreshed: %s", stats)
+        return stats
+
+    def _store_analysis(self, repo: str, branch: str, path: str, mtime: float) -> None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Unreadable %s for %s/%s: %s", ANALYSIS_FILENAME, repo, branch, e)
+            data = None
+        fields = data if isinstance(data, dict) else {}
+        self.conn.execute(
+            "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                repo, branch, mtime, json.dumps(data),
+                len(fields["suitable_tests"]) if isinstance(fields.get("suitable_tests"), list) else None,
+                len(fields["suitable_test_methods"]) if isinstance(fields.get("suitable_test_methods"), list) else None,
+                fields.get("sourcePackage"),
+            ),
+        )
+
+    def branches(self, repos: Optional[List[str]] = None) -> Iterator[Tuple[str, str, str]]:
+        """Yield (repo, branch_dir, branch_path), like helper.iter_output_branch_dirs."""
+        rows = self.conn.execute("SELECT repo, branch, path FROM branches ORDER BY repo, branch").fetchall()
+        for repo, branch, path in rows:
+            if repos is None or repo in repos:
+                yield repo, branch, path
+
+    def has_branch(self, repo: str, branch: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM branches WHERE repo = ? AND branch = ?", (repo, branch)).fetchone() is not None
+
+    def has_artifact(self, repo: str, branch: str, name: str) -> bool:
+        row = self.conn.execute("SELECT 1 FROM artifacts WHERE repo = ? AND branch = ? AND name = ?",
+                                (repo, branch, name)).fetchone()
+        return row is not None
+
+    def analysis(self, repo: str, branch: str):
+        """Parsed analysis.json of a branch, or None if it has none."""
+        row = self.conn.execute("SELECT data FROM analyses WHERE repo = ? AND branch = ?", (repo, branch)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def analyses(self, repos: Optional[List[str]] = None) -> Iterator[Tuple[str, str, str, Optional[dict]]]:
+        """Yield (repo, branch_dir, branch_path, analysis) for every branch; analysis is None if missing."""
+        rows = self.conn.execute(
+            """SELECT b.repo, b.branch, b.path, a.data
+               FROM branches b LEFT JOIN analyses a ON a.repo = b.repo AND a.branch = b.branch
+               ORDER BY b.repo, b.branch"""
+        ).fetchall()
+        for repo, branch, path, data in rows:
+            if repos is None or repo in repos:
+                yield repo, branch, path, (json.loads(data) if data is not None else None)
+
+    def summary(self) -> List[Tuple]:
+        """Per repo: branches, analyses, with suitable tests, with test methods, with source package."""
+        return self.conn.execute(
+            """SELECT b.repo, COUNT(*), COUNT(a.branch), COUNT(NULLIF(a.suitable_tests, 0)),
+                      COUNT(NULLIF(a.suitable_test_methods, 0)), COUNT(a.source_package)
+               FROM branches b LEFT JOIN analyses a ON a.repo = b.repo AND a.branch = b.branch
+               GROUP BY b.repo ORDER BY b.repo"""
+        ).fetchall()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _scandir(path: str):
+    try:
+        with os.scandir(path) as it:
+            return sorted(it, key=lambda e: e.name)
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+_catalog: Optional[OutputsCatalog] = None
+
+
+def get_catalog(outputs_root: str = OUTPUTS_DIR) -> OutputsCatalog:
+    """Process-wide catalog, refreshed on every call.
+
+    The refresh only re-parses files whose mtime changed, so analyses written through
+    analysis_store.update_analysis earlier in the same process are seen by later readers.
+    """
+    global _catalog
+    if _catalog is None or _catalog.outputs_root != outputs_root:
+        _catalog = OutputsCatalog(outputs_root)
+    _catalog.refresh()
+    return _catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh and summarize the outputs catalog.")
+    parser.add_argument("--outputs", default=OUTPUTS_DIR, help=f"Outputs root (default: {OUTPUTS_DIR}).")
+    args = parser.parse_args()
+
+    catalog = OutputsCatalog(args.outputs)
+    stats = catalog.refresh()
+    print(f"Scanned {stats['branches']} branches, parsed {stats['parsed']} analyses, removed {stats['removed']} entries")
+    print(f"{'repo':<16} {'branches':>8} {'analysis':>8} {'suitable':>8} {'methods':>8} {'package':>8}")
+    for row in catalog.summary():
+        print(f"{row[0]:<16} " + " ".join(f"{v:>8}" for v in row[1:]))
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# Deterministic analysis of developer-patch.diff: patched classes and methods.
+#
+# The unified diff is split into files and hunks. Each .java file path is mapped to
+# its fully qualified class name (package declaration of the source, else the path
+# below src/main/java, src/java or src). Changed lines are mapped to their enclosing
+# class and method with java_outline: removed lines against the buggy source (the
+# branch checkout or the git mirror), added lines against the source with the patch
+# applied. Without source, new and deleted files are still parsed from the diff
+# itself; in other hunks a changed line is attributed to the nearest less indented
+# method declaration above it within the hunk, else to the function context git
+# prints in the hunk header ("@@ -97,10 +108,10 @@ public Foo bar(String key) {").
+#
+#   python pipeline/patch_parser.py outputs/camel/<branch>/developer-patch.diff [--source DIR]
+
+import argparse
+import json
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from java_outline import NOT_METHODS, member_at, outline
+
+SourceReader = Callable[[str], Optional[str]]
+
+FILE_HEADER = re.compile(r"^diff --git a/(?P<old>\S+) b/(?P<new>\S+)")
+HUNK_HEADER = re.compile(r"^@@ -(?P<old_start>\d+)(?:,(?P<old_len>\d+))? \+(?P<new_start>\d+)(?:,(?P<new_len>\d+))? @@ ?(?P<context>.*)")
+PACKAGE = re.compile(r"^\s*package\s+([\w.]+)\s*;", re.M)
+SOURCE_ROOTS = ("src/main/java/", "src/test/java/", "src/java/", "src/")
+DECLARATION = re.compile(
+    r"^\s*(?:@\w+(?:\([^)]*\))?\s+)*(?:(?:public|protected|private|static|final|synchronized|abstract|native)\s+)*"
+    r"(?:<[^>]+>\s+)?(?:[\w$.]+(?:<.*>)?(?:\[\])*\s+)?(?P<name>[A-Za-z_$][\w$]*)\s*\([^;=]*$"
+)
+TYPE_DECLARATION = re.compile(r"\b(class|interface|enum)\s+[A-Za-z_$]")
+# Member of a changed line that cannot be told without the source
+UNKNOWN_MEMBER = object()
+
+
+class Hunk:
+    def __init__(self, old_start: int, new_start: int, context: str):
+        self.old_start = old_start
+        self.new_start = new_start
+        self.context = context
+        self.lines: List[Tuple[str, str]] = []  # (" " | "-" | "+", text)
+
+
+class FilePatch:
+    def __init__(self, old_path: str, new_path: str):
+        self.old_path = old_path
+        self.new_path = new_path
+        self.is_new = False
+        self.is_deleted = False
+        self.hunks: List[Hunk] = []
+
+    @property
+    def path(self) -> str:
+        return self.old_path if self.is_deleted else self.new_path
+
+
+def parse_diff(text: str) -> List[FilePatch]:
+    """Files and hunks of a git unified diff."""
+    files: List[FilePatch] = []
+    hunk: Optional[Hunk] = None
+    for line in text.splitlines():
+        header = FILE_HEADER.match(line)
+        if header:
+            files.append(FilePatch(header.group("old"), header.group("new")))
+            hunk = None
+            continue
+        if not files:
+            continue
+        current = files[-1]
+        if hunk is None:
+            if line.startswith("new file mode"):
+                current.is_new = True
+            elif line.startswith("deleted file mode"):
+                current.is_deleted = True
+        match = HUNK_HEADER.match(line)
+        if match:
+            hunk = Hunk(int(match.group("old_start")), int(match.group("new_start")), match.group("context"))
+            current.hunks.append(hunk)
+        elif hunk is not None and line[:1] in (" ", "-", "+"):
+            hunk.lines.append((line[0], line[1:]))
+        elif hunk is not None and line == "":
+            hunk.lines.append((" ", ""))
+    return files
+
+
+def apply_patch(old_source: str, patch: FilePatch) -> str:
+    """Source after the patch (the hunks must apply to old_source exactly)."""
+    old_lines = old_source.splitlines()
+    new_lines, position = [], 0
+    for hunk in patch.hunks:
+        start = max(hunk.old_start - 1, 0)
+        new_lines.extend(old_lines[position:start])
+        position = start
+        for tag, text in hunk.lines:
+            if tag in (" ", "-"):
+                position += 1
+            if tag in (" ", "+"):
+                new_lines.append(text)
+    new_lines.extend(old_lines[position:])
+    return "\n".join(new_lines) + "\n"
+
+
+def changed_lines(patch: FilePatch) -> Tuple[List[Tuple[int, str, Hunk]], List[Tuple[int, str, Hunk]]]:
+    """(removed lines with old line numbers, added lines with new line numbers)."""
+    removed, added = [], []
+    for hunk in patch.hunks:
+        old_line, new_line = hunk.old_start, hunk.new_start
+        for tag, text in hunk.lines:
+            if tag == "-":
+                removed.append((old_line, text, hunk))
+            elif tag == "+":
+                added.append((new_line, text, hunk))
+            if tag in (" ", "-"):
+                old_line += 1
+            if tag in (" ", "+"):
+                new_line += 1
+    return removed, added
+
+
+def is_significant(text: str) -> bool:
+    """Whether a changed line is code (not blank, a comment, an import or the package line)."""
+    stripped = text.strip()
+    return bool(stripped) and not stripped.startswith(("//", "/*", "*", "import ", "package "))
+
+
+def class_name(path: str, source: Optional[str] = None) -> str:
+    """Fully qualified name of the top-level class of a .java file."""
+    simple = os.path.basename(path)[:-len(".java")]
+    match = PACKAGE.search(source) if source else None
+    if match:
+        return f"{match.group(1)}.{simple}"
+    for root in SOURCE_ROOTS:
+        if root in path:
+            return path.split(root, 1)[1][:-len(".java")].replace("/", ".")
+    return simple
+
+
+def _indent(text: str) -> int:
+    return len(text) - len(text.lstrip())
+
+
+def _declared_method(text: str) -> Optional[str]:
+    match = DECLARATION.match(text)
+    if match and match.group("name") not in NOT_METHODS and not TYPE_DECLARATION.search(text):
+        return match.group("name")
+    return None
+
+
+def _hunk_member(hunk: Hunk, side: str, line: int, top_class: str) -> Tuple[str, Optional[str]]:
+    """Best guess without source: the nearest less indented declaration above the line.
+
+    Looks at the hunk's own lines on one side ("-": old, "+": new), then at the
+    function context of the hunk header. Returns UNKNOWN_MEMBER when that header is
+    a type declaration.
+    """
+    start = hunk.old_start if side == "-" else hunk.new_start
+    lines = [text for tag, text in hunk.lines if tag in (" ", side)]
+    index = line - start
+    changed = lines[index]
+    if _declared_method(changed):
+        return top_class, _declared_method(changed)
+    indent = _indent(changed)
+    for text in reversed(lines[:index]):
+        if not is_significant(text) or _indent(text) >= indent:
+            continue
+        if TYPE_DECLARATION.search(text):
+            return top_class, None
+        method = _declared_method(text)
+        if method:
+            return top_class, method
+        indent = _indent(text)
+    if hunk.context and TYPE_DECLARATION.search(hunk.context):
+        # The header only names the enclosing type; the line may well be inside a
+        # method whose declaration lies above the hunk
+        return top_class, UNKNOWN_MEMBER
+    return top_class, _declared_method(hunk.context)
+
+
+def analyze_patch(diff_text: str, read_source: Optional[SourceReader] = None) -> Dict[str, List[str]]:
+    """Patched classes, methods, constructors and class definitions of a developer patch.
+
+    read_source(path) returns the buggy (pre-patch) source of a repository path, or
+    None. Methods are reported as 'pkg.Class.method', nested classes as 'pkg.Outer$Inner'.
+    """
+    patched, methods, constructors, definitions = {}, {}, {}, {}
+    for patch in parse_diff(diff_text):
+        if not patch.path.endswith(".java") or patch.path.endswith("package-info.java"):
+            continue
+        old_source = None if patch.is_new else (read_source(patch.old_path) if read_source else None)
+        if patch.is_new:
+            new_source = "\n".join(text for hunk in patch.hunks for tag, text in hunk.lines if tag == "+")
+        elif old_source is not None:
+            new_source = apply_patch(old_source, patch)
+        else:
+            new_source = None
+        if patch.is_deleted and old_source is None:
+            old_source = "\n".join(text for hunk in patch.hunks for tag, text in hunk.lines if tag == "-")
+
+        top = class_name(patch.path, new_source or old_source)
+        package = top.rsplit(".", 1)[0] + "." if "." in top else ""
+        patched[top] = None
+
+        removed, added = changed_lines(patch)
+        old_outline = outline(old_source) if old_source is not None else None
+        new_outline = outline(new_source) if new_source is not None else None
+        for side, lines, tree in (("-", removed, old_outline), ("+", added, new_outline)):
+            for line, text, hunk in lines:
+                if not is_significant(text):
+                    continue
+                if tree is not None:
+                    cls, method = member_at(tree, line)
+                    if cls is None:
+                        continue
+                    cls = package + cls
+                else:
+                    cls, method = _hunk_member(hunk, side, line, top)
+                    if method is UNKNOWN_MEMBER:
+                        continue
+                if method is None:
+                    definitions[cls] = None
+                elif method == cls.rsplit(".", 1)[-1].rsplit("$", 1)[-1]:
+                    constructors[cls] = None
+                else:
+                    methods[f"{cls}.{method}"] = None
+
+    return {
+        "patched": list(patched),
+        "patched_methods": list(methods),
+        "patched_constructors": list(constructors),
+        "patched_definitions": list(definitions),
+    }
+
+
+def checkout_reader(root: str) -> SourceReader:
+    """Source reader over a checked-out branch (e.g. scripts/<branch>)."""
+    def read(path: str) -> Optional[str]:
+        full = os.path.join(root, path)
+        if not os.path.isfile(full):
+            return None
+        with open(full, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    return read
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the classes and methods changed by a developer patch.")
+    parser.add_argument("diff", help="A developer-patch.diff file.")
+    parser.add_argument("--source", help="Checkout of the buggy branch (for method mapping).")
+    args = parser.parse_args()
+    with open(args.diff, "r", encoding="utf-8", errors="replace") as f:
+        diff_text = f.read()
+    result = analyze_patch(diff_text, checkout_reader(args.source) if args.source else None)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+# Incremental runner for the pipeline steps.
+#
+# Every step is a task with declared inputs, either per branch (outputs/<repo>/<branch>)
+# or global. Before a task runs, its inputs (prompt templates, model name, source
+# artifacts, the analysis.json fields written by upstream tasks) are fingerprinted;
+# the task is only recomputed when the fingerprint differs from the one stored after
+# its last successful run (.cache/pipeline_state.sqlite). Branches are processed
+# independently in a worker pool, and a per-task timing summary is printed at the end.
+#
+# Steps 3 and 4 (JDK builds, test execution in Docker, call-graph import and the
+# evaluate_calltree.py runs) need the setup/ environment and are not modeled here.
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+from analysis_store import read_analysis, update_analysis
+from enrich_analysis_with_non_equi_tests import non_equi_tests
+from extract_source_package import source_package_from_log
+from fetch_and_analyze import ANALYSIS_MODE, BUGS_DOT_JAR, get_source, process_branch, repos as SOURCE_REPOS
+from find_method_for_suitable_testclasses import TEST_METHOD_PROMPT_FILE, find_test_methods
+from helper import MODEL
+from log_reducer import REDUCE_TEST_LOGS
+from outputs_catalog import OUTPUTS_DIR, get_catalog
+
+logger = logging.getLogger("run_pipeline")
+
+STATE_PATH = os.getenv("PIPELINE_STATE_PATH", ".cache/pipeline_state.sqlite")
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+ANALYSIS_PROMPT_FILE = "prompts/analysis_prompt.txt"
+WORKING_EXAMPLES_FILE = "data/working-examples-jdk6.txt"
+SUITABLE_EXAMPLES_FILE = "data/working-examples-jdk6-with-suitable-tests.txt"
+EXPERIMENTS_FILE = os.getenv("EXPERIMENTS_FILE", "data/experiments.xlsx")
+PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+# The test logs in the Step 1 and 2 prompts go through log_reducer.py
+LOG_REDUCER_FILE = os.path.join(PIPELINE_DIR, "log_reducer.py")
+# Local analysis of patches and test logs (patched methods, local/auto mode, test methods)
+PATCH_PARSER_FILES = [os.path.join(PIPELINE_DIR, name) for name in ("patch_parser.py", "java_outline.py")]
+SUREFIRE_PARSER_FILE = os.path.join(PIPELINE_DIR, "surefire_parser.py")
+
+GLOBAL_KEY = "*"
+
+
+class SkipTask(Exception):
+    """Raised by a task whose preconditions are not met for a branch (not an error)."""
+
+
+class Branch:
+    """A branch directory and its artifacts, as seen by the tasks."""
+
+    def __init__(self, repo: str, name: str, path: str):
+        self.repo = repo
+        self.name = name
+        self.path = path
+        self.key = f"{repo}/{name}"
+
+    def artifact(self, filename: str) -> str:
+        return os.path.join(self.path, filename)
+
+    def analysis(self) -> dict:
+        return read_analysis(self.path) or {}
+
+
+class Task:
+    """One pipeline step.
+
+    inputs(target) returns the values that determine the task's result; outputs(target)
+    tells whether results already exist (used to adopt outputs produced before the
+    runner tracked them); run(target) computes and stores them.
+    """
+
+    def __init__(self, name: str, step: int, run: Callable, inputs: Callable, outputs: Callable,
+                 deps: Sequence[str] = (), per_branch: bool = True):
+        self.name = name
+        self.step = step
+        self.run = run
+        self.inputs = inputs
+        self.outputs = outputs
+        self.deps = tuple(deps)
+        self.per_branch = per_branch
+
+
+_file_hashes: Dict[tuple, str] = {}
+
+
+def file_hash(path: str) -> Optional[str]:
+    """Content hash of a file (memoized by path, size and mtime), None if missing."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (path, st.st_size, st.st_mtime_ns)
+    if key not in _file_hashes:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        _file_hashes[key] = digest.hexdigest()
+    return _file_hashes[key]
+
+
+def fingerprint(values) -> str:
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+# --- Step 1 -----------------------------------------------------------------
+
+def run_analyze(branch: Branch):
+    if not process_branch(branch.repo, branch.name, os.path.dirname(branch.path), force=True):
+        raise RuntimeError("no valid analysis returned")
+
+
+def inputs_analyze(branch: Branch):
+    inputs = [file_hash(ANALYSIS_PROMPT_FILE), MODEL,
+              file_hash(branch.artifact("developer-patch.diff")), file_hash(branch.artifact("test-results.txt")),
+              REDUCE_TEST_LOGS, file_hash(LOG_REDUCER_FILE),
+              *(file_hash(path) for path in PATCH_PARSER_FILES), file_hash(SUREFIRE_PARSER_FILE)]
+    # Only non-default modes are part of the fingerprint, so existing LLM analyses stay fresh
+    return inputs + [ANALYSIS_MODE] if ANALYSIS_MODE != "llm" else inputs
+
+
+# --- Step 2 -----------------------------------------------------------------
+
+def run_suitable_tests(branch: Branch):
+    analysis = branch.analysis()
+    if not analysis:
+        raise SkipTask("no analysis")
+    suitable_tests = non_equi_tests(analysis)
+    # Same contract as enrich_analysis_with_non_equi_tests.py: the key is only present when non-empty
+    if suitable_tests:
+        update_analysis(branch.path, {"suitable_tests": suitable_tests}, owner="enrich_analysis_with_non_equi_tests")
+    else:
+        update_analysis(branch.path, remove=["suitable_tests"], owner="enrich_analysis_with_non_equi_tests")
+
+
+def inputs_suitable_tests(branch: Branch):
+    analysis = branch.analysis()
+    return [analysis.get("patched"), analysis.get("test")]
+
+
+def run_test_methods(branch: Branch):
+    suitable_tests = branch.analysis().get("suitable_tests")
+    if not suitable_tests:
+        raise SkipTask("no suitable tests")
+    if not os.path.isfile(branch.artifact("test-results.txt")):
+        raise SkipTask("no test results")
+    with open(TEST_METHOD_PROMPT_FILE, "r") as f:
+        prompt_template = f.read()
+    cases = find_test_methods(branch.repo, branch.name, branch.path, suitable_tests, prompt_template)
+    if not cases:
+        raise RuntimeError("no test methods found for any suitable test class")
+    update_analysis(branch.path, {"suitable_test_methods": cases}, owner="find_method_for_suitable_testclasses")
+
+
+def inputs_test_methods(branch: Branch):
+    return [branch.analysis().get("suitable_tests"), file_hash(branch.artifact("test-results.txt")),
+            file_hash(TEST_METHOD_PROMPT_FILE), MODEL, REDUCE_TEST_LOGS, file_hash(LOG_REDUCER_FILE),
+            file_hash(SUREFIRE_PARSER_FILE)]
+
+
+def run_source_package(branch: Branch):
+    test_results = branch.artifact("test-results.txt")
+    if not os.path.isfile(test_results) or not os.path.isfile(branch.artifact("analysis.json")):
+        raise SkipTask("no test results or analysis")
+    found_pkg = source_package_from_log(branch.name, test_results)
+    if found_pkg is None:
+        raise SkipTask("no module in test results")
+    update_analysis(branch.path, {"sourcePackage": found_pkg}, owner="extract_source_package")
+
+
+def inputs_source_package(branch: Branch):
+    return [file_hash(branch.artifact("test-results.txt"))]
+
+
+def run_working_projects(_):
+    from check_working_jdk_and_suitable_projects import check_working_jdk_and_suitable_projects
+    # All branches (not only the selected ones), read through read_analysis so the
+    # results the per-branch tasks of this run just wrote are seen
+    analyses = {(repo, name): Branch(repo, name, path).analysis()
+                for repo, name, path in get_catalog(OUTPUTS_DIR).branches()}
+    check_working_jdk_and_suitable_projects(analyses)
+
+
+def inputs_working_projects(branches: List[Branch]):
+    return [file_hash(WORKING_EXAMPLES_FILE),
+            sorted(b.key for b in branches if b.analysis().get("suitable_tests"))]
+
+
+# --- Steps 5 and 6 (evaluation scripts, need the SPARQL endpoint) -------------
+
+def evaluation_script(*argv):
+    def run(_):
+        subprocess.run([sys.executable, *argv], check=True)
+    return run
+
+
+def inputs_experiments(_):
+    return [file_hash(EXPERIMENTS_FILE)]
+
+
+TASKS: List[Task] = [
+    Task("analyze", 1, run_analyze, inputs_analyze,
+         outputs=lambda b: os.path.isfile(b.artifact("analysis.json"))),
+    Task("suitable_tests", 2, run_suitable_tests, inputs_suitable_tests, deps=["analyze"],
+         outputs=lambda b: "suitable_tests" in b.analysis()),
+    Task("test_methods", 2, run_test_methods, inputs_test_methods, deps=["suitable_tests"],
+         outputs=lambda b: "suitable_test_methods" in b.analysis()),
+    Task("source_package", 2, run_source_package, inputs_source_package, deps=["analyze"],
+         outputs=lambda b: "sourcePackage" in b.analysis()),
+    Task("working_projects", 2, run_working_projects, inputs_working_projects, deps=["suitable_tests"],
+         outputs=lambda _: os.path.isfile(SUITABLE_EXAMPLES_FILE), per_branch=False),
+    Task("consistency_check", 5, evaluation_script("evaluation/check_if_patched_in_calltree.py", "--cc1"),
+         inputs_experiments, outputs=lambda _: False, per_branch=False),
+    Task("distances", 6, evaluation_script("evaluation/batch_distances.py"),
+         inputs_experiments, outputs=lambda _: os.path.isfile("data/experiment_distances.csv"), per_branch=False),
+]
+
+
+class PipelineState:
+    """Fingerprint of the last successful run per (task, branch)."""
+
+    def __init__(self, path: str = STATE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS task_state (
+                 task TEXT,
+                 key TEXT,
+                 fingerprint TEXT,
+                 duration REAL,
+                 finished REAL,
+                 PRIMARY KEY (task, key)
+               )"""
+        )
+        self.conn.commit()
+
+    def get(self, task: str, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT fingerprint FROM task_state WHERE task = ? AND key = ?",
+                                    (task, key)).fetchone()
+        return row[0] if row else None
+
+    def put(self, task: str, key: str, fp: str, duration: float) -> None:
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO task_state VALUES (?, ?, ?, ?, ?)",
+                              (task, key, fp, duration, time.time()))
+            self.conn.commit()
+
+
+class PipelineRunner:
+    def __init__(self, tasks: List[Task], state: PipelineState, force: bool = False, dry_run: bool = False):
+        self.tasks = tasks
+        self.state = state
+        self.force = force
+        self.dry_run = dry_run
+        # task name -> outcome -> count, and task name -> seconds spent running
+        self.counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.stats_lock = threading.Lock()
+
+    def _record(self, task: Task, outcome: str, seconds: float = 0.0):
+        with self.stats_lock:
+            self.counts[task.name][outcome] += 1
+            self.seconds[task.name] += seconds
+
+    def run_task(self, task: Task, target, key: str, upstream_changed: bool) -> str:
+        """Run one task if stale; returns 'fresh', 'adopted', 'ran', 'stale', 'skipped' or 'failed'."""
+        fp = fingerprint([task.name, task.inputs(target)])
+        stored = self.state.get(task.name, key)
+
+        if not self.force:
+            # Inputs are read after upstream tasks ran, so the fingerprint alone decides;
+            # only a dry run has to assume that re-running upstream changes them
+            if stored == fp and not (self.dry_run and upstream_changed):
+                self._record(task, "fresh")
+                return "fresh"
+            if stored is None and not upstream_changed and task.outputs(target):
+                # Results produced before the runner tracked this task
+                if not self.dry_run:
+                    self.state.put(task.name, key, fp, 0.0)
+                self._record(task, "adopted")
+                return "adopted"
+
+        if self.dry_run:
+            self._record(task, "stale")
+            return "stale"
+
+        start = time.perf_counter()
+        try:
+            task.run(target)
+        except SkipTask as e:
+            logger.debug("%s skipped for %s: %s", task.name, key, e)
+            self._record(task, "skipped", time.perf_counter() - start)
+            return "skipped"
+        except Exception as e:
+            logger.warning("%s failed for %s: %s", task.name, key, e)
+            self._record(task, "failed", time.perf_counter() - start)
+            return "failed"
+        duration = time.perf_counter() - start
+        # Inputs may include files the task itself wrote (e.g. fetched artifacts)
+        self.state.put(task.name, key, fingerprint([task.name, task.inputs(target)]), duration)
+        self._record(task, "ran", duration)
+        return "ran"
+
+    def run_branch(self, branch: Branch) -> Dict[str, str]:
+        outcomes: Dict[str, str] = {}
+        for task in self.tasks:
+            if not task.per_branch:
+                continue
+            dep_outcomes = [outcomes.get(dep) for dep in task.deps if dep in outcomes]
+            if any(o in ("failed", "skipped") for o in dep_outcomes):
+                self._record(task, "blocked")
+                outcomes[task.name] = "skipped"
+                continue
+            upstream_changed = any(o in ("ran", "stale") for o in dep_outcomes)
+            outcomes[task.name] = self.run_task(task, branch, branch.key, upstream_changed)
+        return outcomes
+
+    def run(self, branches: List[Branch], workers: int):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            branch_outcomes = list(pool.map(self.run_branch, branches))
+
+        for task in self.tasks:
+            if task.per_branch:
+                continue
+            dep_outcomes = [o.get(dep) for o in branch_outcomes for dep in task.deps]
+            upstream_changed = any(o in ("ran", "stale") for o in dep_outcomes)
+            self.run_task(task, branches, GLOBAL_KEY, upstream_changed)
+        self.print_summary(time.perf_counter() - start)
+
+    def print_summary(self, wall: float):
+        outcomes = ["ran", "fresh", "adopted", "stale", "skipped", "blocked", "failed"]
+        print(f"{'step':>4} {'task':<18} " + " ".join(f"{o:>8}" for o in outcomes) + f" {'seconds':>9}")
+        for task in self.tasks:
+            if task.name not in self.counts:
+                continue
+            counts = self.counts[task.name]
+            print(f"{task.step:>4} {task.name:<18} " + " ".join(f"{counts.get(o, 0):>8}" for o in outcomes)
+                  + f" {self.seconds[task.name]:>9.1f}")
+        print(f"Wall time: {wall:.1f}s")
+
+
+def discover_branches(repos: Optional[List[str]] = None) -> List[Branch]:
+    """bugs-dot-jar branches of the artifact source without an outputs/<repo>/<branch> directory yet."""
+    catalog = get_catalog(OUTPUTS_DIR)
+    found = []
+    for repo in repos or SOURCE_REPOS:
+        for name in get_source().list_branches(repo):
+            if name.startswith(BUGS_DOT_JAR) and not catalog.has_branch(repo, name):
+                found.append(Branch(repo, name, os.path.join(OUTPUTS_DIR, repo, name)))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline incrementally, recomputing only stale tasks.")
+    parser.add_argument("--steps", type=int, nargs="+", default=[1, 2],
+                        help="Steps to run (default: 1 2; 5 and 6 need the SPARQL endpoint).")
+    parser.add_argument("--tasks", nargs="+", help="Only run these tasks (default: all tasks of the steps).")
+    parser.add_argument("--repo", nargs="+", help="Only branches of these repos.")
+    parser.add_argument("--branch", nargs="+", help="Only these branch directories.")
+    parser.add_argument("--workers", type=int, default=PIPELINE_WORKERS,
+                        help=f"Branches processed in parallel (default: {PIPELINE_WORKERS}).")
+    parser.add_argument("--force", action="store_true", help="Recompute all selected tasks.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which tasks are stale.")
+    parser.add_argument("--discover", action="store_true",
+                        help="Also list the branches of the artifact source, so Step 1 analyzes branches "
+                             "that have no outputs/ directory yet.")
+    args = parser.parse_args()
+    if args.discover and 1 not in args.steps:
+        parser.error("--discover only applies to Step 1")
+
+    tasks = [t for t in TASKS if t.step in args.steps and (not args.tasks or t.name in args.tasks)]
+    branches = [Branch(repo, name, path) for repo, name, path in get_catalog(OUTPUTS_DIR).branches(args.repo)
+                if not args.branch or name in args.branch]
+    if args.discover:
+        new = [b for b in discover_branches(args.repo) if not args.branch or b.name in args.branch]
+        logger.info("Discovered %d branches without an outputs directory", len(new))
+        branches += new
+    logger.info("Running %s on %d branches", [t.name for t in tasks], len(branches))
+
+    runner = PipelineRunner(tasks, PipelineState(), force=args.force, dry_run=args.dry_run)
+    runner.run(branches, args.workers)
+
+
+if __name__ == "__main__":
+    main()
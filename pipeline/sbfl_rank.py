@@ -0,0 +1,224 @@
+# Spectrum-based suspiciousness ranking of the methods in a failing call tree.
+#
+# Local and deterministic, no LLM involved: every distinct method of the failing
+# trace is scored with Ochiai/Tarantula/DStar against passing traces of the same
+# branch (when given), plus exception-proximity and call-frequency features. The
+# ranking serves as a zero-cost baseline and as a pre-filter for evaluate_calltree.
+
+import argparse
+import json
+import logging
+import math
+import os
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from calltree import ancestors_closure, is_exception_result, load_calltree, pruned_to_xml, split_method_name
+
+logger = logging.getLogger(__name__)
+
+EXPERIMENTS_FILE = os.getenv("EXPERIMENTS_FILE", "data/experiments.xlsx")
+
+FORMULAS = ("ochiai", "tarantula", "dstar")
+
+# Weights of the secondary features; the spectrum score always dominates
+PROXIMITY_WEIGHT = 0.5
+FREQUENCY_WEIGHT = 0.1
+
+
+def ochiai(ef: float, ep: float, nf: float, np_: float) -> float:
+    denom = math.sqrt((ef + nf) * (ef + ep))
+    return ef / denom if denom else 0.0
+
+
+def tarantula(ef: float, ep: float, nf: float, np_: float) -> float:
+    failed = ef + nf
+    passed = ep + np_
+    fail_ratio = ef / failed if failed else 0.0
+    pass_ratio = ep / passed if passed else 0.0
+    if fail_ratio + pass_ratio == 0:
+        return 0.0
+    return fail_ratio / (fail_ratio + pass_ratio)
+
+
+def dstar(ef: float, ep: float, nf: float, np_: float, star: int = 2) -> float:
+    # +1 keeps the score finite for methods only failing runs execute (always the case
+    # without passing traces), so the secondary features still order them
+    return ef ** star / (ep + nf + 1)
+
+
+_FORMULA_FUNCS = {"ochiai": ochiai, "tarantula": tarantula, "dstar": dstar}
+
+
+def exception_origins(methods: Dict[str, dict]) -> List[str]:
+    """Invocations that end with an exception none of their children raised (the throw sites)."""
+    origins = []
+    for method_id, m in methods.items():
+        if not is_exception_result(m):
+            continue
+        if not any(is_exception_result(methods[c]) for c in m["children"]):
+            origins.append(method_id)
+    return origins
+
+
+def exception_distances(methods: Dict[str, dict]) -> Dict[str, int]:
+    """Tree hop distance from every invocation to its nearest exception origin (multi-source BFS)."""
+    dist: Dict[str, int] = {}
+    queue = deque()
+    for origin in exception_origins(methods):
+        dist[origin] = 0
+        queue.append(origin)
+    while queue:
+        cur = queue.popleft()
+        m = methods[cur]
+        neighbours = list(m["children"])
+        if m["callee"] != cur and m["callee"] in methods:
+            neighbours.append(m["callee"])
+        for n in neighbours:
+            if n not in dist:
+                dist[n] = dist[cur] + 1
+                queue.append(n)
+    return dist
+
+
+def covered_methods(methods: Dict[str, dict]) -> set:
+    return {m["name"] for m in methods.values() if m["name"]}
+
+
+def rank_methods(failing: Dict[str, dict], passing: Iterable[Dict[str, dict]] = (),
+                 formula: str = "ochiai") -> List[dict]:
+    """Score every distinct method name of the failing trace, most suspicious first.
+
+    Each trace is one spectrum row. With a single failing trace and no passing
+    traces the spectrum score is identical for all methods, so the ranking falls
+    back to the exception-proximity and call-frequency features.
+    """
+    if formula not in _FORMULA_FUNCS:
+        raise ValueError(f"Unknown formula '{formula}', expected one of {FORMULAS}")
+    score_func = _FORMULA_FUNCS[formula]
+
+    passing_coverage = [covered_methods(p) for p in passing]
+    total_failed = 1
+    total_passed = len(passing_coverage)
+
+    frequency = Counter(m["name"] for m in failing.values() if m["name"])
+    distances = exception_distances(failing)
+    min_distance: Dict[str, int] = {}
+    for method_id, d in distances.items():
+        name = failing[method_id]["name"]
+        if name and (name not in min_distance or d < min_distance[name]):
+            min_distance[name] = d
+
+    ranking = []
+    tie_breaker: Dict[str, float] = {}
+    for name, calls in frequency.items():
+        ef = 1
+        nf = total_failed - ef
+        ep = sum(1 for cov in passing_coverage if name in cov)
+        np_ = total_passed - ep
+        spectrum = score_func(ef, ep, nf, np_)
+        tie_breaker[name] = ochiai(ef, ep, nf, np_)
+        proximity = 1.0 / (1 + min_distance[name]) if name in min_distance else 0.0
+        # Rarely called methods are more specific to the failure than hot utility methods
+        rarity = 1.0 / (1 + math.log(calls))
+        score = spectrum + PROXIMITY_WEIGHT * proximity + FREQUENCY_WEIGHT * rarity
+        class_name, method_name = split_method_name(name)
+        ranking.append({
+            "name": name,
+            "class": class_name,
+            "method": method_name,
+            "score": score,
+            "spectrum": spectrum,
+            "ef": ef,
+            "ep": ep,
+            "calls": calls,
+            "exception_distance": min_distance.get(name),
+        })
+
+    # Deterministic order: score, then Ochiai, then name
+    ranking.sort(key=lambda r: (-r["score"], -tie_breaker[r["name"]], r["name"]))
+    return ranking
+
+
+def top_k_xml(methods: Dict[str, dict], root_id: str, ranking: List[dict], k: int) -> str:
+    """Serialize only the invocations of the top-k methods with their ancestors and direct children."""
+    top_names = {r["name"] for r in ranking[:k]}
+    selected = [method_id for method_id, m in methods.items() if m["name"] in top_names]
+    context = [c for method_id in selected for c in methods[method_id]["children"]]
+    keep = ancestors_closure(methods, selected + context)
+    return pruned_to_xml(methods, root_id, keep)
+
+
+def rank_graph(graph_uri: str, passing_graphs: Iterable[str] = (), formula: str = "ochiai"
+               ) -> Tuple[Dict[str, dict], str, List[dict]]:
+    """Load the failing graph (and passing graphs) and return (methods, root_id, ranking)."""
+    methods, root_id = load_calltree(graph_uri)
+    passing = [load_calltree(p)[0] for p in passing_graphs]
+    return methods, root_id, rank_methods(methods, passing, formula=formula)
+
+
+def _rank_of(ranking: List[dict], patched_classes: List[str], patched_methods: List[str]) -> Optional[int]:
+    """1-based rank of the first method matching any patched class/method combination."""
+    for pos, r in enumerate(ranking, start=1):
+        simple_class = r["class"].split(".")[-1].split("$")[0]
+        for cls in patched_classes:
+            if cls.strip() in (r["class"], simple_class) and r["method"] in [m.strip() for m in patched_methods]:
+                return pos
+    return None
+
+
+def evaluate_experiments(formula: str = "ochiai", output: Optional[str] = None) -> str:
+    """Rank every experiment graph and store the baseline next to the experiments sheet."""
+    import pandas as pd
+
+    df = pd.read_excel(EXPERIMENTS_FILE, header=1)
+    rows = []
+    for _, row in df.iterrows():
+        patched_classes = str(row["Patched class"]).split(",")
+        patched_methods = str(row["Patched method"]).split(",")
+        try:
+            _, _, ranking = rank_graph(row["Graph"], formula=formula)
+        except Exception as e:
+            logger.warning("Nr %s: failed to rank graph %s: %s", row["Nr"], row["Graph"], e)
+            continue
+        top = ranking[0] if ranking else {}
+        rows.append({
+            "Nr": row["Nr"],
+            "Graph": row["Graph"],
+            "SBFL formula": formula,
+            "SBFL top class": top.get("class"),
+            "SBFL top method": top.get("method"),
+            "SBFL rank of patched method": _rank_of(ranking, patched_classes, patched_methods),
+            "Distinct methods": len(ranking),
+        })
+        logger.info("Nr %s: rank of patched method = %s", row["Nr"], rows[-1]["SBFL rank of patched method"])
+
+    output = output or os.path.join(os.path.dirname(EXPERIMENTS_FILE), f"sbfl_{formula}.csv")
+    pd.DataFrame(rows).to_csv(output, index=False)
+    logger.info("SBFL baseline written to %s", output)
+    return output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Spectrum-based suspiciousness ranking of call tree methods.")
+    parser.add_argument("graph_uri", nargs="?", help="Named graph URI of the failing calltree.")
+    parser.add_argument("--passing", nargs="*", default=[], help="Graph URIs of passing runs of the same branch.")
+    parser.add_argument("--formula", choices=FORMULAS, default="ochiai", help="Spectrum formula (default: ochiai).")
+    parser.add_argument("--top-k", type=int, default=20, help="Number of methods to print (default: 20).")
+    parser.add_argument("--experiments", action="store_true",
+                        help="Rank all graphs of the experiments sheet and write the baseline as CSV.")
+    args = parser.parse_args()
+
+    if args.experiments:
+        evaluate_experiments(formula=args.formula)
+        return
+    if not args.graph_uri:
+        parser.error("graph_uri is required unless --experiments is given")
+
+    _, _, ranking = rank_graph(args.graph_uri, args.passing, formula=args.formula)
+    print(json.dumps(ranking[:args.top_k], indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
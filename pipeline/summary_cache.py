@@ -0,0 +1,173 @@
+# Persistent cache of call-tree subtree summaries, shared across graphs and runs.
+#
+# Bugs of the same project (e.g. the CAMEL-* or WICKET-* branches) trace through the
+# same framework subtrees. Subtrees are keyed by a structural hash (method names plus
+# shape, optionally ignoring argument/result values), so a summary produced for one
+# graph is reused for every other graph containing the same subtree. Keys are
+# prefixed with a fingerprint of the summary prompt and model, so changing either
+# never returns summaries produced by the previous ones.
+
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, Optional
+
+from calltree import iter_preorder, load_calltree, subtree_hashes, subtree_sizes, subtree_to_xml
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", ".cache/subtree_summaries.sqlite")
+MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "50000"))
+SUMMARY_PROMPT_FILE = "prompts/summarize_subtree_prompt.txt"
+
+
+class SubtreeSummaryCache:
+    """SQLite-backed LRU cache mapping structural subtree hashes to summaries."""
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS summaries (
+                 key TEXT PRIMARY KEY,
+                 project TEXT,
+                 summary TEXT NOT NULL,
+                 size INTEGER,
+                 created REAL,
+                 last_used REAL
+               )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON summaries(last_used)")
+        self.conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        return row[0]
+
+    def put(self, key: str, summary: str, project: Optional[str] = None, size: Optional[int] = None) -> None:
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO summaries (key, project, summary, size, created, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, project, summary, size, now, now),
+        )
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self) -> None:
+        """Drop the least recently used entries once the cache exceeds max_entries."""
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM summaries").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self.conn.execute(
+                "DELETE FROM summaries WHERE key IN (SELECT key FROM summaries ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+            logger.debug("Evicted %d subtree summaries", overflow)
+
+    def get_or_compute(self, key: str, compute: Callable[[], str], project: Optional[str] = None,
+                       size: Optional[int] = None) -> str:
+        summary = self.get(key)
+        if summary is None:
+            summary = compute()
+            self.put(key, summary, project=project, size=size)
+        return summary
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def summarizer_fingerprint() -> str:
+    """Short hash of the summary prompt template and the analysis model (helper.MODEL)."""
+    from helper import MODEL
+
+    with open(SUMMARY_PROMPT_FILE, "rb") as f:
+        return hashlib.sha1(f.read() + b"\x00" + MODEL.encode("utf-8")).hexdigest()[:12]
+
+
+def llm_summarizer(subtree_xml: str) -> str:
+    """Default summarizer: ask the analysis LLM (helper.py) to summarize one subtree."""
+    from helper import send_to_chat_api
+
+    with open(SUMMARY_PROMPT_FILE, "r", encoding="utf-8") as f:
+        template = f.read()
+    return send_to_chat_api(template.replace("{subtree_xml}", subtree_xml))
+
+
+def summarize_subtrees(methods: Dict[str, dict], root_id: str, cache: SubtreeSummaryCache,
+                       summarize: Callable[[str], str] = llm_summarizer, min_calls: int = 50,
+                       max_calls: int = 5000, project: Optional[str] = None,
+                       ignore_values: bool = True, fingerprint: Optional[str] = None) -> Dict[str, str]:
+    """Summarize the largest subtrees with min_calls <= size <= max_calls.
+
+    Subtrees are chosen top-down, so a summarized subtree's descendants are not
+    summarized again. Returns {method_id: summary}; only cache misses reach the LLM.
+    Cache keys are '<fingerprint>:<subtree hash>'; fingerprint defaults to
+    summarizer_fingerprint() and should identify a custom summarize function.
+    """
+    fingerprint = fingerprint or summarizer_fingerprint()
+    hashes = subtree_hashes(methods, root_id, ignore_values=ignore_values)
+    sizes = subtree_sizes(methods, root_id)
+
+    summaries: Dict[str, str] = {}
+    covered = set()
+    for method_id, _ in iter_preorder(methods, root_id):
+        if methods[method_id]["callee"] in covered:
+            covered.add(method_id)
+            continue
+        size = sizes[method_id]
+        if min_calls <= size <= max_calls:
+            summaries[method_id] = cache.get_or_compute(
+                f"{fingerprint}:{hashes[method_id]}",
+                lambda: summarize(subtree_to_xml(methods, method_id)),
+                project=project,
+                size=size,
+            )
+            covered.add(method_id)
+
+    logger.info("Subtree summaries: %d (cache hits=%d misses=%d)", len(summaries), cache.hits, cache.misses)
+    return summaries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarize the subtrees of a call tree using the shared summary cache.")
+    parser.add_argument("graph_uri", help="Named graph URI of the calltree in the Virtuoso SPARQL store.")
+    parser.add_argument("--project", help="Project name stored with new cache entries (e.g. camel).")
+    parser.add_argument("--min-calls", type=int, default=50, help="Smallest subtree to summarize (default: 50).")
+    parser.add_argument("--max-calls", type=int, default=5000, help="Largest subtree to summarize (default: 5000).")
+    parser.add_argument("--keep-values", action="store_true",
+                        help="Include argument/result values in the subtree hash.")
+    args = parser.parse_args()
+
+    methods, root_id = load_calltree(args.graph_uri)
+    cache = SubtreeSummaryCache()
+    try:
+        summaries = summarize_subtrees(
+            methods, root_id, cache,
+            min_calls=args.min_calls,
+            max_calls=args.max_calls,
+            project=args.project,
+            ignore_values=not args.keep_values,
+        )
+    finally:
+        cache.close()
+    for method_id, summary in summaries.items():
+        print(f"{methods[method_id]['name']} ({method_id}): {summary}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,144 @@
+# Deterministic extraction of failing test methods from Maven/Surefire logs.
+#
+# Surefire names every failing test in the console output, either as a per-test
+# header ("testX(pkg.FooTest)  Time elapsed: 0.1 sec  <<< FAILURE!", or
+# "pkg.FooTest.testX  Time elapsed: ..." in newer versions) or in the "Failed tests:" /
+# "Tests in error:" lists of the Results section ("testX(pkg.FooTest): message" or
+# the trimmed "FooTest>Base.runBare:58->testX:30 message", qualified through the
+# failing classes of the log). One pass over the log collects the (class, method)
+# pairs, so Step 2 only needs the LLM for test classes the log does not name.
+#
+#   python pipeline/surefire_parser.py outputs/camel/<branch>/test-results.txt
+
+import argparse
+import re
+from typing import Dict, Iterable, List, Tuple
+
+HEADER = re.compile(r"^(?P<method>[\w$]+)(\[.*\])?\((?P<cls>[\w$.]+)\)\s+Time elapsed:.*<<< (FAILURE|ERROR)!")
+HEADER_QUALIFIED = re.compile(r"^(?P<cls>[\w$.]+)\.(?P<method>[\w$]+)(\[.*\])?\s+Time elapsed:.*<<< (FAILURE|ERROR)!")
+RESULT_ENTRY = re.compile(r"^\s+(?P<method>[\w$]+)(\[.*?\])?\((?P<cls>[\w$.]+)\)")
+RESULT_TRIMMED = re.compile(r"^\s+(?P<cls>[\w$]+)(?P<rest>[.>]\S+)")
+RESULT_LISTS = ("Failed tests:", "Tests in error:")
+RUNNING = re.compile(r"^Running (?P<cls>[\w$.]+)")
+CLASS_FAILURE = re.compile(r"^Tests run: .*<<< (FAILURE|ERROR)!(\s*$| - in (?P<cls>[\w$.]+))")
+# Surefire's names for failures outside of a test method
+PSEUDO_METHODS = {"initializationError", "classMethod", "warning"}
+
+
+def _trimmed_method(rest: str):
+    """Test method of a trimmed result entry: '.testX:12 msg' or '>Base.runBare:58->testX:30'."""
+    if rest.startswith("."):
+        match = re.match(r"\.([\w$]+)(\[.*?\])?:\d+", rest)
+        return match.group(1) if match else None
+    # Frames without a class prefix are methods of the test class itself
+    for frame in rest[1:].split("->"):
+        match = re.match(r"([\w$]+):\d+$", frame)
+        if match:
+            return match.group(1)
+    return None
+
+
+def parse_failing_tests(lines: Iterable[str]) -> List[Tuple[str, str]]:
+    """(class, method) pairs of all failing tests, in order of first appearance.
+
+    Classes are fully qualified where the log allows. Trimmed result entries only
+    name the simple class; they are qualified with the one failing class of that name
+    (from a failed class summary or a per-test header; with several, the one whose
+    header names the method), and stay simple if that is ambiguous.
+    """
+    found: Dict[Tuple[str, str, bool], None] = {}  # (class, method, trimmed)
+    failed_classes: Dict[str, None] = {}
+    running = None  # last "Running <class>"; older versions only name the class there
+    in_results = False
+
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        match = RUNNING.match(line)
+        if match:
+            running = match.group("cls")
+            continue
+
+        summary = CLASS_FAILURE.match(line)
+        if summary:
+            cls = summary.group("cls") or running
+            if cls:
+                failed_classes[cls] = None
+            continue
+
+        header = HEADER.match(line)
+        if not header:
+            header = HEADER_QUALIFIED.match(line)
+            # "pkg.FooTest  Time elapsed: ... <<< ERROR!" is a failure of the class itself
+            # (e.g. in @BeforeClass), not a method FooTest of a class named pkg
+            if header and f"{header.group('cls')}.{header.group('method')}" in (running, *failed_classes):
+                failed_classes[f"{header.group('cls')}.{header.group('method')}"] = None
+                continue
+        if header:
+            failed_classes[header.group("cls")] = None
+            found[(header.group("cls"), header.group("method"), False)] = None
+            continue
+
+        stripped = line.strip()
+        if stripped.startswith(RESULT_LISTS):
+            in_results = True
+            # Older Surefire versions put the first entry on the same line
+            line = "  " + stripped.split(":", 1)[1].strip()
+        if in_results:
+            if stripped.startswith("Tests run:"):  # end of the Results section
+                in_results = False
+                continue
+            entry = RESULT_ENTRY.match(line)
+            if entry:
+                found[(entry.group("cls"), entry.group("method"), False)] = None
+                continue
+            trimmed = RESULT_TRIMMED.match(line)
+            if trimmed:
+                method = _trimmed_method(trimmed.group("rest"))
+                if method:
+                    found[(trimmed.group("cls"), method, True)] = None
+
+    by_simple_name: Dict[str, List[str]] = {}
+    for cls in failed_classes:
+        by_simple_name.setdefault(cls.rsplit(".", 1)[-1], []).append(cls)
+
+    result: Dict[Tuple[str, str], None] = {}
+    for cls, method, trimmed in found:
+        if trimmed:
+            candidates = by_simple_name.get(cls, [])
+            # A per-test header of the same method decides between classes of the same name
+            named = [c for c in candidates if (c, method, False) in found]
+            if len(named) == 1 or len(candidates) == 1:
+                cls = (named or candidates)[0]
+        if method not in PSEUDO_METHODS:
+            result[(cls, method)] = None
+    return list(result)
+
+
+def parse_failing_tests_file(path: str) -> List[Tuple[str, str]]:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return parse_failing_tests(f)
+
+
+def class_matches(cls: str, test_class: str) -> bool:
+    """Whether a parsed class is the given test class (simple or fully qualified name)."""
+    if cls == test_class:
+        return True
+    simple = cls.rsplit(".", 1)[-1]
+    return simple == test_class or simple.split("$", 1)[0] == test_class
+
+
+def failing_methods(failing: List[Tuple[str, str]], test_class: str) -> List[str]:
+    """Failing methods of one test class."""
+    return list(dict.fromkeys(method for cls, method in failing if class_matches(cls, test_class)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the failing test methods of a Surefire log.")
+    parser.add_argument("path", help="A test-results.txt file.")
+    args = parser.parse_args()
+    for cls, method in parse_failing_tests_file(args.path):
+        print(f"{cls}#{method}")
+
+
+if __name__ == "__main__":
+    main()
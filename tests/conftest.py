@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The pipeline, evaluation and jdk scripts import their siblings directly
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ("pipeline", "evaluation", "jdk"):
+    sys.path.insert(0, os.path.join(ROOT, directory))
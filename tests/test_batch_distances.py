@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+import dijkstra_kg
+from batch_distances import TESTED_HOPS, TESTED_LLM_HOPS, graph_distances
+from dijkstra_kg import GraphIndex, csr_from_edges
+
+GRAPH = "urn:graph:test-batch"
+
+
+def _row(nr, llm_result):
+    return {"Nr": nr, "Repository": "bugs-dot-jar_X-1", "LLM result": llm_result, "Method Exist": 1.0,
+            "Patched class": "org.example.Foo", "Patched method": "bar",
+            "Tested Class": "org.example.FooTest", "Tested Method": "testBar",
+            "Included (patch exists within calltree)": True}
+
+
+def test_malformed_llm_result_only_fails_its_row(monkeypatch):
+    edges = [("org.example.FooTest.testBar", "org.example.Foo.bar")]
+    u = np.array([a for a, _ in edges], dtype=object)
+    v = np.array([b for _, b in edges], dtype=object)
+    graph, labels = csr_from_edges(u, v, np.ones(len(edges)))
+    monkeypatch.setitem(dijkstra_kg._loaded_graphs, GRAPH, GraphIndex(GRAPH, graph, labels))
+    rows = pd.DataFrame([
+        _row(1, '{"class": "org.example.Foo", "method": "bar"}'),
+        _row(2, '{"class": "org.example.Foo", '),
+        _row(3, '["not", "an", "answer"]'),
+    ])
+
+    results = {r["Nr"]: r for r in graph_distances(GRAPH, rows, {"tested-hops", "tested-llm-hops"})}
+
+    assert results[1][TESTED_HOPS] == 1.0 and results[1][TESTED_LLM_HOPS] == 1.0
+    assert results[2]["Error"].startswith("invalid LLM result")
+    assert results[3]["Error"].startswith("invalid LLM result")
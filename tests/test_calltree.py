@@ -0,0 +1,58 @@
+import random
+
+from calltree import find_root, methods_from_bindings, subtree_hashes
+
+
+def _uri(value):
+    return {"type": "uri", "value": value}
+
+
+def _lit(value):
+    return {"type": "literal", "value": value}
+
+
+def _bindings(prefix):
+    """Rows of a root calling parse(String, int) and close(), as CALLTREE_QUERY returns them."""
+    root, parse, close = f"{prefix}:0", f"{prefix}:1", f"{prefix}:2"
+    rows = [
+        {"method": _uri(root), "name": _lit("org.example.FooTest.test"), "callee": _uri(root)},
+        {"method": _uri(close), "name": _lit("org.example.Foo.close"), "callee": _uri(root)},
+    ]
+    cells = [(f"{prefix}:list", f"{prefix}:cell1", "java.lang.String", "abc"),
+             (f"{prefix}:cell1", "http://www.w3.org/1999/02/22-rdf-syntax-ns#nil", "int", "42")]
+    for cell, rest, arg_type, value in cells:
+        rows.append({
+            "method": _uri(parse), "name": _lit("org.example.Foo.parse"), "callee": _uri(root),
+            "argList": _uri(f"{prefix}:list"), "argCell": _uri(cell), "argRest": _uri(rest),
+            "argType": _lit(arg_type), "argValue": _lit(value),
+            "resType": _lit("int"), "resValue": _lit("42"),
+        })
+    return rows
+
+
+def test_args_follow_list_order_regardless_of_row_order():
+    for seed in range(10):
+        rows = _bindings("urn:m")
+        random.Random(seed).shuffle(rows)
+        methods = methods_from_bindings(rows)
+        assert [(a["position"], a["type"]) for a in methods["urn:m:1"]["args"]] == [
+            (0, "java.lang.String"), (1, "int")]
+        assert methods["urn:m:0"]["children"] == ["urn:m:1", "urn:m:2"]
+
+
+def test_subtree_hash_independent_of_row_order_and_ids():
+    keys = set()
+    for seed, prefix in enumerate(["urn:a", "urn:b", "urn:c"]):
+        rows = _bindings(prefix)
+        random.Random(seed).shuffle(rows)
+        methods = methods_from_bindings(rows)
+        root = find_root(methods)
+        keys.add(subtree_hashes(methods, root, ignore_values=False)[root])
+    assert len(keys) == 1
+
+
+def test_rows_without_list_cells_keep_row_order():
+    rows = [{"method": _uri("urn:m:0"), "name": _lit("a.B.c"), "callee": _uri("urn:m:0"),
+             "argType": _lit(t), "argValue": _lit(v)} for t, v in (("int", "1"), ("long", "2"))]
+    methods = methods_from_bindings(rows)
+    assert [a["type"] for a in methods["urn:m:0"]["args"]] == ["int", "long"]
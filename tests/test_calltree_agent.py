@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from calltree_agent import InMemoryCalltreeSource, ScriptedChat, SparqlCalltreeSource, run_agent
+
+
+def _method(method_id, name, children=(), result=None):
+    return {"id": method_id, "name": name, "args": [], "result": result, "children": list(children)}
+
+
+METHODS = {
+    "urn:m:0": _method("urn:m:0", "org.example.FooTest.testBar", ["urn:m:1", "urn:m:2"]),
+    "urn:m:1": _method("urn:m:1", "org.example.Foo.<init>"),
+    "urn:m:2": _method("urn:m:2", "org.example.Foo.bar", ["urn:m:3"]),
+    "urn:m:3": _method("urn:m:3", "org.example.Baz.parse",
+                       result={"type": "exception:java.lang.NumberFormatException", "value": "abc"}),
+}
+
+
+def _tool_outputs(chat):
+    # The last received message list holds every tool result of the session
+    return [json.loads(m["content"]) for m in chat.calls[-1] if m["role"] == "tool"]
+
+
+def test_run_agent_dispatches_tools_and_returns_submitted_answer():
+    source = InMemoryCalltreeSource(METHODS, "urn:m:0")
+    chat = ScriptedChat([
+        {"tool": "get_children", "arguments": {"node_id": "urn:m:0"}},
+        {"tool": "search_methods", "arguments": {"pattern": "Baz."}},
+        {"tool": "get_subtree", "arguments": {"node_id": "urn:m:2", "max_depth": 1}},
+        {"tool": "get_children", "arguments": {"node_id": "urn:m:made-up"}},
+        {"tool": "submit_answer", "arguments": {"class": "org.example.Baz", "method": "parse"}},
+    ])
+
+    answer = run_agent(source, chat, initial_prompt="Find the fault.")
+
+    assert json.loads(answer) == {"class": "org.example.Baz", "method": "parse"}
+    assert len(chat.calls) == 5
+    children, search, subtree, unknown = _tool_outputs(chat)
+    assert [c["name"] for c in children] == ["org.example.Foo.<init>", "org.example.Foo.bar"]
+    assert [m["id"] for m in search] == ["urn:m:3"]
+    assert search[0]["result"] == "exception:java.lang.NumberFormatException=abc"
+    assert subtree == [{"id": "urn:m:3", "name": "org.example.Baz.parse",
+                        "result": "exception:java.lang.NumberFormatException=abc", "parent": "urn:m:2"}]
+    assert "error" in unknown
+    assert source.fetched == {"urn:m:1", "urn:m:2", "urn:m:3"}
+
+
+def test_run_agent_returns_plain_content_without_tool_calls():
+    chat = ScriptedChat([{"content": '{"class": "org.example.Foo", "method": "bar"}'}])
+    answer = run_agent(InMemoryCalltreeSource(METHODS, "urn:m:0"), chat, initial_prompt="Find the fault.")
+    assert json.loads(answer) == {"class": "org.example.Foo", "method": "bar"}
+
+
+def test_sparql_source_rejects_ids_that_are_not_iris():
+    source = SparqlCalltreeSource("urn:graph:test")
+    with pytest.raises(ValueError):
+        source.children("urn:m:1> } DROP GRAPH <urn:graph:test")
+    assert source.queries == 0
+
+
+def test_sparql_source_without_root():
+    source = SparqlCalltreeSource("urn:graph:test")
+    source._select = lambda query: []
+    with pytest.raises(ValueError, match="No root invocation"):
+        source.root()
@@ -0,0 +1,27 @@
+import random
+
+from calltree_diff import diff_calltrees
+from test_calltree import _bindings
+from calltree import find_root, methods_from_bindings
+
+
+def test_identical_runs_do_not_diverge_whatever_the_row_order():
+    for seed in range(10):
+        rng = random.Random(seed)
+        failing_rows, passing_rows = _bindings("urn:f"), _bindings("urn:p")
+        rng.shuffle(failing_rows)
+        rng.shuffle(passing_rows)
+        failing, passing = methods_from_bindings(failing_rows), methods_from_bindings(passing_rows)
+        diff = diff_calltrees(failing, find_root(failing), passing, find_root(passing))
+        assert diff.divergent == []
+
+
+def test_changed_argument_is_reported():
+    failing_rows = _bindings("urn:f")
+    for row in failing_rows:
+        if row.get("argType", {}).get("value") == "int":
+            row["argValue"] = {"type": "literal", "value": "7"}
+    failing, passing = methods_from_bindings(failing_rows), methods_from_bindings(_bindings("urn:p"))
+    diff = diff_calltrees(failing, find_root(failing), passing, find_root(passing))
+    assert diff.changed == ["urn:f:1"]
+    assert diff.added == [] and diff.missing == []
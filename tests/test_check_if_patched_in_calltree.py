@@ -0,0 +1,22 @@
+import numpy as np
+
+import dijkstra_kg
+from check_if_patched_in_calltree import consistency_check_1
+from dijkstra_kg import GraphIndex, csr_from_edges
+
+GRAPH = "urn:graph:test-cc1"
+
+
+def test_check_1_uses_the_loaded_graph_index(monkeypatch):
+    edges = [("org.example.FooTest.testBar", "org.example.Foo.bar"),
+             ("org.example.Foo.bar", "org.example.Foo$Inner.parse")]
+    u = np.array([a for a, _ in edges], dtype=object)
+    v = np.array([b for _, b in edges], dtype=object)
+    graph, labels = csr_from_edges(u, v, np.ones(len(edges)))
+    monkeypatch.setitem(dijkstra_kg._loaded_graphs, GRAPH, GraphIndex(GRAPH, graph, labels))
+    # Any SPARQL access would fail the test: the graph has to come from the index above
+    monkeypatch.setattr(dijkstra_kg, "query_kg", lambda graph_uri: (_ for _ in ()).throw(AssertionError))
+
+    assert consistency_check_1(["org.example.Foo"], ["parse"], GRAPH, 1)
+    assert consistency_check_1(["Foo"], ["bar"], GRAPH, 1)
+    assert not consistency_check_1(["org.example.Foo"], ["close"], GRAPH, 1)
@@ -0,0 +1,42 @@
+import numpy as np
+
+import dijkstra_kg
+from dijkstra_kg import GraphIndex, csr_from_edges
+from landmark_error_report import graph_error
+
+GRAPH = "urn:graph:test-landmarks"
+
+
+def _index():
+    # A hub with three leaves, and a branch hub - a - b whose children src and dst are 2 hops apart
+    edges = [("H", "x1"), ("H", "x2"), ("H", "x3"), ("H", "a"), ("a", "b"), ("b", "src"), ("b", "dst")]
+    u = np.array([a for a, _ in edges], dtype=object)
+    v = np.array([b for _, b in edges], dtype=object)
+    graph, labels = csr_from_edges(u, v, np.ones(len(edges)))
+    return GraphIndex(GRAPH, graph, labels)
+
+
+def test_approximate_distance_matches_returned_path():
+    index = _index()
+    oracle = index.oracle(num_landmarks=1, tolerance=float("inf"))
+    lower, upper, *_ = oracle.bounds(index.match("src"), index.match("dst"))
+    assert upper == 6.0
+    distance, path, src, dst = oracle.shortest_path("src", "dst")
+    assert (distance, path, src, dst) == (2.0, ["src", "b", "dst"], "src", "dst")
+    assert distance == len(path) - 1
+
+
+def test_oracle_cached_per_arguments():
+    index = _index()
+    oracle = index.oracle(num_landmarks=1, tolerance=0.0)
+    assert index.oracle(num_landmarks=1, tolerance=0.0) is oracle
+    assert index.oracle(num_landmarks=3, tolerance=0.0) is not oracle
+
+
+def test_error_report_measures_returned_distance(monkeypatch):
+    monkeypatch.setitem(dijkstra_kg._loaded_graphs, GRAPH, _index())
+    report = graph_error(GRAPH, [("src", "dst")], num_landmarks=1, samples=0)
+    # Upper bound 6, but approximate mode answers with the 2-hop path
+    assert report["Pairs"] == 1
+    assert report["Max abs error"] == 0.0
+    assert report["Bounds agree (%)"] == 0.0
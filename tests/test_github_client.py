@@ -0,0 +1,124 @@
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import github_client
+from github_client import GitHubClient, ResponseCache
+
+BRANCHES = [f"bugs-dot-jar_FOO-{i}_abcdef" for i in range(150)]
+
+
+class MockGitHub(BaseHTTPRequestHandler):
+    """Minimal GitHub API: contents with ETags, paginated branches, one rate-limited path."""
+
+    hits = {}
+    rate_limited = set()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        MockGitHub.hits[url.path] = MockGitHub.hits.get(url.path, 0) + 1
+        if url.path.endswith("/branches"):
+            page, per_page = int(query["page"][0]), int(query["per_page"][0])
+            names = BRANCHES[(page - 1) * per_page:page * per_page]
+            return self._send(200, [{"name": name} for name in names])
+        if url.path.endswith("/contents/.bugs-dot-jar/developer-patch.diff"):
+            if self.headers.get("If-None-Match") == '"v1"':
+                return self._send(304)
+            content = base64.b64encode(b"diff --git a/Foo.java b/Foo.java\n").decode()
+            return self._send(200, {"type": "file", "content": content}, {"ETag": '"v1"'})
+        if url.path.endswith("/contents/.bugs-dot-jar/test-results.txt"):
+            if url.path not in MockGitHub.rate_limited:
+                MockGitHub.rate_limited.add(url.path)
+                return self._send(429, {"message": "secondary rate limit"}, {"Retry-After": "2"})
+            # The budget is almost used up; it resets in 30 seconds
+            reset = str(int(time.time()) + 30)
+            content = base64.b64encode(b"Tests run: 1, Failures: 1\n").decode()
+            return self._send(200, {"type": "file", "content": content},
+                              {"X-RateLimit-Remaining": "1", "X-RateLimit-Reset": reset})
+        return self._send(404, {"message": "Not Found"})
+
+
+@pytest.fixture
+def server():
+    MockGitHub.hits, MockGitHub.rate_limited = {}, set()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), MockGitHub)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Record the back-off instead of waiting for it
+    delays = []
+    monkeypatch.setattr(github_client.time, "sleep", delays.append)
+    return delays
+
+
+def _client(api, tmp_path, name="cache.sqlite"):
+    return GitHubClient(api=api, cache=ResponseCache(str(tmp_path / name)), workers=2)
+
+
+def test_etag_revalidation_reuses_cached_body(server, tmp_path):
+    client = _client(server, tmp_path)
+    first = client.fetch_file("foo", "bugs-dot-jar_FOO-1_abcdef", "developer-patch.diff")
+    second = client.fetch_file("foo", "bugs-dot-jar_FOO-1_abcdef", "developer-patch.diff")
+    client.close()
+
+    assert first == second == b"diff --git a/Foo.java b/Foo.java\n"
+    assert client.stats["requests"] == 2
+    assert client.stats["not_modified"] == 1
+
+
+def test_rate_limit_backoff(server, tmp_path, sleeps):
+    client = _client(server, tmp_path)
+    log = client.fetch_file("foo", "bugs-dot-jar_FOO-1_abcdef", "test-results.txt")
+    assert log == b"Tests run: 1, Failures: 1\n"
+    # 429 with Retry-After: waited and retried
+    assert sleeps == [2.0]
+    assert client.stats["requests"] == 2
+
+    # Remaining budget (1) is within the reserve: the next request waits for the reset
+    client.fetch_file("foo", "bugs-dot-jar_FOO-1_abcdef", "developer-patch.diff")
+    client.close()
+    assert len(sleeps) == 2 and 25 < sleeps[1] <= 32
+    assert client.stats["rate_limit_waits"] == 2
+
+
+def test_branch_pagination_and_cache(server, tmp_path):
+    client = _client(server, tmp_path)
+    assert client.list_branches("foo") == BRANCHES
+    assert MockGitHub.hits["/repos/bugs-dot-jar/foo/branches"] == 2
+    # Served from the branch list cache
+    assert client.list_branches("foo") == BRANCHES
+    assert MockGitHub.hits["/repos/bugs-dot-jar/foo/branches"] == 2
+    client.close()
+
+
+def test_stats_are_consistent_across_threads(server, tmp_path):
+    client = _client(server, tmp_path)
+    branches = [f"bugs-dot-jar_FOO-{i}_abcdef" for i in range(20)]
+    results = client.map(lambda b: client.fetch_file("foo", b, "developer-patch.diff"), branches)
+    client.close()
+    assert all(isinstance(r, bytes) for r in results.values())
+    assert client.stats["requests"] == 20
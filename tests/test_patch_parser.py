@@ -0,0 +1,66 @@
+from patch_parser import analyze_patch
+
+# bugs-dot-jar_CAMEL-3276: the change is inside copyResults, whose declaration lies
+# above the hunk; the hunk header only names the class
+METHOD_BODY_PATCH = """\
+diff --git a/camel-core/src/main/java/org/apache/camel/util/ExchangeHelper.java b/camel-core/src/main/java/org/apache/camel/util/ExchangeHelper.java
+index 0aa9501..7b59811 100644
+--- a/camel-core/src/main/java/org/apache/camel/util/ExchangeHelper.java
++++ b/camel-core/src/main/java/org/apache/camel/util/ExchangeHelper.java
+@@ -208,6 +208,10 @@ public final class ExchangeHelper {
+                 } else {
+                     // if not replace IN instead to keep the MEP
+                     result.getIn().copyFrom(source.getIn());
++                    // clear any existing OUT as the result is on the IN
++                    if (result.hasOut()) {
++                        result.setOut(null);
++                    }
+                 }
+             }
+"""
+
+FIELD_PATCH = """\
+diff --git a/src/main/java/org/example/Foo.java b/src/main/java/org/example/Foo.java
+--- a/src/main/java/org/example/Foo.java
++++ b/src/main/java/org/example/Foo.java
+@@ -3,5 +3,5 @@ package org.example;
+ 
+ public class Foo {
+-    private int size = 1;
++    private int size = 2;
+ 
+     public int bar() {
+"""
+
+
+def test_change_below_a_class_header_is_not_a_definition_change():
+    result = analyze_patch(METHOD_BODY_PATCH)
+    assert result["patched"] == ["org.apache.camel.util.ExchangeHelper"]
+    assert result["patched_definitions"] == []
+    assert result["patched_methods"] == []
+
+
+def test_change_below_a_class_header_with_source():
+    source = "\n".join(
+        ["package org.apache.camel.util;", "", "public final class ExchangeHelper {",
+         "    public static void copyResults(Exchange result, Exchange source) {",
+         "        if (source.hasOut()) {",
+         "            if (result.hasOut()) {"]
+        + ["                // line"] * 201
+        + ["                } else {",
+           "                    // if not replace IN instead to keep the MEP",
+           "                    result.getIn().copyFrom(source.getIn());",
+           "                }",
+           "            }",
+           "        }",
+           "    }",
+           "}"])
+    result = analyze_patch(METHOD_BODY_PATCH, lambda path: source)
+    assert result["patched_methods"] == ["org.apache.camel.util.ExchangeHelper.copyResults"]
+    assert result["patched_definitions"] == []
+
+
+def test_field_change_in_the_hunk_is_a_definition_change():
+    result = analyze_patch(FIELD_PATCH)
+    assert result["patched_definitions"] == ["org.example.Foo"]
+    assert result["patched_methods"] == []
@@ -0,0 +1,84 @@
+import os
+import threading
+
+import pytest
+
+from run_jdk6_and_7 import Executor, FakeExecutor, JsonlResults, record, run_builds
+
+BRANCHES = [f"bugs-dot-jar_CAMEL-{i}_abcdef" for i in range(6)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JsonlResults(str(tmp_path / "results.jsonl"))
+
+
+def test_executor_requires_build():
+    with pytest.raises(TypeError):
+        Executor()
+
+
+def test_resumes_from_recorded_results(store, tmp_path):
+    record(store, BRANCHES[0], "jdk6", "success", "")
+    record(store, BRANCHES[1], "jdk6", "failure", "")
+    executor = FakeExecutor()
+
+    counts = run_builds(BRANCHES, executor, store, workers=2, workdir=str(tmp_path / "work"))
+
+    assert sorted(branch for branch, _ in executor.calls) == BRANCHES[2:]
+    assert counts == {"success": 4}
+    # A second run finds every branch recorded
+    assert run_builds(BRANCHES, FakeExecutor(), store, workers=2, workdir=str(tmp_path / "work")) == {}
+
+
+def test_retry_failed_only_rebuilds_environment_failures(store, tmp_path):
+    record(store, BRANCHES[0], "jdk6", "timeout", "")
+    record(store, BRANCHES[1], "jdk6", "failure", "")
+    record(store, BRANCHES[2], "jdk6", "clone_failed", "")
+
+    executor = FakeExecutor()
+    run_builds(BRANCHES[:3], executor, store, workers=2, workdir=str(tmp_path / "work"))
+    assert executor.calls == []
+
+    executor = FakeExecutor()
+    run_builds(BRANCHES[:3], executor, store, workers=2, workdir=str(tmp_path / "work"), retry_failed=True)
+    # A Maven 'failure' is a real build result and is kept
+    assert sorted(branch for branch, _ in executor.calls) == [BRANCHES[0], BRANCHES[2]]
+    assert store.recorded()[(BRANCHES[0], "jdk6")] == "success"
+
+
+class ContextRecordingExecutor(FakeExecutor):
+    """FakeExecutor that also keeps the build context of every concurrent build."""
+
+    def __init__(self):
+        super().__init__(seconds=0.05)
+        self.contexts = []
+        self.active = 0
+        self.max_active = 0
+        self._count_lock = threading.Lock()
+
+    def build(self, job, jdk):
+        with self._count_lock:
+            self.contexts.append(job.context)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        assert os.path.isdir(job.source)
+        try:
+            return super().build(job, jdk)
+        finally:
+            with self._count_lock:
+                self.active -= 1
+
+
+def test_builds_run_in_isolated_contexts(store, tmp_path):
+    workdir = str(tmp_path / "work")
+    executor = ContextRecordingExecutor()
+
+    counts = run_builds(BRANCHES, executor, store, workers=3, workdir=workdir)
+
+    assert counts == {"success": len(BRANCHES)}
+    assert executor.max_active > 1
+    assert len(set(executor.contexts)) == len(BRANCHES)
+    assert all(os.path.dirname(context) == workdir for context in executor.contexts)
+    # Contexts are removed after their build
+    assert os.listdir(workdir) == []
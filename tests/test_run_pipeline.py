@@ -0,0 +1,29 @@
+import os
+
+import run_pipeline
+from outputs_catalog import OutputsCatalog
+from run_pipeline import discover_branches
+
+
+class ListingSource:
+    def __init__(self, branches):
+        self.branches = branches
+
+    def list_branches(self, repo):
+        return self.branches[repo]
+
+
+def test_discover_branches_only_returns_new_bugs_dot_jar_branches(monkeypatch, tmp_path):
+    os.makedirs(tmp_path / "camel" / "bugs-dot-jar_CAMEL-1_aaa")
+    catalog = OutputsCatalog(str(tmp_path), path=str(tmp_path / "catalog.sqlite"))
+    catalog.refresh()
+    monkeypatch.setattr(run_pipeline, "OUTPUTS_DIR", str(tmp_path))
+    monkeypatch.setattr(run_pipeline, "get_catalog", lambda outputs_root: catalog)
+    monkeypatch.setattr(run_pipeline, "get_source", lambda: ListingSource({
+        "camel": ["master", "bugs-dot-jar_CAMEL-1_aaa", "bugs-dot-jar_CAMEL-2_bbb"],
+    }))
+
+    found = discover_branches(["camel"])
+
+    assert [b.key for b in found] == ["camel/bugs-dot-jar_CAMEL-2_bbb"]
+    assert found[0].path == os.path.join(str(tmp_path), "camel", "bugs-dot-jar_CAMEL-2_bbb")
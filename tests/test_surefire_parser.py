@@ -0,0 +1,37 @@
+from surefire_parser import parse_failing_tests
+
+
+def test_method_headers_and_result_lists():
+    log = [
+        "Running org.apache.camel.FooTest",
+        "Tests run: 2, Failures: 1, Errors: 0, Skipped: 0, Time elapsed: 0.5 sec <<< FAILURE!",
+        "testBar(org.apache.camel.FooTest)  Time elapsed: 0.1 sec  <<< FAILURE!",
+        "Results :",
+        "Failed tests: ",
+        "  FooTest.testBaz:12 expected:<1> but was:<2>",
+        "Tests run: 2, Failures: 1, Errors: 0, Skipped: 0",
+    ]
+    assert parse_failing_tests(log) == [
+        ("org.apache.camel.FooTest", "testBar"),
+        ("org.apache.camel.FooTest", "testBaz"),
+    ]
+
+
+def test_class_level_failure_is_not_a_method():
+    # bugs-dot-jar_ACCUMULO-1544: the class failed in its setup, no method is named
+    log = [
+        "Running org.apache.accumulo.minicluster.MiniAccumuloClusterTest",
+        "Tests run: 1, Failures: 0, Errors: 1, Skipped: 0, Time elapsed: 12.788 sec <<< FAILURE!",
+        "org.apache.accumulo.minicluster.MiniAccumuloClusterTest  Time elapsed: 12.787 sec  <<< ERROR!",
+        "java.lang.RuntimeException: Initializing failed",
+    ]
+    assert parse_failing_tests(log) == []
+
+
+def test_qualified_method_header():
+    log = [
+        "Running org.apache.camel.FooTest",
+        "Tests run: 1, Failures: 1, Errors: 0, Skipped: 0, Time elapsed: 0.5 sec <<< FAILURE! - in org.apache.camel.FooTest",
+        "org.apache.camel.FooTest.testBar  Time elapsed: 0.1 sec  <<< FAILURE!",
+    ]
+    assert parse_failing_tests(log) == [("org.apache.camel.FooTest", "testBar")]